@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据异常索引模块
+由 MK_1_32 数据异常清单一次性构建, 供曲线表(1_15/1_16)和异常电表表(1_35/1_36)共用
+
+每种异常细分类型只按关键字规则分类一次, 得到类别位掩码(AnomalyCategory);
+之后各生成函数按位掩码筛选, 不再逐条记录做字符串匹配
+
+分类规则沿用原各生成函数中的关键字: '三相电流全反'、'混合错误' 不含接线错误关键字,
+不计入 WIRING(与原输出保持一致)。修改分类规则后需递增 pipeline.GENERATOR_VERSION 使表缓存失效
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from enum import IntFlag
+import config
+
+
+class AnomalyCategory(IntFlag):
+    """异常类别, 一种细分类型可同时属于多个类别"""
+    WIRING = 1          # 接线错误, 影响功率方向和功率因数(1_15)
+    HARDWARE = 2        # 硬件/电源故障(非接线错误), 影响电压电流测量精度(1_16)
+    COMMUNICATION = 4   # 通信异常, 导致抄表失败(1_36)
+    METERING = 8        # 计量失准
+
+
+# 各类别的关键字, 细分类型包含任一关键字即属于该类别
+_KEYWORDS = [
+    (AnomalyCategory.WIRING, ('接线', '电流反接', '错相', '相序')),
+    (AnomalyCategory.HARDWARE, ('模块异常', '本体异常', '电源故障')),
+    (AnomalyCategory.COMMUNICATION, ('通信', '4G', 'SIM', '集中器', '模块', '电表')),
+    (AnomalyCategory.METERING, ('计量失准',)),
+]
+
+_categories = {}
+
+
+def classify(subtype):
+    """
+    异常细分类型 -> 类别位掩码(结果按类型缓存, 每种类型只匹配一次关键字)
+
+    接线错误优先: 同时命中接线错误和硬件故障关键字的类型只算接线错误
+    """
+    flags = _categories.get(subtype)
+    if flags is None:
+        flags = AnomalyCategory(0)
+        for category, keywords in _KEYWORDS:
+            if any(keyword in subtype for keyword in keywords):
+                flags |= category
+        if flags & AnomalyCategory.WIRING:
+            flags &= ~AnomalyCategory.HARDWARE
+        _categories[subtype] = flags
+    return flags
+
+
+class AnomalyIndex:
+    """
+    按时间点序号(在时间序列中的下标)组织的数据异常索引, 各数组与时间序列等长, 按序号直接取值
+
+    Attributes:
+        steps: array('q'), 出现异常的时间点序号, 按在清单中首次出现的顺序
+        masks: array('B'), 每个时间点全部异常的类别位掩码之或, 没有异常时为0
+        subtypes: 每个时间点的异常细分类型列表(清单中的顺序), 没有异常时为None
+        flags: 与subtypes对齐, 每条异常的类别位掩码
+    """
+
+    def __init__(self, anomaly_records, time_series):
+        """
+        Args:
+            anomaly_records: MK_1_32 数据行, DATA_TIME 都是时间序列中的时间点
+            time_series: 时间序列(等间隔, 间隔为 config.INTERVAL_MINUTES)
+        """
+        count = len(time_series)
+        self._start = time_series[0] if count else None
+        self._interval = timedelta(minutes=config.INTERVAL_MINUTES)
+        self.steps = array('q')
+        self.masks = array('B', bytes(count))
+        self.subtypes = [None] * count
+        self.flags = [None] * count
+        for anomaly in anomaly_records:
+            step = self.step_of(anomaly['DATA_TIME'])
+            if self.subtypes[step] is None:
+                self.steps.append(step)
+                self.subtypes[step] = []
+                self.flags[step] = []
+            subtype = anomaly['DATA_ANOMALY_TYPE']
+            flags = classify(subtype)
+            self.subtypes[step].append(subtype)
+            self.flags[step].append(flags)
+            self.masks[step] |= flags
+        self._by_step = {}
+
+    def step_of(self, time_str):
+        """时间字符串 -> 时间点序号(按与起点的间隔计算)"""
+        if self._start is None:
+            raise ValueError(f"数据异常时间 {time_str} 不在时间序列中(时间序列为空)")
+        step, rest = divmod(datetime.fromisoformat(time_str) - self._start, self._interval)
+        if rest or not 0 <= step < len(self.masks):
+            raise ValueError(f"数据异常时间 {time_str} 不在时间序列中")
+        return step
+
+    def mask_at(self, step):
+        """时间点(序号)的类别位掩码, 没有异常时为0"""
+        return self.masks[step]
+
+    def types_by_step(self, categories):
+        """
+        属于指定类别(任一)的异常, 按时间点分组(结果缓存, 各生成函数直接使用)
+
+        Args:
+            categories: AnomalyCategory 位掩码, 如 WIRING | METERING
+
+        Returns:
+            [(时间点序号, 细分类型列表), ...], 只包含有该类异常的时间点, 按时间点首次出现的顺序
+        """
+        result = self._by_step.get(categories)
+        if result is None:
+            result = [(step, [subtype for subtype, flags in zip(self.subtypes[step], self.flags[step])
+                              if flags & categories])
+                      for step in self.steps if self.masks[step] & categories]
+            self._by_step[categories] = result
+        return result
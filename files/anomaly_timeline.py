@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据异常时间线模块
+把 MK_1_32 数据异常清单中的每条异常看作一段持续时间, 按开始时间排序后用数组存储, 供曲线表(1_15/1_16)使用
+
+每条异常: [开始, 结束) + 细分类型 + 影响范围(单个电表/台区/供电单位)
+- 开始为清单中的 DATA_TIME, 持续的时间点数按类别从 config.ANOMALY_DURATION_STEPS 中抽取
+- 范围按 config.ANOMALY_SCOPE_WEIGHTS 抽取; 单个电表范围时受影响的电表数为 NUMBER_OF
+- 时长和范围由独立的随机数生成器抽取, 不占用各表的随机序列; 设置了 RANDOM_SEED 时由种子派生, 结果可复现,
+  未设置时每次运行随机播种; 时间线每次运行只构建一次, 分块生成时每块结果一致
+
+查询 [t0, t1) 内生效的异常时, 在开始时间数组上二分查找(开始时间不早于 t0 - 最长时长), 每块只查一次;
+增量生成只使用新时间范围的清单, 上一时间范围内开始、跨越到新范围的异常不会延续
+
+修改抽取规则后需递增 pipeline.GENERATOR_VERSION 使表缓存失效
+"""
+
+import os
+import random
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+import config
+from anomaly_index import AnomalyCategory, classify
+from batch_random import TIME_FORMAT
+
+# 影响范围
+SCOPES = ('meter', 'district', 'supply_org')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(moment):
+    return int((moment - _EPOCH).total_seconds())
+
+
+class AnomalyTimeline:
+    """
+    按开始时间排序的异常区间
+
+    Attributes:
+        starts / ends: array('q'), 各区间的开始/结束时间(1970-01-01起的秒数, 不含结束时间)
+        flags: array('B'), 各区间细分类型的类别位掩码
+        scopes: array('B'), 各区间的影响范围(SCOPES中的下标)
+        subtypes: 各区间的异常细分类型
+        targets: 各区间的影响对象: 单个电表范围为 RUN_METER_ID 元组, 台区范围为台区编号, 供电单位范围为供电单位编号
+    """
+
+    def __init__(self, intervals=()):
+        """intervals: [(开始datetime, 结束datetime, 细分类型, 范围, 影响对象), ...], 顺序任意"""
+        intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = array('q', [_seconds(interval[0]) for interval in intervals])
+        self.ends = array('q', [_seconds(interval[1]) for interval in intervals])
+        self.subtypes = [interval[2] for interval in intervals]
+        self.flags = array('B', [classify(subtype) for subtype in self.subtypes])
+        self.scopes = array('B', [SCOPES.index(interval[3]) for interval in intervals])
+        self.targets = [interval[4] for interval in intervals]
+        self._bounds = [(interval[0].strftime(TIME_FORMAT), interval[1].strftime(TIME_FORMAT))
+                        for interval in intervals]
+        self.max_length = max((end - start for start, end in zip(self.starts, self.ends)), default=0)
+
+    @classmethod
+    def from_records(cls, anomaly_records, meters, seed=None):
+        """
+        由数据异常清单构建
+
+        Args:
+            anomaly_records: MK_1_32 数据行
+            meters: 完整的电表登记表(MeterRegistry), 用于抽取单个电表范围的受影响电表和台区范围的台区
+            seed: 随机种子, 默认为 config.RANDOM_SEED, 都未设置时随机播种
+        """
+        seed = config.RANDOM_SEED if seed is None else seed
+        rng = random.Random(f"{seed}:anomaly_timeline" if seed is not None else os.urandom(16))
+        step = timedelta(minutes=config.INTERVAL_MINUTES)
+        scopes = [scope for scope in SCOPES if config.ANOMALY_SCOPE_WEIGHTS.get(scope, 0) > 0] or ['meter']
+        weights = [config.ANOMALY_SCOPE_WEIGHTS.get(scope, 1) for scope in scopes]
+        intervals = []
+        for anomaly in anomaly_records:
+            subtype = anomaly['DATA_ANOMALY_TYPE']
+            start = datetime.fromisoformat(anomaly['DATA_TIME'])
+            low, high = _duration_range(classify(subtype))
+            end = start + step * rng.randint(low, high)
+            scope = rng.choices(scopes, weights)[0]
+            if scope == 'meter':
+                count = min(max(int(anomaly.get('NUMBER_OF') or 1), 1), len(meters))
+                target = tuple(meters.run_meter_ids[i] for i in rng.sample(range(len(meters)), count))
+            elif scope == 'district':
+                target = rng.choice(meters.districts)['ta_no'] if meters.districts else None
+            else:
+                target = anomaly['SUPPLY_ORG_NO']
+            intervals.append((start, end, subtype, scope, target))
+        return cls(intervals)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def active(self, t0, t1, categories):
+        """
+        [t0, t1) 内生效(与之有重叠)的、属于指定类别(任一)的区间下标, 按开始时间排序
+
+        Args:
+            t0, t1: datetime
+            categories: AnomalyCategory 位掩码
+        """
+        t0, t1 = _seconds(t0), _seconds(t1)
+        # 开始时间早于 t0 - 最长时长 的区间不可能在 t0 之后仍然生效
+        low = bisect_left(self.starts, t0 - self.max_length + 1)
+        high = bisect_left(self.starts, t1)
+        starts, ends, flags = self.starts, self.ends, self.flags
+        return [i for i in range(low, high) if ends[i] > t0 and flags[i] & categories]
+
+    def faults_by_meter(self, time_series, categories, meters):
+        """
+        时间序列覆盖的时间段内, 各受影响电表的异常区间(曲线表每块调用一次)
+
+        Args:
+            time_series: 该块的时间点(升序), 查询 [首个时间点, 最后时间点 + 间隔)
+            categories: AnomalyCategory 位掩码
+            meters: 该块的电表登记表, 台区/供电单位范围展开为其中的电表
+
+        Returns:
+            RUN_METER_ID -> [(开始时间字符串, 结束时间字符串, 细分类型), ...], 按开始时间排序;
+            时间字符串格式与 DATA_TIME 一致, 可直接按字符串比较
+        """
+        if not time_series or not len(self):
+            return {}
+        t1 = time_series[-1] + timedelta(minutes=config.INTERVAL_MINUTES)
+        faults = {}
+        for i in self.active(time_series[0], t1, categories):
+            fault = (*self._bounds[i], self.subtypes[i])
+            scope, target = SCOPES[self.scopes[i]], self.targets[i]
+            if scope == 'meter':
+                meter_ids = target
+            elif scope == 'district':
+                meter_ids = [meters.run_meter_ids[p] for p in meters.positions_in_district(target)]
+            else:
+                meter_ids = [meters.run_meter_ids[p]
+                             for district in meters.districts if district['supply_org_no'] == target
+                             for p in meters.positions_in_district(district['ta_no'])]
+            for meter_id in meter_ids:
+                faults.setdefault(meter_id, []).append(fault)
+        return faults
+
+
+def _duration_range(flags):
+    """类别位掩码 -> 持续时间点数的范围, 同时属于多个类别时按 AnomalyCategory 的顺序取第一个"""
+    for category in AnomalyCategory:
+        if flags & category and category.name in config.ANOMALY_DURATION_STEPS:
+            low, high = config.ANOMALY_DURATION_STEPS[category.name]
+            return max(int(low), 1), max(int(high), int(low), 1)
+    return 1, 1
+
+
+def fault_at(faults, meter_id, time_str):
+    """电表在时间点的异常细分类型(多个异常重叠时取最早开始的), 没有异常时返回 None"""
+    for start, end, subtype in faults.get(meter_id, ()):
+        if start <= time_str < end:
+            return subtype
+    return None
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内数据生成接口
+直接返回各表的列式数据(DataFrame), 无需写出CSV再读回
+
+用法:
+    from api import generate
+    frames = generate(tables=['1_3', '1_35'], config={'NUM_DISTRICTS': 2, 'TOTAL_METERS': 22})
+    frames['1_35'].head()
+"""
+
+import config as config_module
+from checksums import write_dataset_manifest
+from csv_writer_and_main import write_table
+from dataset_reader import convert_column, to_output
+from object_store import make_output_dir
+from pipeline import build_inputs, build_tables, resolve_tables
+from table_schemas import COLUMN_DTYPES, table_headers
+
+
+def rows_to_columns(key, rows):
+    """把生成器输出的行字典列表转换为列式数据(格式同dataset_reader的'columns')"""
+    dtypes = COLUMN_DTYPES[key]
+    columns = {}
+    for header in table_headers(key):
+        values = [row.get(header) for row in rows]
+        values = ['' if v is None else v for v in values]
+        columns[header] = convert_column(values, dtypes.get(header))
+    return columns
+
+
+def generate(tables=None, config=None, output='pandas', write=False):
+    """
+    在进程内生成数据表并以列式数据返回
+
+    Args:
+        tables: 需要返回的表编号列表(如 ['1_3', '1_35']), None 表示全部;
+                上游依赖表会自动生成, 但只返回指定的表
+        config: 临时覆盖的配置项字典, 如 {'NUM_DISTRICTS': 2, 'END_DATE': datetime(...)}
+        output: 'pandas' / 'polars' / 'numpy' / 'columns'(仅标准库)
+        write: 是否同时写出CSV文件(写出全部已生成的表)及数据集清单
+
+    Returns:
+        表编号 -> 对应格式的数据
+    """
+    with config_module.override(**(config or {})):
+        inputs = build_inputs()
+        _, data = build_tables(tables, inputs)
+        if write:
+            make_output_dir(config_module.OUTPUT_DIR)
+            files = []
+            for key, rows in data.items():
+                files.extend(write_table(key, rows, inputs['meters']))
+            write_dataset_manifest(config_module.OUTPUT_DIR, files)
+
+    targets = resolve_tables(None) if tables is None else list(tables)
+    return {key: to_output(rows_to_columns(key, data[key]), COLUMN_DTYPES[key], output)
+            for key in targets}
@@ -5,24 +5,28 @@
 包含台区、电表等基础数据的生成函数
 """
 
-import random
-from datetime import datetime, timedelta
-from utils import generate_id, get_unified_org_no
-from config import NUM_DISTRICTS, NUM_SUB_METERS
+import id_allocator
+from column_specs import generate_rows
+from utils import get_unified_org_no
+from meter_registry import MeterRegistry
+import config
 
 
 def generate_district_and_meters():
-    """生成台区和电表的基础信息"""
-    from config import SUPPLY_ORG_NUMBERS
+    """
+    生成台区和电表的基础信息
 
+    Returns:
+        (districts, meters): 台区信息列表, 电表登记表(MeterRegistry)
+    """
     districts = []
-    meters = []
+    meters = MeterRegistry(districts)
 
-    for i in range(NUM_DISTRICTS):
+    for i in range(config.NUM_DISTRICTS):
         district_no = f"TQ{i + 1:04d}"
         district_name = f"台区{i + 1}"
         district_addr = f"测试地址{i + 1}号"
-        supply_org_no = SUPPLY_ORG_NUMBERS[i]  # 每个台区对应一个供电单位编号
+        supply_org_no = config.SUPPLY_ORG_NUMBERS[i]  # 每个台区对应一个供电单位编号
 
         districts.append({
             'ta_no': district_no,
@@ -32,175 +36,165 @@ def generate_district_and_meters():
             'supply_org_no': supply_org_no  # 新增：供电单位编号
         })
 
-        # 生成总表
-        total_meter = {
-            'run_meter_id': generate_id(f'M{district_no}T', 16),
-            'ta_no': district_no,
-            'ma_auxil_table_signs': '1',  # 1-主表(总表)
-            'meter_type': 'total',
-            'supply_org_no': supply_org_no  # 新增：供电单位编号
-        }
-        meters.append(total_meter)
-
-        # 生成分表
-        for j in range(NUM_SUB_METERS):
-            sub_meter = {
-                'run_meter_id': generate_id(f'M{district_no}S{j + 1:02d}', 16),
-                'ta_no': district_no,
-                'ma_auxil_table_signs': '0',  # 0-副表(分表)
-                'meter_type': 'sub',
-                'supply_org_no': supply_org_no  # 新增：供电单位编号
-            }
-            meters.append(sub_meter)
+        # 生成总表(ma_auxil_table_signs='1', 主表)
+        meters.append(id_allocator.allocate(f'M{district_no}T', 1)[0], i, total=True)
+
+        # 生成分表(ma_auxil_table_signs='0', 副表), 整个台区一次分配
+        for meter_id in id_allocator.allocate(f'M{district_no}S', config.NUM_SUB_METERS):
+            meters.append(meter_id, i, total=False)
 
     return districts, meters
 
 
 def generate_table_1_3(meters):
-    """生成运行电能表数据"""
-    data = []
-    current_time = datetime.now()
-
-    for meter in meters:
-        row = {
-            'RUN_METER_ID': meter['run_meter_id'],
-            'AREA_CODE': '440000',  # 广东省代码
-            'LT_CHK_DATE': (current_time - timedelta(days=random.randint(30, 365))).strftime('%Y-%m-%d %H:%M:%S'),
-            'MA_AUXIL_TABLE_SIGNS': meter['ma_auxil_table_signs'],
-            'PR_CODE': '1',  # 1-供电局
-            'MANU_FLAG': '0',  # 0-否(非人工控制)
-            'ED_BGN_TIME': None,
-            'ED_RATIO': None,
-            'ED_TYPE': None,
-            'ED_END_TIME': None,
-            'ED_AMT': None,
-            'SUPPLY_ORG_CODE': meter['supply_org_no'],  # 使用电表对应的供电单位编号
-            'PF_THRESHHOLD': '100.00',
-            'MADE_NO': f'MFG{random.randint(100000, 999999)}',
-            'TIME_DIGIT_CODE': '6.2',
-            'CREATE_TIME': (current_time - timedelta(days=180)).strftime('%Y-%m-%d %H:%M:%S'),
-            'ARRIVE_BATCH': f'BATCH{random.randint(1000, 9999)}',
-            'AGREE_TIP_PRC': str(round(random.uniform(0.8, 1.2), 4)),
-            'AGREE_PEAK_PRC': str(round(random.uniform(0.6, 0.9), 4)),
-            'AGREE_FLAT_PRC': str(round(random.uniform(0.4, 0.6), 4)),
-            'AGREE_PRC': str(round(random.uniform(0.5, 0.7), 4)),
-            'AGREE_VALLEY_PRC': str(round(random.uniform(0.2, 0.4), 4)),
-            'PLANT_AREA': str(random.randint(50, 200)),
-            'OLD_READ_NO': None,
-            'PARAM_ID': generate_id('PARAM', 16),
-            'REMARKS': '正常运行',
-            'RP_NEED_AMT': '50.00',
-            'INSTALL_POSITION': f'{meter["ta_no"]}台区内',
-            'INSTALL_DATE': (current_time - timedelta(days=random.randint(365, 1095))).strftime('%Y-%m-%d %H:%M:%S'),
-            'SWITCH_FLAG': '1',  # 1-带开关
-            'READ_ORDER': str(meters.index(meter) + 1),
-            'OPERATED_TIME': current_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'DATA_PLAT_CHG_TIME': current_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'SUPER_CAPACIT_FLAG': '0',
-            'DIRECT_COLLECT_SEND_FLAG': '1',
-            'PREPAY_DEDUCT_FLAG': '0',
-            'BAUD_RATE': '9600',
-            'PHASE_CODE': str(random.randint(1, 3)),  # 1-A相, 2-B相, 3-C相
-            'BOX_CABINET_POSITION_NO': str(meters.index(meter) + 1),
-            'LAT': f'{random.uniform(22.0, 24.0):.6f}',
-            'LNG': f'{random.uniform(113.0, 115.0):.6f}',
-            'TOTAL_FACTOR': str(round(random.uniform(1.0, 10.0), 3)),
-            'MARKET_PRJ_ID': generate_id('PRJ', 16),
-            'METER_DIGITS_CODE': '6.2',
-            'METER_BOX_CABINET_ID': generate_id('BOX', 16),
-            'EQU_ID': generate_id('EQU', 16),
-            'EQU_MAIN_PERSON_ID': generate_id('PER', 16),
-            'CC_SWITCH_TYPE': 'TYPE_A',
-            'ASSETS_NO': f'ASSET{random.randint(100000, 999999)}',
-            'ROTATE_CYCLE': '8',  # 8年轮换周期
-            'ROTATE_VAILD_DATE': None,
-            'MAINTAIN_GROUP': '运维班组A',
-            'OPER_COMM_PROTOCOL': 'DL/T645',
-            'OPER_COMM_MODE': 'RS485',
-            'OVERDRAFT_FLAG': '0',
-            'OVERDRAFT_QUOTA': None,
-            'COMM_ADDR1': f'{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}',
-            'COMM_ADDR2': None,
-            'COMM_MODE_CODE': 'RS485',
-            'COMM_PROTOCOL_CODE': 'DL/T645-2007',
-            'AREA_SORT_CODE': '1',
-            'PRESET_AMT': str(random.uniform(100, 500)),
-            'WARN_THRESHOLD1': '100.00',
-            'WARN_THRESHOLD2': '50.00',
-            'WARN_THRESHOLD3': '20.00',
-        }
-        data.append(row)
-
-    return data
+    """
+    生成运行电能表数据, meters 为电表登记表(MeterRegistry), 行顺序与登记顺序一致
+
+    按字段生成规则(column_specs)整列生成, 百万级电表也只需数秒
+    """
+    ta_nos = [district['ta_no'] for district in meters.districts]
+    org_nos = [district['supply_org_no'] for district in meters.districts]
+    sources = {'meters': {
+        'RUN_METER_ID': list(meters.run_meter_ids),
+        'MA_AUXIL_TABLE_SIGNS': ['1' if total else '0' for total in meters.is_total],
+        'SUPPLY_ORG_NO': [org_nos[i] for i in meters.district_index],
+        'TA_NO': [ta_nos[i] for i in meters.district_index],
+    }}
+
+    return generate_rows('1_3', [
+        ('RUN_METER_ID', "source(meters.RUN_METER_ID)"),
+        ('AREA_CODE', "const('440000')"),  # 广东省代码
+        ('LT_CHK_DATE', "days_before(30, 365)"),
+        ('MA_AUXIL_TABLE_SIGNS', "source(meters.MA_AUXIL_TABLE_SIGNS)"),
+        ('PR_CODE', "const('1')"),  # 1-供电局
+        ('MANU_FLAG', "const('0')"),  # 0-否(非人工控制)
+        ('ED_BGN_TIME', "const(None)"),
+        ('ED_RATIO', "const(None)"),
+        ('ED_TYPE', "const(None)"),
+        ('ED_END_TIME', "const(None)"),
+        ('ED_AMT', "const(None)"),
+        ('SUPPLY_ORG_CODE', "source(meters.SUPPLY_ORG_NO)"),  # 使用电表对应的供电单位编号
+        ('PF_THRESHHOLD', "const('100.00')"),
+        ('MADE_NO', "integer(100000, 999999, 'MFG')"),
+        ('TIME_DIGIT_CODE', "const('6.2')"),
+        ('CREATE_TIME', "clock(180)"),
+        ('ARRIVE_BATCH', "integer(1000, 9999, 'BATCH')"),
+        ('AGREE_TIP_PRC', "uniform(0.8, 1.2, 4)"),
+        ('AGREE_PEAK_PRC', "uniform(0.6, 0.9, 4)"),
+        ('AGREE_FLAT_PRC', "uniform(0.4, 0.6, 4)"),
+        ('AGREE_PRC', "uniform(0.5, 0.7, 4)"),
+        ('AGREE_VALLEY_PRC', "uniform(0.2, 0.4, 4)"),
+        ('PLANT_AREA', "integer(50, 200)"),
+        ('OLD_READ_NO', "const(None)"),
+        ('PARAM_ID', "allocate('PARAM')"),
+        ('REMARKS', "const('正常运行')"),
+        ('RP_NEED_AMT', "const('50.00')"),
+        ('INSTALL_POSITION', "source(meters.TA_NO, '{}台区内')"),
+        ('INSTALL_DATE', "days_before(365, 1095)"),
+        ('SWITCH_FLAG', "const('1')"),  # 1-带开关
+        ('READ_ORDER', "sequence(1)"),
+        ('OPERATED_TIME', "clock()"),
+        ('DATA_PLAT_CHG_TIME', "clock()"),
+        ('SUPER_CAPACIT_FLAG', "const('0')"),
+        ('DIRECT_COLLECT_SEND_FLAG', "const('1')"),
+        ('PREPAY_DEDUCT_FLAG', "const('0')"),
+        ('BAUD_RATE', "const('9600')"),
+        ('PHASE_CODE', "choice(['1', '2', '3'])"),  # 1-A相, 2-B相, 3-C相
+        ('BOX_CABINET_POSITION_NO', "sequence(1)"),
+        ('LAT', "decimals(22.0, 24.0, 6)"),
+        ('LNG', "decimals(113.0, 115.0, 6)"),
+        ('TOTAL_FACTOR', "uniform(1.0, 10.0, 3)"),
+        ('MARKET_PRJ_ID', "allocate('PRJ')"),
+        ('METER_DIGITS_CODE', "const('6.2')"),
+        ('METER_BOX_CABINET_ID', "allocate('BOX')"),
+        ('EQU_ID', "allocate('EQU')"),
+        ('EQU_MAIN_PERSON_ID', "allocate('PER')"),
+        ('CC_SWITCH_TYPE', "const('TYPE_A')"),
+        ('ASSETS_NO', "allocate('ASSET')"),
+        ('ROTATE_CYCLE', "const('8')"),  # 8年轮换周期
+        ('ROTATE_VAILD_DATE', "const(None)"),
+        ('MAINTAIN_GROUP', "const('运维班组A')"),
+        ('OPER_COMM_PROTOCOL', "const('DL/T645')"),
+        ('OPER_COMM_MODE', "const('RS485')"),
+        ('OVERDRAFT_FLAG', "const('0')"),
+        ('OVERDRAFT_QUOTA', "const(None)"),
+        ('COMM_ADDR1', "ipv4()"),
+        ('COMM_ADDR2', "const(None)"),
+        ('COMM_MODE_CODE', "const('RS485')"),
+        ('COMM_PROTOCOL_CODE', "const('DL/T645-2007')"),
+        ('AREA_SORT_CODE', "const('1')"),
+        ('PRESET_AMT', "uniform(100, 500)"),
+        ('WARN_THRESHOLD1', "const('100.00')"),
+        ('WARN_THRESHOLD2', "const('50.00')"),
+        ('WARN_THRESHOLD3', "const('20.00')"),
+    ], len(meters), sources)
 
 
 def generate_table_1_4(districts):
-    """生成运行计量自动化终端数据 - 每个台区生成一个终端记录"""
-    data = []
-    current_time = datetime.now()
-
-    # 为每个台区生成一个终端
-    for district in districts:
-        row = {
-            'RUN_TERM_ID': generate_id('TERM', 16),
-            'IP_ADDR': f'{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}',
-            'LT_CHK_DATE': (current_time - timedelta(days=random.randint(30, 365))).strftime('%Y-%m-%d %H:%M:%S'),
-            'UP_COMM_CODE': 'GPRS',
-            'UP_PROTOCOL_CODE': 'DL/T645-2007',
-            'UP_CHANNEL_1': 'CHANNEL_1',
-            'UP_CHANNEL_2': 'CHANNEL_2',
-            'DOWN_COMM_CODE': 'RS485',
-            'DOWN_PROTOCOL_CODE': 'DL/T645-2007',
-            'MAIN_COMM_MODE': 'GPRS',
-            'MAIN_TERM_FLAG': '1',
-            'MAIN_TERM_COMM_ADDR': f'{random.randint(1000000000, 9999999999)}',
-            'SUPPLY_ORG_NO': district['supply_org_no'],  # 使用台区对应的供电单位编号
-            'TIME_MP_FUNCTION_CODE': '1',
-            'CREATE_TIME': (current_time - timedelta(days=180)).strftime('%Y-%m-%d %H:%M:%S'),
-            'ARRIVE_BATCH': f'BATCH{random.randint(1000, 9999)}',
-            'PARAM_ID': generate_id('PARAM', 16),
-            'AREA_CODE': '440000',
-            'SESERVE_COMM_MODE': 'GPRS',
-            'SAFE_INTER_MODE': '1',
-            'INSTALL_ADDR': district['ta_addr'],
-            'INSTALL_DATE': (current_time - timedelta(days=random.randint(365, 1095))).strftime('%Y-%m-%d %H:%M:%S'),
-            'WIRE_MODE_CODE': '1',
-            'OPERATED_TIME': current_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'DATA_PLAT_CHG_TIME': current_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'IS_INSTALL_BRANCH_EQU': '1',
-            'FACTORY_ID': generate_id('FAC', 16),
-            'ELEC_CUST_NO': f'CUST{random.randint(100000, 999999)}',
-            'OFFLINE_FLAG': '0',
-            'BOX_CABINET_POSITION_NO': '1',
-            'LAT': f'{random.uniform(22.0, 24.0):.6f}',
-            'TERM_USEAGE': '1',
-            'LNG': f'{random.uniform(113.0, 115.0):.6f}',
-            'TOTAL_FACTOR': str(round(random.uniform(1.0, 10.0), 3)),
-            'MARKET_PRJ_ID': generate_id('PRJ', 16),
-            'MARKET_PRJ_NO': f'PRJ{random.randint(100000, 999999)}',
-            'METER_BOX_CABINET_ID': generate_id('BOX', 16),
-            'METERING_POINT_NUMBER': f'MP{random.randint(100000, 999999)}',
-            'EQU_ID': generate_id('EQU', 16),
-            'EQU_MODEL_CODE': f'MODEL{random.randint(100, 999)}',
-            'EQU_SORT_CODE': '1',
-            'EQU_TYPE_CODE': '1',
-            'EQU_MAIN_PERSON_ID': generate_id('PER', 16),
-            'ASSETS_NO': f'ASSET{random.randint(100000, 999999)}',
-            'CONVERTER1': 'RS485',
-            'CONVERTER2': 'GPRS',
-            'ROTATE_CYCLE': '8',
-            'MAINTAIN_GROUP': '运维班组A',
-            'RUN_UP_COMM_CODE': 'GPRS',
-            'RUN_DOWN_COMM_CODE': 'RS485',
-            'COMM_ADDR': f'{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}',
-            'DOWN_COMM_CHANNEL': 'RS485',
-            'METERING_POINT_NAME': f'{district["ta_name"]}计量点',
-            'COMM_TYPE': 'GPRS',
-            'PROTOCOL_TYPE': 'DL/T645-2007',
-            'TERM_TYPE_CODE': '1',
-            'PRESET_AMT': str(random.uniform(100, 500)),
-            'REMARKS': '正常运行',
-        }
-        data.append(row)
-
-    return data
\ No newline at end of file
+    """生成运行计量自动化终端数据 - 每个台区生成一个终端记录(按字段生成规则整列生成)"""
+    sources = {'districts': {
+        'SUPPLY_ORG_NO': [district['supply_org_no'] for district in districts],
+        'TA_ADDR': [district['ta_addr'] for district in districts],
+        'TA_NAME': [district['ta_name'] for district in districts],
+    }}
+
+    return generate_rows('1_4', [
+        ('RUN_TERM_ID', "allocate('TERM')"),
+        ('IP_ADDR', "ipv4()"),
+        ('LT_CHK_DATE', "days_before(30, 365)"),
+        ('UP_COMM_CODE', "const('GPRS')"),
+        ('UP_PROTOCOL_CODE', "const('DL/T645-2007')"),
+        ('UP_CHANNEL_1', "const('CHANNEL_1')"),
+        ('UP_CHANNEL_2', "const('CHANNEL_2')"),
+        ('DOWN_COMM_CODE', "const('RS485')"),
+        ('DOWN_PROTOCOL_CODE', "const('DL/T645-2007')"),
+        ('MAIN_COMM_MODE', "const('GPRS')"),
+        ('MAIN_TERM_FLAG', "const('1')"),
+        ('MAIN_TERM_COMM_ADDR', "integer(1000000000, 9999999999)"),
+        ('SUPPLY_ORG_NO', "source(districts.SUPPLY_ORG_NO)"),  # 使用台区对应的供电单位编号
+        ('TIME_MP_FUNCTION_CODE', "const('1')"),
+        ('CREATE_TIME', "clock(180)"),
+        ('ARRIVE_BATCH', "integer(1000, 9999, 'BATCH')"),
+        ('PARAM_ID', "allocate('PARAM')"),
+        ('AREA_CODE', "const('440000')"),
+        ('SESERVE_COMM_MODE', "const('GPRS')"),
+        ('SAFE_INTER_MODE', "const('1')"),
+        ('INSTALL_ADDR', "source(districts.TA_ADDR)"),
+        ('INSTALL_DATE', "days_before(365, 1095)"),
+        ('WIRE_MODE_CODE', "const('1')"),
+        ('OPERATED_TIME', "clock()"),
+        ('DATA_PLAT_CHG_TIME', "clock()"),
+        ('IS_INSTALL_BRANCH_EQU', "const('1')"),
+        ('FACTORY_ID', "allocate('FAC')"),
+        ('ELEC_CUST_NO', "integer(100000, 999999, 'CUST')"),
+        ('OFFLINE_FLAG', "const('0')"),
+        ('BOX_CABINET_POSITION_NO', "const('1')"),
+        ('LAT', "decimals(22.0, 24.0, 6)"),
+        ('TERM_USEAGE', "const('1')"),
+        ('LNG', "decimals(113.0, 115.0, 6)"),
+        ('TOTAL_FACTOR', "uniform(1.0, 10.0, 3)"),
+        ('MARKET_PRJ_ID', "allocate('PRJ')"),
+        ('MARKET_PRJ_NO', "integer(100000, 999999, 'PRJ')"),
+        ('METER_BOX_CABINET_ID', "allocate('BOX')"),
+        ('METERING_POINT_NUMBER', "integer(100000, 999999, 'MP')"),
+        ('EQU_ID', "allocate('EQU')"),
+        ('EQU_MODEL_CODE', "integer(100, 999, 'MODEL')"),
+        ('EQU_SORT_CODE', "const('1')"),
+        ('EQU_TYPE_CODE', "const('1')"),
+        ('EQU_MAIN_PERSON_ID', "allocate('PER')"),
+        ('ASSETS_NO', "allocate('ASSET')"),
+        ('CONVERTER1', "const('RS485')"),
+        ('CONVERTER2', "const('GPRS')"),
+        ('ROTATE_CYCLE', "const('8')"),
+        ('MAINTAIN_GROUP', "const('运维班组A')"),
+        ('RUN_UP_COMM_CODE', "const('GPRS')"),
+        ('RUN_DOWN_COMM_CODE', "const('RS485')"),
+        ('COMM_ADDR', "ipv4()"),
+        ('DOWN_COMM_CHANNEL', "const('RS485')"),
+        ('METERING_POINT_NAME', "source(districts.TA_NAME, '{}计量点')"),
+        ('COMM_TYPE', "const('GPRS')"),
+        ('PROTOCOL_TYPE', "const('DL/T645-2007')"),
+        ('TERM_TYPE_CODE', "const('1')"),
+        ('PRESET_AMT', "uniform(100, 500)"),
+        ('REMARKS', "const('正常运行')"),
+    ], len(districts), sources)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量随机数模块
+按列一次生成整列随机值, 供大规模数据(百万级电表)的生成函数使用
+
+安装了numpy时由numpy生成器整列生成, 生成器的种子取自已播种的全局random(pipeline.seed_random),
+同一随机种子下结果可复现; 未安装numpy时逐个调用random, 取值分布相同, 但具体随机值与安装numpy时不同
+
+格式化函数(日期、IP地址、定长小数等)按列处理, 日期按取值范围预先格式化后查表
+
+事件类表(1_27/1_29/1_30)按事件整列生成: 先抽每个电表的事件数, 再由 sample_each 一次抽出全部电表的
+事件时间点(不重复), 各字段按事件数整列抽取, 分档字段(如风险等级)用 bucketize 一次分档;
+稀疏事件表(1_33/1_34)由 bernoulli_indices 按命中间隔跳跃抽取出现事件的位置, 不逐个时间点抛硬币
+"""
+
+import math
+import random
+from bisect import bisect_right
+from datetime import timedelta
+
+try:
+    import numpy as _np
+except ImportError:  # 未安装numpy时逐个调用random
+    _np = None
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class BatchRandom:
+    """
+    整列随机数生成器, 各方法返回长度为n的列表
+
+    Args:
+        seed: 种子, None 表示从全局random取一个(全局random已按表播种时结果可复现)
+    """
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self._rng = _np.random.default_rng(seed) if _np is not None else random.Random(seed)
+
+    def integers(self, low, high, n):
+        """[low, high] 上的均匀整数(含两端, 与 random.randint 一致)"""
+        if _np is not None:
+            return self._rng.integers(low, high + 1, n).tolist()
+        return [self._rng.randint(low, high) for _ in range(n)]
+
+    def uniform(self, low, high, n):
+        """[low, high) 上的均匀浮点数"""
+        if _np is not None:
+            return self._rng.uniform(low, high, n).tolist()
+        return [self._rng.uniform(low, high) for _ in range(n)]
+
+    def rounded(self, low, high, digits, n):
+        """均匀浮点数保留digits位小数后的字符串(与 str(round(random.uniform(low, high), digits)) 一致)"""
+        if _np is not None:
+            return list(map(str, _np.round(self._rng.uniform(low, high, n), digits).tolist()))
+        return [str(round(self._rng.uniform(low, high), digits)) for _ in range(n)]
+
+    def choice(self, options, n):
+        """从options中等概率有放回地选取"""
+        if _np is not None:
+            return take(options, self._rng.integers(0, len(options), n).tolist())
+        return [self._rng.choice(options) for _ in range(n)]
+
+    def days_before(self, current_time, low, high, n):
+        """
+        current_time 之前 [low, high] 天(均匀整数天)的时间字符串
+
+        不同取值只有 high-low+1 个, 预先格式化后按偏移查表
+        """
+        table = [(current_time - timedelta(days=days)).strftime(TIME_FORMAT) for days in range(low, high + 1)]
+        return [table[days - low] for days in self.integers(low, high, n)]
+
+    def days_before_each(self, moments, low, high):
+        """
+        moments 中每个时间之前 [low, high] 天(均匀整数天)的时间字符串, 与 moments 等长
+
+        时间点数量有限时可传入共享的datetime对象列表, 如 take(time_series, 时间点下标)
+        """
+        days = self.integers(low, high, len(moments))
+        if _np is not None and moments:
+            shifted = _np.array(moments, dtype='datetime64[s]') - _np.array(days, dtype='timedelta64[D]')
+            return [text.replace('T', ' ') for text in _np.datetime_as_string(shifted, unit='s').tolist()]
+        return [(moment - timedelta(days=offset)).strftime(TIME_FORMAT) for moment, offset in zip(moments, days)]
+
+    def sample_each(self, counts, population):
+        """
+        第i个对象从 range(population) 中不重复地抽取 counts[i] 个(超过population时取population个),
+        所有对象一次抽取, 代替逐个调用 random.sample
+
+        Returns:
+            (owners, values): 按对象、再按取值升序展开的两个等长列表, owners 为对象下标
+        """
+        if _np is None:
+            owners, values = [], []
+            for owner, count in enumerate(counts):
+                chosen = sorted(self._rng.sample(range(population), min(count, population)))
+                owners.extend([owner] * len(chosen))
+                values.extend(chosen)
+            return owners, values
+        counts = _np.minimum(_np.asarray(counts, dtype=_np.int64), population)
+        width = int(counts.max()) if len(counts) else 0
+        if width <= 0:
+            return [], []
+        n = len(counts)
+        # 每行超出该行个数的位置填入互不相同且大于所有取值的占位值, 排序后排在末尾
+        columns = _np.arange(width)
+        padding = columns >= counts[:, None]
+        if width * 4 > population:
+            # 抽取比例较高: 每行对全体随机排序后取前width个
+            chosen = _np.argsort(self._rng.random((n, population)), axis=1)[:, :width]
+            chosen[padding] = (population + columns)[_np.nonzero(padding)[1]]
+            chosen.sort(axis=1)
+        else:
+            # 有放回地抽取, 重复的值重新抽取直到各行无重复(重复很少, 通常几轮即可)
+            chosen = self._rng.integers(0, population, (n, width))
+            chosen[padding] = (population + columns)[_np.nonzero(padding)[1]]
+            while True:
+                chosen.sort(axis=1)
+                rows, cols = _np.nonzero(chosen[:, 1:] == chosen[:, :-1])
+                if not len(rows):
+                    break
+                chosen[rows, cols + 1] = self._rng.integers(0, population, len(rows))
+        return _np.repeat(_np.arange(n), counts).tolist(), chosen[~padding].tolist()
+
+    def bernoulli_indices(self, size, p):
+        """
+        range(size) 中每个位置独立地以概率p命中, 返回命中位置(升序)
+
+        按相邻命中的间隔(几何分布)跳跃抽取, 耗时与命中数成正比, 不逐个位置抛硬币;
+        二维网格(如 终端 x 时间点)展平后抽取, 再用 divmod 还原行列
+        """
+        if size <= 0 or p <= 0:
+            return []
+        if p >= 1:
+            return list(range(size))
+        if _np is None:
+            positions = []
+            position = -1
+            scale = 1 / math.log(1 - p)
+            while True:
+                position += int(math.log(1 - self._rng.random()) * scale) + 1
+                if position >= size:
+                    return positions
+                positions.append(position)
+        chunks = []
+        position = -1
+        expected = size * p
+        while position < size:
+            # 每批抽取略多于期望命中数的间隔, 通常一批即可覆盖全部位置
+            gaps = self._rng.geometric(p, int(expected + 4 * math.sqrt(expected)) + 16)
+            chunk = position + _np.cumsum(gaps)
+            position = int(chunk[-1])
+            chunks.append(chunk[chunk < size])
+        return _np.concatenate(chunks).tolist()
+
+    def numbered(self, prefix, low, high, n):
+        """前缀 + [low, high] 上的均匀整数, 如 'MFG123456'"""
+        return [f'{prefix}{value}' for value in self.integers(low, high, n)]
+
+    def decimals(self, low, high, digits, n):
+        """均匀浮点数按固定digits位小数格式化(与 f'{value:.{digits}f}' 一致)"""
+        pattern = f'%.{digits}f'
+        return [pattern % value for value in self.uniform(low, high, n)]
+
+    def ipv4(self, n):
+        """各段为 [1, 255] 均匀整数的IP地址字符串"""
+        octets = [str(i) for i in range(256)]
+        parts = [self.integers(1, 255, n) for _ in range(4)]
+        return [f'{octets[a]}.{octets[b]}.{octets[c]}.{octets[d]}' for a, b, c, d in zip(*parts)]
+
+
+def take(values, indices):
+    """按下标列表取值"""
+    return [values[i] for i in indices]
+
+
+def bucketize(values, edges, labels):
+    """
+    按分界值分档: values[i] 落在 [edges[j-1], edges[j]) 时取 labels[j](小于edges[0]取labels[0]),
+    labels 比 edges 多一项; 安装numpy时用 digitize 一次完成
+    """
+    if _np is not None and len(values):
+        return take(labels, _np.digitize(values, edges).tolist())
+    return [labels[bisect_right(edges, value)] for value in values]
+
+
+def build_rows(columns, n):
+    """
+    按列组装行字典列表
+
+    常量字段先放入模板字典, 每行复制模板后只写入逐行变化的字段(比逐行用全部字段构造字典快一倍)
+
+    Args:
+        columns: [(字段名, 值), ...], 值为长度n的列表或单个常量(所有行相同)
+        n: 行数
+
+    Returns:
+        行字典列表, 字段顺序与columns一致
+    """
+    template = {key: None if isinstance(value, list) else value for key, value in columns}
+    varying = [(key, value) for key, value in columns if isinstance(value, list)]
+    if not varying:
+        return [template.copy() for _ in range(n)]
+    keys = [key for key, _ in varying]
+    copy = template.copy
+    rows = []
+    append = rows.append
+    for values in zip(*(value for _, value in varying)):
+        row = copy()
+        row.update(zip(keys, values))
+        append(row)
+    return rows
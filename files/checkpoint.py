@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检查点模块
+记录全量生成的进度, 进程中断后用 python main.py --resume 从中断处继续, 输出与不中断时逐字节一致
+
+检查点目录: OUTPUT_DIR/.checkpoint/
+    checkpoint.json   生成配置快照、目标表、随机种子、运行时钟、已完成的表及其文件条目、曲线表已提交的块、
+                      ID分配器各计数器已用到的位置
+                      (分区输出时还有已写满的分区文件, 以及各分区打开的文件及其已提交的字节数)
+    <表编号>.pickle    已完成的非曲线表数据(作为下游表的上游数据, 继续时不重新生成)
+
+所有文件都先写临时文件再重命名, 检查点本身不会处于写了一半的状态。
+未设置 RANDOM_SEED / RUN_CLOCK 时由检查点生成并保存, 继续生成时沿用, 保证随机序列和时间字段一致
+"""
+
+import json
+import os
+import pickle
+import tempfile
+from datetime import datetime
+import config
+import id_allocator
+from object_store import TMP_SUFFIX
+
+CHECKPOINT_DIR = '.checkpoint'
+CHECKPOINT_FILE = 'checkpoint.json'
+
+
+def _atomic_write(path, payload):
+    """先写临时文件再重命名"""
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _config_snapshot():
+    """当前配置快照(经过JSON往返, 可与检查点中保存的快照直接比较)"""
+    return json.loads(json.dumps(config.snapshot(), ensure_ascii=False, default=str))
+
+
+class Checkpoint:
+    """
+    全量生成的检查点
+
+    enabled=False 时只在内存中记录进度(如写入对象存储时), 不写检查点文件
+    """
+
+    def __init__(self, state, enabled=True):
+        self.state = state
+        self.enabled = enabled
+        self.directory = os.path.join(config.OUTPUT_DIR, CHECKPOINT_DIR)
+
+    @classmethod
+    def start(cls, keys, enabled=True):
+        """
+        新建检查点, 固定本次运行的随机种子和运行时钟
+
+        Args:
+            keys: 本次生成的表编号(含上游表)
+        """
+        seed = config.RANDOM_SEED if config.RANDOM_SEED is not None else os.urandom(8).hex()
+        clock = config.RUN_CLOCK or datetime.now()
+        state = {'config': None, 'targets': list(keys), 'seed': seed, 'clock': clock.isoformat(),
+                 'tables': {}, 'curves': {}, 'ids': {}}
+        return cls(state, enabled)
+
+    @classmethod
+    def load(cls):
+        """读取 OUTPUT_DIR 下的检查点, 不存在时返回 None"""
+        path = os.path.join(config.OUTPUT_DIR, CHECKPOINT_DIR, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @property
+    def seed(self):
+        return self.state['seed']
+
+    @property
+    def clock(self):
+        return datetime.fromisoformat(self.state['clock'])
+
+    def bind_config(self, keys):
+        """
+        记录生成配置; 从检查点继续时检查配置和生成的表与中断前一致, 并恢复ID计数器已用到的位置
+        (中断前已完成的表不再重新分配ID, 数据集清单中记录的已用位置仍需包含它们)
+
+        需在固定随机种子和运行时钟(config.override)之后调用
+        """
+        if list(keys) != self.state['targets']:
+            raise ValueError(f"生成的表与检查点不一致, 无法继续生成: 检查点 {self.state['targets']}, 本次 {list(keys)}")
+        snapshot = _config_snapshot()
+        if self.state['config'] is None:
+            self.state['config'] = snapshot
+            self.save()
+            return
+        changed = sorted(name for name in set(snapshot) | set(self.state['config'])
+                         if snapshot.get(name) != self.state['config'].get(name))
+        if changed:
+            raise ValueError(f"配置与检查点不一致, 无法继续生成: {changed}")
+        id_allocator.restore(self.state.get('ids', {}))
+
+    def save(self):
+        if not self.enabled:
+            return
+        self.state['ids'] = id_allocator.counters()
+        os.makedirs(self.directory, exist_ok=True)
+        payload = json.dumps(self.state, ensure_ascii=False, indent=2).encode('utf-8')
+        _atomic_write(os.path.join(self.directory, CHECKPOINT_FILE), payload)
+
+    def completed_tables(self, keys=None):
+        """已完成的非曲线表数据(表编号 -> 数据列表), keys 给出时只读取其中的表"""
+        tables = {}
+        for key, done in self.state['tables'].items():
+            if done['stored'] and (keys is None or key in keys):
+                with open(os.path.join(self.directory, f'{key}.pickle'), 'rb') as f:
+                    tables[key] = pickle.load(f)
+        return tables
+
+    def is_done(self, key):
+        return key in self.state['tables']
+
+    def files(self):
+        """已完成的表的文件条目"""
+        return [entry for done in self.state['tables'].values() for entry in done['entries']]
+
+    def table_done(self, key, entries, data=None):
+        """
+        标记表已完成
+
+        Args:
+            entries: 该表的文件条目(文件已写完并重命名为目标文件)
+            data: 表数据, 给出时保存到检查点目录, 继续生成时作为上游表读取
+        """
+        if data is not None and self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            _atomic_write(os.path.join(self.directory, f'{key}.pickle'),
+                          pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        self.state['tables'][key] = {'entries': entries, 'stored': data is not None}
+        self.state['curves'].pop(key, None)
+        self.save()
+
+    def curve_progress(self, filepath, key):
+        """
+        曲线表已提交的进度, 没有进度或单文件输出的临时文件已不存在时返回空字典(从第一块开始)
+
+        Args:
+            filepath: 曲线表单文件输出时的CSV路径(分区输出时去掉.csv为分区目录)
+        """
+        progress = self.state['curves'].get(key)
+        if not progress:
+            return {}
+        if 'bytes' in progress and not os.path.exists(filepath + TMP_SUFFIX):
+            return {}
+        # 分区输出: 打开的分区文件需仍在(临时文件, 或提交后已写满重命名的目标文件)
+        table_dir = os.path.splitext(filepath)[0]
+        for part in progress.get('open', ()):
+            path = os.path.join(table_dir, part['path'])
+            if not (os.path.exists(path + TMP_SUFFIX) or os.path.exists(path)):
+                return {}
+        return dict(progress)
+
+    def curve_commit(self, key, progress):
+        """记录曲线表已提交的块"""
+        self.state['curves'][key] = dict(progress)
+        self.save()
+
+    def clear(self):
+        """生成完成后删除检查点"""
+        if not self.enabled or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据校验模块
+写入输出文件时同步计算SHA-256(整文件摘要 + 按固定字节数分块的摘要), 无需写完后再读一遍;
+所有输出文件的行数、字节数、摘要连同生成配置记录在数据集清单(OUTPUT_DIR/manifest.json)中
+
+分块摘要: 第i块覆盖文件字节区间 [i*chunk_bytes, (i+1)*chunk_bytes), 校验时可定位到变化的块
+
+增量追加的文件不重新读取已有内容: 分块摘要只重读最后一个未满的块, 整文件摘要按段记录(segments,
+全量生成和每次追加各为一段, 各段摘要只覆盖该段字节), sha256 为各段摘要的组合摘要(combine_segments)
+
+用法:
+    python checksums.py verify <输出目录> [--full]   # 默认只比对文件大小, --full 重新计算摘要
+    python checksums.py diff <清单A> <清单B>          # 比较两次生成结果, 无需读取数据文件
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+import config
+from object_store import TMP_SUFFIX, open_raw_output
+
+DATASET_MANIFEST = 'manifest.json'
+
+
+class HashingWriter(io.RawIOBase):
+    """把写入的字节透传给底层文件, 同时累计整文件摘要和分块摘要"""
+
+    def __init__(self, raw, chunk_bytes):
+        super().__init__()
+        self._raw = raw
+        self._chunk_bytes = chunk_bytes
+        self._file_hash = hashlib.sha256()
+        self._chunk_hash = hashlib.sha256()
+        self._chunk_fill = 0
+        self._chunks = []
+        self._size = 0
+        self._segments = None
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._size
+
+    def prime(self, f, limit=None):
+        """追加/续写前先把文件已有内容(前limit字节)计入摘要(只读取, 不写入)"""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            block = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not block:
+                break
+            self._update(block)
+            if remaining is not None:
+                remaining -= len(block)
+
+    def extend(self, f, previous):
+        """
+        追加前接续已有文件的摘要, 不读取整个文件
+
+        分块摘要沿用 previous 中已满的块, 只重读最后一个未满的块; 整文件摘要从追加的内容开始计算,
+        作为新的一段(见 digest)
+
+        Args:
+            f: 已有文件(二进制只读)
+            previous: 已有文件的条目 {'bytes', 'sha256', 'chunks'[, 'segments']}, 分块大小需相同
+        """
+        full = previous['bytes'] // self._chunk_bytes
+        if len(previous['chunks']) != -(-previous['bytes'] // self._chunk_bytes):
+            raise ValueError("已有文件的分块摘要与分块大小不一致")
+        self._chunks = list(previous['chunks'][:full])
+        f.seek(full * self._chunk_bytes)
+        tail = f.read(previous['bytes'] - full * self._chunk_bytes)
+        self._chunk_hash.update(tail)
+        self._chunk_fill = len(tail)
+        self._size = previous['bytes']
+        self._segments = previous.get('segments') or [{'bytes': previous['bytes'], 'sha256': previous['sha256']}]
+
+    def write(self, b):
+        view = memoryview(b).cast('B')
+        self._raw.write(view)
+        self._update(view)
+        return len(view)
+
+    def _update(self, b):
+        view = memoryview(b).cast('B')
+        self._file_hash.update(view)
+        pos = 0
+        while pos < len(view):
+            take = min(len(view) - pos, self._chunk_bytes - self._chunk_fill)
+            self._chunk_hash.update(view[pos:pos + take])
+            self._chunk_fill += take
+            pos += take
+            if self._chunk_fill == self._chunk_bytes:
+                self._chunks.append(self._chunk_hash.hexdigest())
+                self._chunk_hash = hashlib.sha256()
+                self._chunk_fill = 0
+        self._size += len(view)
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+    def abort(self):
+        """写入出错时取消输出(删除临时文件/截断追加内容/取消对象存储上传)"""
+        abort = getattr(self._raw, 'abort', None)
+        if abort is not None:
+            abort()
+
+    def suspend(self):
+        """中断写入但保留已落盘的内容(本地临时文件), 不支持续写的输出直接取消"""
+        suspend = getattr(self._raw, 'suspend', None)
+        if suspend is not None:
+            suspend()
+        else:
+            self.abort()
+
+    def sync(self):
+        """把已写入的内容落盘(对象存储无此操作)"""
+        sync = getattr(self._raw, 'sync', None)
+        if sync is not None:
+            sync()
+
+    def digest(self):
+        """
+        返回 {'bytes', 'sha256', 'chunks'}, 应在文件关闭后调用
+
+        接续已有文件(extend)时还有 segments, sha256 为各段的组合摘要; 没有追加内容时与原条目一致
+        """
+        chunks = list(self._chunks)
+        if self._chunk_fill:
+            chunks.append(self._chunk_hash.hexdigest())
+        if self._segments is None:
+            return {'bytes': self._size, 'sha256': self._file_hash.hexdigest(), 'chunks': chunks}
+        segments = list(self._segments)
+        appended = self._size - sum(segment['bytes'] for segment in segments)
+        if appended:
+            segments.append({'bytes': appended, 'sha256': self._file_hash.hexdigest()})
+        if len(segments) == 1:
+            return {'bytes': self._size, 'sha256': segments[0]['sha256'], 'chunks': chunks}
+        return {'bytes': self._size, 'sha256': combine_segments(segments), 'chunks': chunks, 'segments': segments}
+
+
+def combine_segments(segments):
+    """按段记录的文件的组合摘要: 各段 '字节数:摘要' 逐行拼接后的SHA-256"""
+    text = ''.join(f"{segment['bytes']}:{segment['sha256']}\n" for segment in segments)
+    return hashlib.sha256(text.encode('ascii')).hexdigest()
+
+
+def hashed_output(filepath, text=True, chunk_bytes=None, encoding='utf-8-sig', append=None,
+                  resume_bytes=None):
+    """
+    打开输出文件并返回 (文件, 摘要器), 参数同open_hashed
+
+    由调用方负责关闭: 正常结束时关闭文件(本地文件随即重命名为目标文件),
+    出错时先调用 hasher.abort() 再关闭文件
+    """
+    if append and os.path.getsize(filepath) != append['bytes']:
+        raise ValueError(f"{filepath} 的大小({os.path.getsize(filepath)})与清单记录({append['bytes']})不一致, 文件已被修改")
+    hasher = HashingWriter(open_raw_output(filepath, bool(append), resume_bytes),
+                           chunk_bytes or config.CHECKSUM_CHUNK_BYTES)
+    if append:
+        with open(filepath, 'rb') as existing:
+            hasher.extend(existing, append)
+    elif resume_bytes is not None:
+        with open(filepath + TMP_SUFFIX, 'rb') as existing:
+            hasher.prime(existing, resume_bytes)
+    if (append or resume_bytes is not None) and encoding == 'utf-8-sig':
+        encoding = 'utf-8'
+    f = io.BufferedWriter(hasher, buffer_size=1 << 16)
+    if text:
+        f = io.TextIOWrapper(f, encoding=encoding, newline='')
+    return f, hasher
+
+
+@contextmanager
+def open_hashed(filepath, text=True, chunk_bytes=None, encoding='utf-8-sig', append=None,
+                resume_bytes=None):
+    """
+    打开输出文件并在写入时计算摘要, 配置了对象存储时写入对象存储(见object_store)
+
+    Args:
+        filepath: 文件路径
+        text: True 返回文本文件(newline=''), False 返回二进制文件
+        chunk_bytes: 分块摘要的块大小, 默认 config.CHECKSUM_CHUNK_BYTES
+        encoding: 文本文件编码, CSV使用utf-8-sig, JSON等旁路文件使用utf-8
+        append: 追加到已有文件末尾时为已有文件的条目(数据集清单中的 bytes/sha256/chunks[/segments]),
+                摘要接续该条目, 只重读最后一个未满的分块(见 HashingWriter.extend); 追加时不再写入BOM
+        resume_bytes: 续写中断时的临时文件, 保留前resume_bytes字节并计入摘要(见StreamingCsvWriter)
+
+    本地文件先写临时文件, 正常退出时重命名为目标文件, 出现异常时丢弃
+
+    用法:
+        with open_hashed(path) as (f, hasher):
+            csv.writer(f).writerows(rows)
+        digest = hasher.digest()
+    """
+    f, hasher = hashed_output(filepath, text, chunk_bytes, encoding, append, resume_bytes)
+    try:
+        yield f, hasher
+    except BaseException:
+        hasher.abort()
+        raise
+    finally:
+        f.close()
+
+
+def hash_file(filepath, chunk_bytes=None, segments=None):
+    """
+    重新读取已有文件计算摘要, 结果格式与 HashingWriter.digest 一致
+
+    Args:
+        segments: 按段记录的文件(增量追加过)的各段, 按相同的段划分计算组合摘要
+    """
+    chunk_bytes = chunk_bytes or config.CHECKSUM_CHUNK_BYTES
+    bounds = []
+    for segment in segments or ():
+        bounds.append((bounds[-1] if bounds else 0) + segment['bytes'])
+    file_hash = hashlib.sha256()
+    hashes = []
+    chunks = []
+    size = 0
+    with open(filepath, 'rb') as f:
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            chunks.append(hashlib.sha256(block).hexdigest())
+            # 按段边界拆分, 每段单独计算摘要
+            view = memoryview(block)
+            while bounds and size + len(view) >= bounds[0]:
+                cut = bounds.pop(0) - size
+                file_hash.update(view[:cut])
+                hashes.append(file_hash.hexdigest())
+                file_hash = hashlib.sha256()
+                view = view[cut:]
+                size += cut
+            file_hash.update(view)
+            size += len(view)
+    if segments:
+        actual = [{'bytes': segment['bytes'], 'sha256': digest} for segment, digest in zip(segments, hashes)]
+        return {'bytes': size, 'sha256': combine_segments(actual), 'chunks': chunks, 'segments': actual}
+    return {'bytes': size, 'sha256': file_hash.hexdigest(), 'chunks': chunks}
+
+
+def write_dataset_manifest(output_dir, files, **fields):
+    """
+    写出数据集清单
+
+    Args:
+        output_dir: 输出目录
+        files: 文件条目列表, 每项包含 table/path/rows/bytes/sha256/chunks, path 相对于输出目录
+        fields: 其他记录到清单中的字段(如时间范围 start/watermark, 增量记录 increments)
+
+    Returns:
+        manifest 字典
+    """
+    files = sorted(files, key=lambda entry: entry['path'])
+    manifest = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'config': config.snapshot(),
+        'chunk_bytes': config.CHECKSUM_CHUNK_BYTES,
+        **fields,
+        'total_rows': sum(entry['rows'] for entry in files),
+        'total_bytes': sum(entry['bytes'] for entry in files),
+        'files': files,
+    }
+    with open_hashed(os.path.join(output_dir, DATASET_MANIFEST), encoding='utf-8') as (f, _):
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def load_dataset_manifest(path):
+    """读取数据集清单, path 可以是输出目录或清单文件"""
+    if os.path.isdir(path):
+        path = os.path.join(path, DATASET_MANIFEST)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verify_dataset(output_dir, full=False):
+    """
+    按清单校验输出目录
+
+    Args:
+        output_dir: 输出目录
+        full: False 只比对文件是否存在及大小; True 重新计算摘要并定位变化的块
+
+    Returns:
+        问题列表, 每项为 (相对路径, 说明), 为空表示校验通过
+    """
+    manifest = load_dataset_manifest(output_dir)
+    problems = []
+    for entry in manifest['files']:
+        filepath = os.path.join(output_dir, entry['path'])
+        if not os.path.exists(filepath):
+            problems.append((entry['path'], '文件不存在'))
+            continue
+        size = os.path.getsize(filepath)
+        if size != entry['bytes']:
+            problems.append((entry['path'], f"大小不一致: 清单 {entry['bytes']}, 实际 {size}"))
+            continue
+        if full:
+            actual = hash_file(filepath, manifest['chunk_bytes'], entry.get('segments'))
+            if actual['sha256'] != entry['sha256']:
+                changed = [i for i, (a, b) in enumerate(zip(entry['chunks'], actual['chunks'])) if a != b]
+                problems.append((entry['path'], f"摘要不一致, 变化的块: {changed}"))
+    return problems
+
+
+def diff_manifests(old, new):
+    """
+    比较两份清单(字典), 只比较摘要, 不读取数据文件
+
+    Returns:
+        {'added': [...], 'removed': [...], 'changed': [...], 'unchanged': [...]} 各项为相对路径
+    """
+    old_files = {entry['path']: entry for entry in old['files']}
+    new_files = {entry['path']: entry for entry in new['files']}
+    result = {'added': [], 'removed': [], 'changed': [], 'unchanged': []}
+    for path in sorted(set(old_files) | set(new_files)):
+        if path not in old_files:
+            result['added'].append(path)
+        elif path not in new_files:
+            result['removed'].append(path)
+        elif old_files[path]['sha256'] != new_files[path]['sha256']:
+            result['changed'].append(path)
+        else:
+            result['unchanged'].append(path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按数据集清单校验或比较输出文件')
+    sub = parser.add_subparsers(dest='command', required=True)
+    verify = sub.add_parser('verify', help='校验输出目录')
+    verify.add_argument('output_dir', help='输出目录(包含manifest.json)')
+    verify.add_argument('--full', action='store_true', help='重新计算摘要(读取全部数据文件)')
+    diff = sub.add_parser('diff', help='比较两份清单')
+    diff.add_argument('old', help='旧清单或输出目录')
+    diff.add_argument('new', help='新清单或输出目录')
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        problems = verify_dataset(args.output_dir, args.full)
+        for path, message in problems:
+            print(f"{path}: {message}")
+        print("校验通过" if not problems else f"校验失败, 问题文件数: {len(problems)}")
+        sys.exit(1 if problems else 0)
+
+    result = diff_manifests(load_dataset_manifest(args.old), load_dataset_manifest(args.new))
+    for status in ('added', 'removed', 'changed'):
+        for path in result[status]:
+            print(f"{status}: {path}")
+    print(f"未变化文件数: {len(result['unchanged'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字段生成规则模块
+用简短的表达式声明每个字段怎样生成, 整表按列批量求值(见 batch_random), 不再逐行编写生成代码
+
+表达式(字符串或同名函数):
+    const('440000')                 常量(所有行相同), const(None) 为空值
+    uniform(0.8, 1.2, 4)            [low, high) 均匀浮点数, 保留4位小数后转字符串; 省略位数时不取整
+    decimals(22.0, 24.0, 6)         均匀浮点数按固定6位小数格式化
+    integer(1000, 9999, 'BATCH')    [low, high] 均匀整数加前缀, 如 'BATCH1234'
+    choice(['1', '2', '3'])         等概率选取
+    ipv4()                          IP地址
+    days_before(30, 365)            运行时钟之前 [30, 365] 天的时间
+    clock(180)                      运行时钟之前180天的时间(所有行相同), clock() 为运行时钟
+    allocate('PARAM')               id_allocator 分配的不重复ID(默认16位)
+    sequence(1)                     行号字符串, 从1开始
+    source(meters.TA_NO, '{}台区内')  按行取驱动数据(如电表登记表)的字段, 可按模式格式化
+    ref(MK_1_3.ASSETS_NO)           外键: 从上游表的字段中随机选取(有放回)
+
+各字段按声明顺序依次求值, 随机数和ID的消耗顺序固定, 同一随机种子下结果可复现;
+规则写在生成函数内, 修改规则即修改函数源码, 表缓存随之失效; 修改本模块的求值方式后需递增 pipeline.GENERATOR_VERSION
+
+用法:
+    from column_specs import generate_rows
+    rows = generate_rows('1_3', [('RUN_METER_ID', "source(meters.RUN_METER_ID)"),
+                                 ('AREA_CODE', "const('440000')"), ...],
+                         n, sources={'meters': {'RUN_METER_ID': [...]}})
+"""
+
+import ast
+from datetime import timedelta
+import id_allocator
+from batch_random import BatchRandom, build_rows, TIME_FORMAT
+from table_schemas import SCHEMAS, TABLE_FILES
+from utils import run_clock
+
+
+class ColumnSpec:
+    """
+    一个字段的生成规则: 函数名 + 参数
+
+    str() 得到对应的表达式文本
+    """
+
+    __slots__ = ('function', 'args')
+
+    def __init__(self, function, *args):
+        if function not in _EVALUATORS:
+            raise ValueError(f"未知的字段生成函数: {function}, 可选: {sorted(_EVALUATORS)}")
+        self.function = function
+        self.args = args
+
+    def __repr__(self):
+        return f"{self.function}({', '.join(map(repr, self.args))})"
+
+    def evaluate(self, context, n):
+        """整列求值, 返回长度n的列表或单个常量"""
+        return _EVALUATORS[self.function](context, n, *self.args)
+
+
+def const(value):
+    return ColumnSpec('const', value)
+
+
+def uniform(low, high, digits=None):
+    return ColumnSpec('uniform', low, high, digits)
+
+
+def decimals(low, high, digits):
+    return ColumnSpec('decimals', low, high, digits)
+
+
+def integer(low, high, prefix=''):
+    return ColumnSpec('integer', low, high, prefix)
+
+
+def choice(options):
+    return ColumnSpec('choice', tuple(options))
+
+
+def ipv4():
+    return ColumnSpec('ipv4')
+
+
+def days_before(low, high):
+    return ColumnSpec('days_before', low, high)
+
+
+def clock(days=0):
+    return ColumnSpec('clock', days)
+
+
+def allocate(prefix, length=16):
+    return ColumnSpec('allocate', prefix, length)
+
+
+def sequence(start=1):
+    return ColumnSpec('sequence', start)
+
+
+def source(path, pattern=None):
+    return ColumnSpec('source', path, pattern)
+
+
+def ref(path):
+    return ColumnSpec('ref', path)
+
+
+class Context:
+    """
+    求值时共用的状态
+
+    Attributes:
+        draw: BatchRandom(默认从已播种的全局random取种子)
+        current_time: 运行时钟
+        sources: 驱动数据 {名称: {字段名: 长度n的列表}}, 供 source() 按行取值
+        tables: 已生成的上游表 {表编号: 数据行}, 供 ref() 选取外键
+    """
+
+    def __init__(self, sources=None, tables=None, draw=None):
+        self.draw = draw or BatchRandom()
+        self.current_time = run_clock()
+        self.sources = sources or {}
+        self.tables = tables or {}
+
+
+def _split_path(path):
+    name, _, column = path.partition('.')
+    if not column:
+        raise ValueError(f"字段路径应为 名称.字段名: {path}")
+    return name, column
+
+
+def _source(context, n, path, pattern):
+    name, column = _split_path(path)
+    try:
+        values = context.sources[name][column]
+    except KeyError:
+        raise KeyError(f"未提供驱动数据: {path}") from None
+    if len(values) != n:
+        raise ValueError(f"驱动数据 {path} 有 {len(values)} 行, 需要 {n} 行")
+    if pattern is None:
+        return list(values)
+    return [pattern.format(value) for value in values]
+
+
+def _ref(context, n, path):
+    key, column = _split_path(path)
+    rows = context.tables.get(key)
+    if not rows:
+        raise ValueError(f"外键 {path} 的上游表 {key} 未生成或为空")
+    values = [row[column] for row in rows]
+    return [values[i] for i in context.draw.integers(0, len(values) - 1, n)]
+
+
+def _uniform(context, n, low, high, digits):
+    if digits is None:
+        return list(map(str, context.draw.uniform(low, high, n)))
+    return context.draw.rounded(low, high, digits, n)
+
+
+def _clock(context, n, days):
+    return (context.current_time - timedelta(days=days)).strftime(TIME_FORMAT)
+
+
+# 函数名 -> 求值函数(context, n, *参数)
+_EVALUATORS = {
+    'const': lambda context, n, value: value,
+    'uniform': _uniform,
+    'decimals': lambda context, n, low, high, digits: context.draw.decimals(low, high, digits, n),
+    'integer': lambda context, n, low, high, prefix: context.draw.numbered(prefix, low, high, n),
+    'choice': lambda context, n, options: context.draw.choice(options, n),
+    'ipv4': lambda context, n: context.draw.ipv4(n),
+    'days_before': lambda context, n, low, high: context.draw.days_before(context.current_time, low, high, n),
+    'clock': _clock,
+    'allocate': lambda context, n, prefix, length: id_allocator.allocate(prefix, n, length),
+    'sequence': lambda context, n, start: [str(start + i) for i in range(n)],
+    'source': _source,
+    'ref': _ref,
+}
+
+# 表达式中可用的函数
+_FUNCTIONS = {function.__name__: function for function in (
+    const, uniform, decimals, integer, choice, ipv4, days_before, clock, allocate, sequence, source, ref)}
+
+
+def _argument(node):
+    """表达式参数: 字面量, 或 名称.字段名(如 MK_1_3.ASSETS_NO、meters.TA_NO, 转换为路径字符串)"""
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        name = node.value.id
+        if name.startswith('MK_') and name[3:] in TABLE_FILES:
+            name = name[3:]
+        return f"{name}.{node.attr}"
+    return ast.literal_eval(node)
+
+
+def parse(expression):
+    """
+    解析字段表达式, 如 "uniform(0.8, 1.2, 4)"
+
+    只接受上述生成函数的调用, 参数为字面量或 名称.字段名, 不执行任意代码
+    """
+    try:
+        node = ast.parse(expression.strip(), mode='eval').body
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)):
+            raise ValueError("应为函数调用")
+        function = _FUNCTIONS.get(node.func.id)
+        if function is None:
+            raise ValueError(f"未知的函数 {node.func.id}, 可选: {sorted(_FUNCTIONS)}")
+        args = [_argument(arg) for arg in node.args]
+        kwargs = {keyword.arg: _argument(keyword.value) for keyword in node.keywords}
+        return function(*args, **kwargs)
+    except (SyntaxError, ValueError, TypeError) as exc:
+        raise ValueError(f"字段表达式错误: {expression}: {exc}") from None
+
+
+class CompiledTable:
+    """
+    编译后的整表生成规则
+
+    Args:
+        key: 表编号, 字段及顺序需与 table_schemas 中的表结构一致
+        columns: [(字段名, 表达式字符串或ColumnSpec), ...]
+    """
+
+    def __init__(self, key, columns):
+        self.key = key
+        self.columns = [(name, parse(spec) if isinstance(spec, str) else spec) for name, spec in columns]
+        SCHEMAS[key].check_fields(name for name, _ in self.columns)
+
+    def generate(self, n, sources=None, tables=None, draw=None):
+        """
+        生成n行, 返回行字典列表(字段顺序与表结构一致)
+
+        Args:
+            sources: 驱动数据, 见 Context
+            tables: 已生成的上游表, 见 Context
+            draw: BatchRandom, 默认从全局random取种子
+        """
+        context = Context(sources, tables, draw)
+        return build_rows([(name, spec.evaluate(context, n)) for name, spec in self.columns], n)
+
+
+def generate_rows(key, columns, n, sources=None, tables=None):
+    """编译字段规则并生成n行, 见 CompiledTable"""
+    return CompiledTable(key, columns).generate(n, sources, tables)
@@ -6,6 +6,8 @@
 """
 
 import os
+import sys
+from contextlib import contextmanager
 from datetime import datetime
 
 # 时间配置
@@ -23,6 +25,37 @@ NUM_SUB_METERS = (TOTAL_METERS - NUM_DISTRICTS) // NUM_DISTRICTS  # 每个台区
 # 输出目录配置
 OUTPUT_DIR = os.path.join(os.getcwd(), "outputs", "electric_meter_data")
 
+# 曲线表(MK_1_15/MK_1_16)分区输出配置
+PARTITION_BY = None  # None-单文件, 'day'-按天, 'district'-按台区, 'supply_org'-按供电单位
+MAX_ROWS_PER_FILE = None  # 单个文件最大数据行数, 分区输出时None表示按Excel上限(1048574行)滚动
+PARTITION_WORKERS = 4  # 并行写入分区文件的线程数
+
+# 曲线表行输出顺序
+CURVE_ORDER = 'time'  # 'time'-按时间优先, 'meter'-按电表优先(RUN_METER_ID, DATA_TIME排序)
+SORT_CHUNK_ROWS = 200000  # 外部排序每个内存块的最大行数
+CURVE_INDEX = True  # 写入曲线表时生成旁路索引(.offsets/.idx.json), 支持按电表/时间点直接定位
+CURVE_CHUNK_ROWS = 100000  # 曲线表分块生成和提交的行数, 中断后从最后提交的块继续(见--resume)
+
+# 输出校验配置
+CHECKSUM_CHUNK_BYTES = 16 * 1024 * 1024  # 分块摘要的块大小(字节), 记录在manifest.json中
+
+# 可复现与缓存配置
+RUN_CLOCK = None  # 固定的"当前时间"(如 datetime(2025, 9, 8)), 用于CREATE_TIME/LOAD_TIME等字段; None表示运行开始时间
+RANDOM_SEED = None  # 随机种子, 设置后每张表按(种子, 表编号)独立播种, 输出可复现
+TABLE_CACHE_DIR = None  # 表缓存目录, 需同时设置RUN_CLOCK和RANDOM_SEED; 生成逻辑、配置和上游表都未变化的表直接读取缓存
+
+# 增量生成配置(在已有输出目录基础上只生成水位线之后到END_DATE的新时间范围)
+APPEND_MODE = None  # None-全量生成, 'append'-追加到已有文件末尾, 'delta'-写出单独的增量文件(delta/<时间范围>/)
+EVENT_BASE_POINTS = None  # 事件类表(1_27/1_29/1_30)每个对象的事件数对应的时间点数, 增量生成时为全量窗口的时间点数, 事件数按新窗口长度等比缩放; None表示不缩放
+
+# 对象存储输出配置(S3兼容服务, 如MinIO), 访问密钥从环境变量AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY读取
+OBJECT_STORE_URL = None  # 如 's3://bucket/prefix', None表示写入本地OUTPUT_DIR
+S3_ENDPOINT = os.environ.get('S3_ENDPOINT_URL', 'http://127.0.0.1:9000')  # 服务地址(路径风格寻址)
+S3_REGION = 'us-east-1'
+S3_PART_BYTES = 8 * 1024 * 1024  # 分片大小, S3要求除最后一片外不小于5MB
+S3_UPLOAD_WORKERS = 4  # 并发上传分片的线程数
+S3_MAX_PENDING_PARTS = 8  # 最多同时在内存中等待上传的分片数
+
 # 供电单位编号配置 - 16个台区对应0501-0516
 SUPPLY_ORG_NUMBERS = [f'05{i:02d}' for i in range(1, 17)]  # ['0501', '0502', ..., '0516']
 
@@ -48,4 +81,59 @@ ANOMALY_TYPES = {
         '电表模块异常',
         '电表本体异常'
     ]
-}
\ No newline at end of file
+}
+
+# 数据异常的持续时长(时间点数, 最小值, 最大值), 按异常类别(见 anomaly_index.AnomalyCategory);
+# 异常从数据异常清单(1_32)的DATA_TIME开始, 持续期间曲线表(1_15/1_16)中受影响的电表一直异常
+ANOMALY_DURATION_STEPS = {
+    'WIRING': (4, 32),         # 接线错误: 1~8小时, 直到现场处理
+    'HARDWARE': (1, 8),        # 硬件/电源故障: 15分钟~2小时
+    'COMMUNICATION': (1, 4),   # 通信异常
+    'METERING': (2, 16),       # 计量失准
+}
+
+# 数据异常影响范围的权重: 单个电表(受影响电表数为1_32的NUMBER_OF)、整个台区、整个供电单位
+# 默认与原来的逐时间点异常相比, 受接线错误影响的曲线数据比例相近(约15%~20%), 但异常会持续
+ANOMALY_SCOPE_WEIGHTS = {'meter': 16, 'district': 3, 'supply_org': 1}
+
+
+@contextmanager
+def override(**values):
+    """
+    临时覆盖配置项, 退出时恢复原值
+
+    各模块在调用时读取 config.XXX, 因此覆盖对生成过程立即生效。
+    只覆盖 NUM_DISTRICTS/TOTAL_METERS 时会同步重新计算 NUM_SUB_METERS
+
+    用法:
+        with config.override(NUM_DISTRICTS=2, TOTAL_METERS=22):
+            ...
+    """
+    module = sys.modules[__name__]
+    unknown = [name for name in values if not name.isupper() or not hasattr(module, name)]
+    if unknown:
+        raise KeyError(f"未知的配置项: {unknown}")
+
+    saved = {name: getattr(module, name) for name in dir(module) if name.isupper()}
+    try:
+        for name, value in values.items():
+            setattr(module, name, value)
+        if 'NUM_SUB_METERS' not in values and ('NUM_DISTRICTS' in values or 'TOTAL_METERS' in values):
+            module.NUM_SUB_METERS = (module.TOTAL_METERS - module.NUM_DISTRICTS) // module.NUM_DISTRICTS
+        if 'UNIFIED_SUPPLY_ORG_NO' not in values and 'SUPPLY_ORG_NUMBERS' in values:
+            module.UNIFIED_SUPPLY_ORG_NO = module.SUPPLY_ORG_NUMBERS[0]
+        yield module
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def snapshot():
+    """返回当前全部配置项(可JSON序列化, 时间转为ISO格式字符串), 用于记录到输出清单"""
+    module = sys.modules[__name__]
+    values = {}
+    for name in sorted(dir(module)):
+        if name.isupper():
+            value = getattr(module, name)
+            values[name] = value.isoformat() if isinstance(value, datetime) else value
+    return values
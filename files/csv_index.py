@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSV旁路索引模块
+写入曲线CSV的同时生成旁路索引, 记录每个 RUN_METER_ID 和每个 DATA_TIME 对应的数据行,
+查询单个电表或单个时间点时直接按字节偏移定位, 无需扫描整个文件
+
+索引文件(与CSV同目录):
+    <文件名>.offsets   每个数据行起始字节偏移(8字节无符号整数, 末尾多一个文件结束偏移)
+    <文件名>.idx.json  各索引字段取值 -> 行号等差序列 [起始行, 行数, 步长]
+
+时间优先输出时, 一个时间点是一段连续行, 一个电表是步长为电表数的等差序列;
+电表优先输出时正好相反, 两种布局下每个取值都只需一两个序列即可表示
+
+StreamingCsvWriter 支持分批写入和提交: 行偏移随写入流式写到偏移文件, 不在内存中保留;
+提交时按需保存索引快照(<文件名>.idx.commit), 中断后从快照恢复索引, 只重新扫描快照之后提交的内容再续写
+
+用法:
+    python csv_index.py <CSV文件> --meter <RUN_METER_ID>
+    python csv_index.py <CSV文件> --time "2025-09-01 00:15:00"
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import mmap
+import os
+import sys
+from array import array
+import config
+from checksums import hashed_output, open_hashed
+from object_store import TMP_SUFFIX, AtomicFile
+
+DEFAULT_INDEX_COLUMNS = ('RUN_METER_ID', 'DATA_TIME')
+
+OFFSETS_SUFFIX = '.offsets'
+INDEX_SUFFIX = '.idx.json'
+SNAPSHOT_SUFFIX = '.idx.commit'
+# 提交时索引快照的写入量不超过CSV写入量的 1/SNAPSHOT_RATIO, 续写时最多重新扫描约 SNAPSHOT_RATIO 倍快照大小的内容
+SNAPSHOT_RATIO = 8
+_OFFSET_SIZE = array('Q').itemsize
+
+
+def _add_row(runs, row_no):
+    """把行号并入等差序列列表, 能延长最后一个序列时不新建序列"""
+    if runs:
+        last = runs[-1]
+        start, count, stride = last
+        if count == 1:
+            last[1] = 2
+            last[2] = row_no - start
+            return
+        if row_no == start + count * stride:
+            last[1] = count + 1
+            return
+    runs.append([row_no, 1, 1])
+
+
+def _row_encoder():
+    """返回把一行值编码为CSV字节的函数, 编码结果与csv.writer写文件一致"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def encode_row(values):
+        writer.writerow(values)
+        line = buf.getvalue().encode('utf-8')
+        buf.seek(0)
+        buf.truncate()
+        return line
+
+    return encode_row
+
+
+def _write_rows(f, encode_row, data, headers, runs, offsets, first_row):
+    """写入数据行, 同时记录每行的起始偏移和索引字段的行号序列(不含结束偏移)"""
+    position = f.tell()
+    for row_no, row in enumerate(data, start=first_row):
+        line = encode_row([row.get(header) for header in headers])
+        offsets.append(position)
+        position += len(line)
+        f.write(line)
+        for col in runs:
+            _add_row(runs[col].setdefault(row[col], []), row_no)
+
+
+def _scan_rows(f, end, headers, runs, first_row=0, skip=0):
+    """
+    从已写入的CSV内容(f当前位置到end)重建索引字段的行号序列
+
+    Args:
+        first_row: 第一个数据行的行号
+        skip: 开头跳过的行数(从文件开头扫描时为字段名行和注释行)
+
+    Returns:
+        数据行数
+    """
+    def lines():
+        position = f.tell()
+        while position < end:
+            line = f.readline(end - position)
+            position += len(line)
+            yield line.decode('utf-8')
+
+    columns = [(col, headers.index(col)) for col in runs]
+    rows = 0
+    for values in itertools.islice(csv.reader(lines()), skip, None):
+        for col, pos in columns:
+            _add_row(runs[col].setdefault(values[pos], []), first_row + rows)
+        rows += 1
+    return rows
+
+
+def _offset_bytes(offsets):
+    """偏移按小端8字节无符号整数存储"""
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def _write_sidecars(filepath, offsets, index):
+    with open_hashed(filepath + OFFSETS_SUFFIX, text=False) as (f, _):
+        f.write(_offset_bytes(offsets))
+    _write_index(filepath, index)
+
+
+def _write_index(filepath, index):
+    with open_hashed(filepath + INDEX_SUFFIX, encoding='utf-8') as (f, _):
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+
+class StreamingCsvWriter:
+    """
+    分批写入CSV文件(可选同时生成旁路索引), 文件内容与write_csv完全一致
+
+    数据写入 <文件>.tmp, 行偏移同步写入 <文件>.offsets.tmp; 每批写完后可调用 commit() 落盘并取得已提交的字节数;
+    进程中断后以 resume_bytes=已提交字节数 重新打开, 丢弃未提交的部分, 从索引快照和快照之后提交的内容恢复索引后续写。
+    close() 时先写索引文件, 再把临时文件重命名为目标文件
+
+    用法:
+        writer = StreamingCsvWriter(path, headers, comments)
+        for chunk in chunks:
+            writer.write_rows(chunk)
+            state = writer.commit()
+        entry = writer.close()
+    """
+
+    def __init__(self, filepath, headers, comments, index_columns=DEFAULT_INDEX_COLUMNS, resume_bytes=None):
+        """
+        Args:
+            filepath: CSV文件完整路径
+            headers: 字段名列表
+            comments: 字段注释字典
+            index_columns: 需要建立索引的字段, 为空时不生成旁路索引
+            resume_bytes: 续写中断的临时文件时已提交的字节数, None 表示新建文件
+        """
+        self.filepath = filepath
+        self.headers = headers
+        self.rows = 0
+        self._indexed = bool(index_columns)
+        self._runs = {col: {} for col in index_columns if col in headers}
+        self._encode_row = _row_encoder()
+        # 只有本地输出可以续写, 写入对象存储时不保存索引快照
+        self._snapshots = not config.OBJECT_STORE_URL
+        self._snapshot_bytes = 0
+        self._snapshot_size = 0
+        if resume_bytes is None:
+            self._remove_snapshot()
+        else:
+            self._restore(resume_bytes)
+        self._f, self._hasher = hashed_output(filepath, text=False, resume_bytes=resume_bytes)
+        self._offsets_f = self._offsets_hasher = None
+        if self._indexed:
+            self._offsets_f, self._offsets_hasher = hashed_output(
+                filepath + OFFSETS_SUFFIX, text=False,
+                resume_bytes=None if resume_bytes is None else self.rows * _OFFSET_SIZE)
+        if resume_bytes is None:
+            self._f.write(b'\xef\xbb\xbf')  # UTF-8 BOM, 与utf-8-sig一致
+            self._f.write(self._encode_row(headers))
+            self._f.write(self._encode_row([comments.get(header, '') for header in headers]))
+
+    def _restore(self, resume_bytes):
+        """从索引快照恢复已提交的行数和索引, 只扫描快照之后已提交的内容"""
+        snapshot = None
+        if os.path.exists(self.filepath + SNAPSHOT_SUFFIX):
+            with open(self.filepath + SNAPSHOT_SUFFIX, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot['bytes'] > resume_bytes or set(snapshot['columns']) != set(self._runs):
+                snapshot = None  # 快照晚于检查点记录的提交(保存检查点前中断)或索引字段不同, 从头扫描
+        with open(self.filepath + TMP_SUFFIX, 'rb') as f:
+            if snapshot is None:
+                f.seek(3)  # 跳过BOM
+                self.rows = _scan_rows(f, resume_bytes, self.headers, self._runs, skip=2)
+            else:
+                self._runs = snapshot['columns']
+                self._snapshot_bytes = snapshot['bytes']
+                f.seek(snapshot['bytes'])
+                self.rows = snapshot['rows'] + _scan_rows(f, resume_bytes, self.headers, self._runs,
+                                                          first_row=snapshot['rows'])
+
+    def _save_snapshot(self, state):
+        payload = json.dumps({**state, 'columns': self._runs}, ensure_ascii=False,
+                             separators=(',', ':')).encode('utf-8')
+        f = AtomicFile(self.filepath + SNAPSHOT_SUFFIX)
+        f.write(payload)
+        f.sync()
+        f.close()
+        self._snapshot_bytes = state['bytes']
+        self._snapshot_size = len(payload)
+
+    def _remove_snapshot(self):
+        if self._snapshots and os.path.exists(self.filepath + SNAPSHOT_SUFFIX):
+            os.remove(self.filepath + SNAPSHOT_SUFFIX)
+
+    def write_rows(self, data):
+        """写入一批数据行, 行偏移随即写入偏移文件"""
+        offsets = array('Q')
+        _write_rows(self._f, self._encode_row, data, self.headers, self._runs, offsets, self.rows)
+        self.rows += len(data)
+        if self._indexed:
+            self._offsets_f.write(_offset_bytes(offsets))
+
+    def commit(self):
+        """
+        把已写入的数据(及偏移文件)落盘, 距上次索引快照写入的内容足够多时保存新的快照
+
+        Returns:
+            {'rows', 'bytes'}: 已提交的行数和字节数(续写时的resume_bytes)
+        """
+        self._f.flush()
+        self._hasher.sync()
+        if self._indexed:
+            self._offsets_f.flush()
+            self._offsets_hasher.sync()
+        state = {'rows': self.rows, 'bytes': self._f.tell()}
+        if self._snapshots and state['bytes'] - self._snapshot_bytes >= SNAPSHOT_RATIO * self._snapshot_size:
+            self._save_snapshot(state)
+        return state
+
+    def close(self):
+        """
+        完成写入: 写索引文件并把临时文件重命名为目标文件
+
+        Returns:
+            CSV文件的行数和摘要 {'rows', 'bytes', 'sha256', 'chunks'}
+        """
+        self._f.flush()
+        if self._indexed:
+            self._offsets_f.write(_offset_bytes(array('Q', [self._f.tell()])))
+            self._offsets_f.close()
+            _write_index(self.filepath, {
+                'csv': os.path.basename(self.filepath),
+                'rows': self.rows,
+                'headers': self.headers,
+                'columns': self._runs,
+            })
+        self._f.close()
+        self._remove_snapshot()
+        return {'rows': self.rows, **self._hasher.digest()}
+
+    def abort(self):
+        """放弃写入, 删除临时文件"""
+        self._hasher.abort()
+        self._f.close()
+        if self._indexed:
+            self._offsets_hasher.abort()
+            self._offsets_f.close()
+        self._remove_snapshot()
+
+    def suspend(self):
+        """中断写入, 保留已提交的临时文件和索引快照供续写(未提交的内容在续写时丢弃)"""
+        self._hasher.suspend()
+        self._f.close()
+        if self._indexed:
+            self._offsets_hasher.suspend()
+            self._offsets_f.close()
+
+
+def write_csv_indexed(filepath, data, headers, comments, index_columns=DEFAULT_INDEX_COLUMNS):
+    """
+    写入CSV文件并同时生成旁路索引, 文件内容与write_csv完全一致
+
+    Args:
+        filepath: CSV文件完整路径
+        data: 数据列表
+        headers: 字段名列表
+        comments: 字段注释字典
+        index_columns: 需要建立索引的字段
+
+    Returns:
+        CSV文件的行数和摘要 {'rows', 'bytes', 'sha256', 'chunks'}
+    """
+    writer = StreamingCsvWriter(filepath, headers, comments, index_columns)
+    try:
+        writer.write_rows(data)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def append_csv_indexed(filepath, data, headers, previous):
+    """
+    把数据行追加到已有的带索引CSV末尾, 并在原有索引基础上扩展(不重新扫描已有数据)
+
+    Args:
+        previous: 已有文件在数据集清单中的条目, 摘要在此基础上接续(见 checksums.open_hashed)
+
+    Returns:
+        追加后整个CSV文件的行数和摘要 {'rows', 'bytes', 'sha256', 'chunks'}
+    """
+    index = load_index(filepath)
+    if data and index['headers'] != headers:
+        raise ValueError(f"追加数据的字段与已有文件不一致: {os.path.basename(filepath)}")
+    offsets = array('Q')
+    with open(filepath + OFFSETS_SUFFIX, 'rb') as f:
+        offsets.frombytes(f.read())
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    offsets.pop()  # 去掉原文件的结束偏移, 由追加后的结束偏移代替
+
+    with open_hashed(filepath, text=False, append=previous) as (f, hasher):
+        _write_rows(f, _row_encoder(), data, index['headers'], index['columns'], offsets, index['rows'])
+        offsets.append(f.tell())
+
+    index['rows'] += len(data)
+    _write_sidecars(filepath, offsets, index)
+    return {'rows': index['rows'], **hasher.digest()}
+
+
+def load_index(csv_path):
+    """读取CSV文件的旁路索引"""
+    with open(csv_path + INDEX_SUFFIX, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _offset_values(view):
+    """偏移文件(内存映射)中一段偏移的整数值"""
+    if sys.byteorder == 'little':
+        return view.tolist()
+    values = array('Q', view.tobytes())
+    values.byteswap()
+    return values.tolist()
+
+
+def byte_ranges(csv_path, column, value, index=None):
+    """
+    返回字段取值对应的字节区间列表 [(起始, 结束), ...], 连续行合并为一个区间
+
+    偏移文件按内存映射读取: 连续行只取首尾两个偏移, 等差序列按步长切片一次取出各行的起止偏移,
+    不逐行seek/read, 只访问用到的页面, 与CSV文件大小无关
+    """
+    index = index or load_index(csv_path)
+    if column not in index['columns']:
+        raise KeyError(f"字段 {column} 未建立索引, 已索引字段: {list(index['columns'])}")
+    runs = index['columns'][column].get(value, [])
+    ranges = []
+    if not runs:
+        return ranges
+    with open(csv_path + OFFSETS_SUFFIX, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            memoryview(mm) as raw, raw.cast('Q') as offsets:
+        for start, count, stride in runs:
+            if stride == 1 or count == 1:
+                bounds = _offset_values(offsets[start:start + count + 1:count])
+                ranges.append((bounds[0], bounds[1]))
+            else:
+                stop = start + count * stride
+                ranges.extend(zip(_offset_values(offsets[start:stop:stride]),
+                                  _offset_values(offsets[start + 1:stop + 1:stride])))
+    return ranges
+
+
+def lookup(csv_path, column, value, index=None):
+    """
+    按索引字段取值读取数据行
+
+    Returns:
+        数据行字典列表
+    """
+    index = index or load_index(csv_path)
+    headers = index['headers']
+    rows = []
+    with open(csv_path, 'rb') as f:
+        for begin, end in byte_ranges(csv_path, column, value, index):
+            f.seek(begin)
+            text = f.read(end - begin).decode('utf-8')
+            for values in csv.reader(io.StringIO(text)):
+                rows.append(dict(zip(headers, values)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按旁路索引查询曲线CSV')
+    parser.add_argument('csv', help='CSV文件路径')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--meter', help='RUN_METER_ID')
+    group.add_argument('--time', help='DATA_TIME, 格式 yyyy-mm-dd HH:MM:SS')
+    args = parser.parse_args()
+
+    column, value = ('RUN_METER_ID', args.meter) if args.meter else ('DATA_TIME', args.time)
+    index = load_index(args.csv)
+    rows = lookup(args.csv, column, value, index)
+    writer = csv.DictWriter(sys.stdout, fieldnames=index['headers'])
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,21 +5,58 @@ CSV写入和主程序模块
 """
 
 import csv
+import json
 import os
-from config import OUTPUT_DIR, START_DATE, END_DATE, INTERVAL_MINUTES, NUM_DISTRICTS, NUM_SUB_METERS, UNIFIED_SUPPLY_ORG_NO
-from utils import generate_time_series
-from basic_data_generators import generate_district_and_meters, generate_table_1_3, generate_table_1_4
-from anomaly_generators import (generate_table_1_27, generate_table_1_29, generate_table_1_30,
-                                generate_table_1_31, generate_table_1_32, generate_table_1_33,
-                                generate_table_1_34, generate_table_ri_abnormal_meter,
-                                generate_table_ri_unsuccessful_meter)
-from curve_generators import generate_table_1_15, generate_table_1_16
+import config
+import id_allocator
+import table_cache
+from table_schemas import TABLE_FILES, TABLE_COMMENTS, table_headers
+from pipeline import TABLE_SPECS, TableLifecycle, build_inputs, iter_tables, iter_table_chunks, resolve_tables
+from partition_writer import PartitionedCsvWriter, write_csv_partitioned
+from csv_index import DEFAULT_INDEX_COLUMNS, StreamingCsvWriter, append_csv_indexed, write_csv_indexed
+from checksums import open_hashed, write_dataset_manifest
+from checkpoint import Checkpoint
+from object_store import make_output_dir
+from row_records import write_rows
+
+# 曲线表(支持分区输出和旁路索引)
+CURVE_TABLES = ('1_15', '1_16')
+
+# 台区和电表标识, 增量生成时沿用
+MASTER_STATE = 'master_data.json'
+
+def previous_entry(previous, path):
+    """数据集清单中已有文件的条目, 追加时据此接续行数和摘要(不重新读取已有内容)"""
+    entry = (previous or {}).get(path)
+    if entry is None:
+        raise ValueError(f"数据集清单中没有 {path} 的条目, 无法追加")
+    return entry
+
+def append_csv(filename, data, headers, previous):
+    """
+    把数据行追加到已有CSV文件末尾,返回追加后整个文件的文件条目
+
+    Args:
+        previous: 已有文件在数据集清单中的条目, 行数和摘要在此基础上累计
+    """
+    filepath = os.path.join(config.OUTPUT_DIR, filename)
+    with open(filepath, 'r', newline='', encoding='utf-8-sig') as f:
+        existing_headers = next(csv.reader(f), [])
+    if data and existing_headers != headers:
+        raise ValueError(f"追加数据的字段与已有文件不一致: {filename}")
+    total = previous['rows'] + len(data)
+
+    with open_hashed(filepath, append=previous) as (f, hasher):
+        write_rows(f, data, existing_headers)
+
+    print(f"已追加文件: {filename}, 追加记录数: {len(data)}, 总记录数: {total}")
+    return {'path': filename, 'rows': total, **hasher.digest()}
 
 def write_csv(filename, data, headers, comments):
-    """写入CSV文件,包含字段名(英文)和注释(中文)"""
-    filepath = os.path.join(OUTPUT_DIR, filename)
+    """写入CSV文件,包含字段名(英文)和注释(中文),写入时同步计算摘要,返回文件条目"""
+    filepath = os.path.join(config.OUTPUT_DIR, filename)
     
-    with open(filepath, 'w', newline='', encoding='utf-8-sig') as f:
+    with open_hashed(filepath) as (f, hasher):
         writer = csv.DictWriter(f, fieldnames=headers)
         
         # 写入英文字段名
@@ -29,533 +66,272 @@ def write_csv(filename, data, headers, comments):
         comment_row = {header: comments.get(header, '') for header in headers}
         writer.writerow(comment_row)
         
-        # 写入数据
-        writer.writerows(data)
+        # 写入数据(记录行直接按元组写出)
+        write_rows(f, data, headers)
     
     print(f"已生成文件: {filename}, 记录数: {len(data)}")
+    return {'path': filename, 'rows': len(data), **hasher.digest()}
+
+def write_curve_csv(filename, data, headers, comments, meters, append=False, previous=None):
+    """
+    写入曲线表,配置了分区方式或最大行数时按分区输出,否则单文件输出并按配置生成旁路索引
+
+    Args:
+        previous: 追加时数据集清单中已有文件的条目 {相对路径: 条目}
+
+    Returns:
+        文件条目列表(分区输出时每个分区文件一项)
+    """
+    if config.PARTITION_BY or config.MAX_ROWS_PER_FILE:
+        manifest = write_csv_partitioned(filename, data, headers, comments, config.PARTITION_BY,
+                                         meters=meters, max_rows_per_file=config.MAX_ROWS_PER_FILE,
+                                         max_workers=config.PARTITION_WORKERS, append=append)
+        return [{**part, 'path': f"{manifest['table']}/{part['path']}"} for part in manifest['partitions']]
+    filepath = os.path.join(config.OUTPUT_DIR, filename)
+    if config.CURVE_INDEX and append:
+        entry = append_csv_indexed(filepath, data, headers, previous_entry(previous, filename))
+        print(f"已追加文件: {filename}, 追加记录数: {len(data)}, 总记录数: {entry['rows']} (含旁路索引)")
+        return [{**entry, 'path': filename}]
+    if config.CURVE_INDEX:
+        entry = write_csv_indexed(filepath, data, headers, comments)
+        print(f"已生成文件: {filename}, 记录数: {len(data)} (含旁路索引)")
+        return [{**entry, 'path': filename}]
+    if append:
+        return [append_csv(filename, data, headers, previous_entry(previous, filename))]
+    return [write_csv(filename, data, headers, comments)]
+
+def write_curve_chunks(key, chunks, meters, progress, commit):
+    """
+    逐块写入曲线表, 每块落盘后调用 commit(progress) 提交进度, 中断后按提交的进度继续写入
+
+    单文件输出时各块依次写入同一个临时文件, 提交的是已落盘的字节数, 全部写完后重命名为目标文件;
+    分区输出时各块写入同一个 PartitionedCsvWriter, 各分区的文件跨块写满最大行数才滚动,
+    提交的是已写满的分区文件和各分区打开的文件(行数、已落盘的字节数)
+
+    Args:
+        key: 曲线表编号
+        chunks: (块号, 数据列表) 迭代器, 从 progress 记录的块之后开始
+        meters: 电表登记表(MeterRegistry, 按台区分区时使用)
+        progress: 已提交的进度 {'chunks', 'rows', 'bytes' 或 'partitions'/'open'}, 从头写入时为空字典
+        commit: 提交进度的函数
+
+    Returns:
+        文件条目列表, 同 write_table
+    """
+    filename = TABLE_FILES[key]
+    headers = table_headers(key)
+    comments = TABLE_COMMENTS[key]
+    partitioned = config.PARTITION_BY or config.MAX_ROWS_PER_FILE
+    filepath = os.path.join(config.OUTPUT_DIR, filename)
+    index_columns = DEFAULT_INDEX_COLUMNS if config.CURVE_INDEX else ()
+    writer = None
+    try:
+        if partitioned:
+            writer = PartitionedCsvWriter(filename, headers, comments, config.PARTITION_BY, meters,
+                                          config.MAX_ROWS_PER_FILE, config.PARTITION_WORKERS,
+                                          resume=progress if 'open' in progress else None)
+        for chunk_no, data in chunks:
+            if writer is None:
+                writer = StreamingCsvWriter(filepath, headers, comments, index_columns,
+                                            resume_bytes=progress.get('bytes'))
+            if partitioned:
+                writer.write(data)
+            else:
+                writer.write_rows(data)
+            progress.update(writer.commit())
+            progress['chunks'] = chunk_no + 1
+            commit(progress)
+
+        if partitioned:
+            manifest = writer.close()
+            writer = None
+            entries = [{**part, 'path': f"{manifest['table']}/{part['path']}"} for part in manifest['partitions']]
+        else:
+            if writer is None:
+                writer = StreamingCsvWriter(filepath, headers, comments, index_columns,
+                                            resume_bytes=progress.get('bytes'))
+            entry = writer.close()
+            writer = None
+            suffix = ' (含旁路索引)' if config.CURVE_INDEX else ''
+            print(f"已生成文件: {filename}, 记录数: {entry['rows']}{suffix}")
+            entries = [{**entry, 'path': filename}]
+    finally:
+        if writer is not None:
+            # 出错时只关闭文件, 保留已提交的临时文件供继续生成
+            writer.suspend()
+    return [{'table': key, **entry} for entry in entries]
+
+def write_master_state(inputs):
+    """保存台区和电表标识, 增量生成时沿用同一批电表"""
+    state = {'districts': inputs['districts'], 'meters': inputs['meters'].to_records()}
+    with open_hashed(os.path.join(config.OUTPUT_DIR, MASTER_STATE), encoding='utf-8') as (f, _):
+        json.dump(state, f, ensure_ascii=False)
+
+def write_table(key, data, meters, append=False, previous=None):
+    """
+    按表编号写入CSV, 字段名和注释取自table_schemas
+
+    Args:
+        append: 追加到已有文件末尾(增量生成), 而不是重新写出整个文件
+        previous: 追加时数据集清单中已有文件的条目 {相对路径: 条目}, 行数和摘要在此基础上累计
+
+    Returns:
+        文件条目列表, 每项包含 table/path/rows/bytes/sha256/chunks, 用于数据集清单
+    """
+    headers = table_headers(key)
+    comments = TABLE_COMMENTS[key]
+    if key in CURVE_TABLES:
+        entries = write_curve_csv(TABLE_FILES[key], data, headers, comments, meters, append, previous)
+    elif append:
+        entries = [append_csv(TABLE_FILES[key], data, headers, previous_entry(previous, TABLE_FILES[key]))]
+    else:
+        entries = [write_csv(TABLE_FILES[key], data, headers, comments)]
+    return [{'table': key, **entry} for entry in entries]
+
+def write_curve_table(checkpoint, key, inputs, tables, data=None, cached=False):
+    """
+    逐块写入曲线表并向检查点提交进度, 从检查点记录的块之后继续
+
+    Args:
+        data: 已生成的整表数据(启用表缓存时), None 表示逐块生成
+    """
+    progress = checkpoint.curve_progress(os.path.join(config.OUTPUT_DIR, TABLE_FILES[key]), key)
+    resumed = f" (从第{progress['chunks'] + 1}块继续)" if progress else ''
+    print(f"\n生成{TABLE_SPECS[key]['title']}...{' (使用缓存)' if cached else ''}{resumed}")
+    chunks = iter_table_chunks(key, inputs, tables, start=progress.get('chunks', 0), data=data)
+    entries = write_curve_chunks(key, chunks, inputs['meters'], progress,
+                                 lambda progress: checkpoint.curve_commit(key, progress))
+    checkpoint.table_done(key, entries)
+
+def generate_all(checkpoint, keys):
+    """
+    按依赖顺序生成并写入指定的表, 每张表写完后记录到检查点, 已完成的表不再重新生成
+
+    每张表在最后一个下游表写完后释放(见 pipeline.TableLifecycle), 最终统计只用文件条目中的行数
+
+    Args:
+        keys: 需要生成的表编号(已包含全部上游表), 见 pipeline.resolve_tables
+
+    Returns:
+        (基础输入, 文件条目列表)
+    """
+    # 生成时间序列、台区和电表信息
+    inputs = build_inputs()
+    meters = inputs['meters']
+    print(f"生成时间点数: {len(inputs['time_series'])}")
+    print(f"生成台区数: {len(inputs['districts'])}")
+    print(f"生成电表数: {len(meters)} (其中总表 {config.NUM_DISTRICTS} 个, 分表 {config.NUM_DISTRICTS * config.NUM_SUB_METERS} 个)")
+
+    # 按依赖顺序逐表生成并写入(1_31需先于1_27/1_30生成, 1_32需先于1_35/1_36/曲线表生成)
+    lifecycle = TableLifecycle(keys)
+    for key in keys:
+        if checkpoint.is_done(key):
+            print(f"\n{TABLE_SPECS[key]['title']}...(已完成, 跳过)")
+            lifecycle.finished(key)
+    # 继续生成时只读取仍有下游表未完成的已完成表
+    tables = lifecycle.track(checkpoint.completed_tables([key for key in keys if lifecycle.needed(key)]))
+
+    # 启用缓存时曲线表也整表读取缓存或生成后写入缓存, 否则逐块生成, 中断后从最后提交的块继续
+    use_cache = table_cache.cache_enabled()
+    targets = [key for key in keys
+               if not checkpoint.is_done(key) and (use_cache or not TABLE_SPECS[key].get('chunked'))]
+    for key, data, cached in iter_tables(targets, inputs, preloaded=tables, lifecycle=lifecycle):
+        if TABLE_SPECS[key].get('chunked'):
+            write_curve_table(checkpoint, key, inputs, tables, data, cached)
+        else:
+            print(f"\n生成{TABLE_SPECS[key]['title']}...{' (使用缓存)' if cached else ''}")
+            tables[key] = data
+            checkpoint.table_done(key, write_table(key, data, meters), data)
+        del data  # 生成下一张表前不再引用已写出的表, 以便按生命周期释放
+
+    for key in keys:
+        if TABLE_SPECS[key].get('chunked') and not checkpoint.is_done(key):
+            write_curve_table(checkpoint, key, inputs, tables)
+            lifecycle.finished(key)
+    return inputs, checkpoint.files()
+
+# 统计输出: 表编号 -> 说明
+TABLE_STATS = [
+    ('1_3', "MK_1_3运行电能表"),
+    ('1_4', "MK_1_4_运行计量自动化终端", " (唯一终端)"),
+    ('1_27', "MK_1_27历史故障清单"),
+    ('1_29', "MK_1_29_历史运维日志清单"),
+    ('1_30', "MK_1_30_风险等级清单"),
+    ('1_31', "MK_1_31_硬件状态", " (包含终端和电能表)"),
+    ('1_32', "MK_1_32_数据异常清单"),
+    ('1_33', "MK_1_33计算异常清单"),
+    ('1_34', "MK_1_34_状态异常清单终端"),
+    ('1_35', "MK_1_35_状态异常清单电能表"),
+    ('1_36', "MK_RI_UNSUCCESSFUL_METER"),
+    ('1_15', "MK_1_15_运行电能表功率曲线"),
+    ('1_16', "MK_1_16_运行电能表电压电流曲线"),
+]
 
 # 主函数
-def main():
+def main(resume=False, targets=None):
+    """
+    全量生成目标表及其依赖的上游表
+
+    Args:
+        resume: 从 OUTPUT_DIR 下的检查点继续上次中断的生成(配置和目标表需与中断前一致)
+        targets: 目标表编号列表, None 表示全部表
+    """
+    keys = resolve_tables(targets)
     print("开始生成虚拟数据...")
-    print(f"时间范围: {START_DATE} 至 {END_DATE}")
-    print(f"时间间隔: {INTERVAL_MINUTES}分钟")
-    print(f"台区数量: {NUM_DISTRICTS}")
-    print(f"每台区分表数量: {NUM_SUB_METERS}")
-    print(f"统一供电单位编号: {UNIFIED_SUPPLY_ORG_NO}")
-    
-    # 创建输出目录
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    # 生成时间序列
-    time_series = generate_time_series()
-    print(f"生成时间点数: {len(time_series)}")
-    
-    # 生成台区和电表信息
-    districts, meters = generate_district_and_meters()
-    print(f"生成台区数: {len(districts)}")
-    print(f"生成电表数: {len(meters)} (其中总表 {NUM_DISTRICTS} 个, 分表 {NUM_DISTRICTS * NUM_SUB_METERS} 个)")
-    
-    # 表1: MK_1_3运行电能表
-    print("\n生成表1: MK_1_3运行电能表...")
-    data_1_3 = generate_table_1_3(meters)
-    headers_1_3 = list(data_1_3[0].keys())
-    comments_1_3 = {
-        'RUN_METER_ID': '主键,运行电能表的唯一标识',
-        'AREA_CODE': '用户所在的地区编码',
-        'LT_CHK_DATE': '上次现场检验日期',
-        'MA_AUXIL_TABLE_SIGNS': '主副表标志',
-        'PR_CODE': '产权归属',
-        'MANU_FLAG': '是否是人工控制',
-        'ED_BGN_TIME': '代扣开始时间',
-        'ED_RATIO': '代扣比例',
-        'ED_TYPE': '代扣类型',
-        'ED_END_TIME': '代扣结束时间',
-        'ED_AMT': '代扣金额',
-        'SUPPLY_ORG_CODE': '供电单位编码',
-        'PF_THRESHHOLD': '停电阀值',
-        'MADE_NO': '电能表出厂编号',
-        'TIME_DIGIT_CODE': '分时位数',
-        'CREATE_TIME': '数据创建时间',
-        'ARRIVE_BATCH': '到货批次号',
-        'AGREE_TIP_PRC': '协议尖电价',
-        'AGREE_PEAK_PRC': '协议峰电价',
-        'AGREE_FLAT_PRC': '协议平电价',
-        'AGREE_PRC': '协议电价',
-        'AGREE_VALLEY_PRC': '协议谷电价',
-        'PLANT_AREA': '面积',
-        'OLD_READ_NO': '原抄表号',
-        'PARAM_ID': '参数标识',
-        'REMARKS': '备注',
-        'RP_NEED_AMT': '复电允许金额',
-        'INSTALL_POSITION': '电能表安装的物理位置',
-        'INSTALL_DATE': '安装日期',
-        'SWITCH_FLAG': '是否带开关',
-        'READ_ORDER': '抄表顺序号',
-        'OPERATED_TIME': '数据最近一次变更时间',
-        'DATA_PLAT_CHG_TIME': '数据资源管理平台变更时间',
-        'SUPER_CAPACIT_FLAG': '是否安装超级电容',
-        'DIRECT_COLLECT_SEND_FLAG': '是否实现直采直送',
-        'PREPAY_DEDUCT_FLAG': '本条记录是否开通预付费代扣',
-        'BAUD_RATE': '电能表的波特率',
-        'PHASE_CODE': '相位',
-        'BOX_CABINET_POSITION_NO': '箱(柜)内位置号',
-        'LAT': '纬度',
-        'LNG': '经度',
-        'TOTAL_FACTOR': '电能表综合倍率',
-        'MARKET_PRJ_ID': '营销项目标识',
-        'METER_DIGITS_CODE': '表码位数',
-        'METER_BOX_CABINET_ID': '表箱(柜)设备唯一标识',
-        'EQU_ID': '电能计量设备唯一标识',
-        'EQU_MAIN_PERSON_ID': '设备运维主人标识',
-        'CC_SWITCH_TYPE': '费控开关型号',
-        'ASSETS_NO': '电能表资产编号(条形码)',
-        'ROTATE_CYCLE': '轮换周期',
-        'ROTATE_VAILD_DATE': '轮换有效日期',
-        'MAINTAIN_GROUP': '运维班组',
-        'OPER_COMM_PROTOCOL': '运行通信协议',
-        'OPER_COMM_MODE': '运行通信方式',
-        'OVERDRAFT_FLAG': '是否允许透支标志',
-        'OVERDRAFT_QUOTA': '透支限额',
-        'COMM_ADDR1': '通讯地址1',
-        'COMM_ADDR2': '通讯地址2',
-        'COMM_MODE_CODE': '通讯方式',
-        'COMM_PROTOCOL_CODE': '通讯规约',
-        'AREA_SORT_CODE': '面积类型代码',
-        'PRESET_AMT': '预置电费金额',
-        'WARN_THRESHOLD1': '预警阀值1',
-        'WARN_THRESHOLD2': '预警阀值2',
-        'WARN_THRESHOLD3': '预警阀值3',
-        'MANUFACTURER_NAME': '生产厂家名称'
-    }
-    write_csv('MK_1_3运行电能表.csv', data_1_3, headers_1_3, comments_1_3)
-    
-    # 表2: MK_1_4_运行计量自动化终端
-    print("\n生成表2: MK_1_4_运行计量自动化终端...")
-    data_1_4 = generate_table_1_4(districts)
-    headers_1_4 = list(data_1_4[0].keys())
-    comments_1_4 = {
-        'RUN_TERM_ID': '运行计量自动化终端标识',
-        'IP_ADDR': 'IP地址',
-        'LT_CHK_DATE': '上次检验日期',
-        'UP_COMM_CODE': '上行通讯方式代码',
-        'UP_PROTOCOL_CODE': '上行通讯规约代码',
-        'UP_CHANNEL_1': '上行通道1',
-        'UP_CHANNEL_2': '上行通道2',
-        'DOWN_COMM_CODE': '下行通讯方式代码',
-        'DOWN_PROTOCOL_CODE': '下行通讯规约代码',
-        'MAIN_COMM_MODE': '主用通信方式',
-        'MAIN_TERM_FLAG': '主终端标志',
-        'MAIN_TERM_COMM_ADDR': '主终端通信地址',
-        'SUPPLY_ORG_NO': '供电单位编码',
-        'TIME_MP_FUNCTION_CODE': '分时计量功能代码',
-        'CREATE_TIME': '创建时间',
-        'ARRIVE_BATCH': '到货批次',
-        'PARAM_ID': '参数标识',
-        'AREA_CODE': '地区编码',
-        'SESERVE_COMM_MODE': '备用通信方式',
-        'SAFE_INTER_MODE': '安全接入方式',
-        'INSTALL_ADDR': '安装地址',
-        'INSTALL_DATE': '安装日期',
-        'WIRE_MODE_CODE': '接线方式代码',
-        'OPERATED_TIME': '数据最近一次变更时间',
-        'DATA_PLAT_CHG_TIME': '数据资源管理平台变更时间',
-        'IS_INSTALL_BRANCH_EQU': '是否安装分支设备',
-        'FACTORY_ID': '厂家标识',
-        'ELEC_CUST_NO': '用电客户号',
-        'OFFLINE_FLAG': '离线标志',
-        'BOX_CABINET_POSITION_NO': '箱(柜)内位置号',
-        'LAT': '纬度',
-        'TERM_USEAGE': '终端用途',
-        'LNG': '经度',
-        'TOTAL_FACTOR': '综合倍率',
-        'MARKET_PRJ_ID': '营销项目标识',
-        'MARKET_PRJ_NO': '营销项目编号',
-        'METER_BOX_CABINET_ID': '表箱(柜)设备唯一标识',
-        'METERING_POINT_NUMBER': '计量点编号',
-        'EQU_ID': '电能计量设备唯一标识',
-        'EQU_MODEL_CODE': '设备型号代码',
-        'EQU_SORT_CODE': '设备类别代码',
-        'EQU_TYPE_CODE': '设备类型代码',
-        'EQU_MAIN_PERSON_ID': '设备运维主人标识',
-        'ASSETS_NO': '资产编号',
-        'CONVERTER1': '转换器1',
-        'CONVERTER2': '转换器2',
-        'ROTATE_CYCLE': '轮换周期',
-        'MAINTAIN_GROUP': '运维班组',
-        'RUN_UP_COMM_CODE': '运行上行通信代码',
-        'RUN_DOWN_COMM_CODE': '运行下行通信代码',
-        'COMM_ADDR': '通讯地址',
-        'COMM_ADDR2': '通讯地址2',
-        'COMM_MODULA_TYPE_CODE': '通信模块类型代码',
-        'MANUFACTURER_NAME': '生产厂家名称'
-    }
-    write_csv('MK_1_4_运行计量自动化终端.csv', data_1_4, headers_1_4, comments_1_4)
+    print(f"时间范围: {config.START_DATE} 至 {config.END_DATE}")
+    print(f"时间间隔: {config.INTERVAL_MINUTES}分钟")
+    print(f"台区数量: {config.NUM_DISTRICTS}")
+    print(f"每台区分表数量: {config.NUM_SUB_METERS}")
+    print(f"统一供电单位编号: {config.UNIFIED_SUPPLY_ORG_NO}")
+    if targets is not None:
+        upstream = [key for key in keys if key not in targets]
+        print(f"目标表: {', '.join(targets)}" + (f", 依赖的上游表: {', '.join(upstream)}" if upstream else ''))
+    use_cache = table_cache.cache_enabled()
+    if config.TABLE_CACHE_DIR and not use_cache:
+        print("提示: 表缓存需要同时设置 RUN_CLOCK 和 RANDOM_SEED, 本次不使用缓存")
+    if resume and config.OBJECT_STORE_URL:
+        raise ValueError("写入对象存储时不支持从检查点继续生成")
     
-    # 表6: MK_1_31_硬件状态（需要先生成，因为1-27和1-30依赖它）
-    print("\n生成表6: MK_1_31_硬件状态...")
-    data_1_31 = generate_table_1_31(districts, data_1_4, meters)  # 传入终端数据
-    headers_1_31 = list(data_1_31[0].keys())
-    comments_1_31 = {
-        'KEEPER_ID': 'SIM卡的当前持有人的唯一标识',
-        'TA_NO': '台区编号',
-        'TA_NAME': '台区名称',
-        'TA_ADDR': '台区地址',
-        'TA_TYPE': '台区类型',
-        'EQU_ID': '电能计量设备唯一标识',
-        'ASSETS_NO': '资产编号',
-        'DEVICE_TYPE': '设备类型(终端/电能表)',
-        'MANUFACTURER_NAME': '生产厂商名称',
-        'COMM_PROTOCOL_CODE': '通讯规约',
-        'COMM_INTERFACE_MODE_CODE': '通信接口方式',
-        'LOCAL_INTERFACE': '本地接口状态',
-        'CPU_RATE': 'CPU占用率',
-        'MEMORY_RATE': '内存占用率',
-        'SYSTEM_NUMBER': '系统版本号',
-        'SYSTEM_ROOT': '系统ROOT',
-        # 'SYSTEM_PERMISSION': '系统文件权限',
-        'IMPORTANT_DATA': '重要数据备份',
-        'OPEN_PORT_LIST': '开启端口列表',
-        'NETWORK_COMMUNICATION_OBJECT': '网络通信对象',
-        'REAL_TIME_SENDING_RATE': '实时发送速率',
-        'REAL_TIME_RECEIVING_RAT': '实时接收速率',
-        'TCP_RUNOFF': 'TCP流量占比',
-        'UDP_PROPORTION': 'UDP流量占比',
-        'BISINESS_PROPORTION': '业务流量占比',
-        'DEDICACED_CHANNEL': '专用网络通道',
-        'DISABLE_CONNECTION': '禁用网络自连'
-    }
-    write_csv('MK_1_31_硬件状态.csv', data_1_31, headers_1_31, comments_1_31)
+    # 创建输出目录(写入对象存储时不在本地创建)
+    make_output_dir(config.OUTPUT_DIR)
 
-    
-    # 表3: MK_1_27历史故障清单
-    print("\n生成表3: MK_1_27历史故障清单...")
-    data_1_27 = generate_table_1_27(time_series, meters, data_1_4, data_1_31)
-    headers_1_27 = list(data_1_27[0].keys()) if data_1_27 else ['RUN_METER_ID', 'RUN_TERM_ID', 'REASON_SWITCH', 'REASON_SWITCH_TIME', 'SUPPLY_ORG_NO', 'DATA_TIME', 'WORD_ORDER_CATEGORY', 'DEVOPS_STATE', 'DEVOPS_SCHEME', 'METERING_POINT_STATE', 'RISK_TYPE', 'RISK_GRADE', 'RISK_FACTOR']
-    comments_1_27 = {
-        'DATA_TIME': '数据时间',
-        'SUPPLY_ORG_NO': '供电单位编码',
-        'LOAD_TIME': '入库时间',
-        'CREATOR_ID': '创建人ID',
-        'CREATE_TIME': '创建时间',
-        'MODIFIER_ID': '修改人ID',
-        'UPDATE_TIME': '更新时间',
-        'DATA_FROM': '数据来源',
-        'AREA_CODE': '地区编码',
-        'TERMINAL_ID': '终端资产编码',
-        'RUN_TERM_ID': '终端标识',
-        'COMM_ADDR': '终端逻辑地址',
-        'REASON_SWITCH': '换表原因',
-        'MANUFACTURER_NAME': '生产厂家',
-        'REASON_SWITCH_TIME': '换表日期',
-        'THE_BOX_RUST': '箱体锈蚀腐烂',
-        'THE_DOOR_RUST': '箱门锈蚀腐烂',
-        'THE_DOOR_LOCK': '门锁无法打开',
-        'DOOR_LOCK_DAMAGED': '门锁损坏',
-        'THE_INCOMING_DAMAGED': '进出线开关破损',
-        'THE_INCOMING_BURN': '进出线开关烧毁',
-        'TERMINAL_BLOCK_DAMAGED': '接线端子损坏',
-        'TERMINAL_BLOCK_BURN': '接线端子烧毁',
-        'WIRE_BURN': '导线烧毁',
-        'DAMAGE_INSULATION': '导线绝缘破损',
-        'CONNECTOR_OXIDATION': '接插件氧化',
-        'CONNECTOR_DAMAGE': '接插件损坏',
-        'SALT_MIST': '盐雾',
-        'TEMPERATURE': '温度',
-        'HUMIDITY': '湿度',
-        'RUN_METER_ID': '运行电表标识',
-        'ELECTRICITY_ID': '电表资产编码',
-        'TERMINAL_STATUS': '终端运行状态',
-        'WORD_ORDER_ID': '工单编号',
-        'WORD_ORDER_CATEGORY': '工单类别',
-        'DEVOPS_STATE': '运维状态',
-        'DEVOPS_SCHEME': '运维方案',
-        'METERING_POINT_STATE': '计量点运行状态',
-        'RISK_TYPE': '风险类型',
-        'RISK_GRADE': '风险等级',
-        'RISK_FACTOR': '风险因子',
-        'equ_type': '设备类型',
-        'terminal_type': '终端类型',
-        'batch_to_which_it_belongs': '所属批次',
-        'communication_model': '通信方式',
-        'connection_method': '接线方式',
-        'protocol_type': '规约类型',
-        'measurement_point_number': '计量点编号',
-        'measurement_point_category': '计量点类别',
-        'measurement_point_capacity': '计量点容量',
-        'wiring_method': '计量点接线方式',
-        'user_id': '用户编号',
-        'user_name': '用户名称',
-        'user_class': '用户类别',
-        'user_address': '用户地址',
-        'running_state': '电能表运行状态',
-        'install_date': '安装日期',
-        'nominal_voltage': '额定电压',
-        'rated_current': '额定电流'
-    }
-    write_csv('MK_1_27历史故障清单.csv', data_1_27, headers_1_27, comments_1_27)
-    
-    # 表4: MK_1_29_历史运维日志清单
-    print("\n生成表4: MK_1_29_历史运维日志清单...")
-    data_1_29 = generate_table_1_29(time_series, meters, data_1_4)
-    headers_1_29 = list(data_1_29[0].keys())
-    comments_1_29 = {
-        'RUN_METER_ID': '主键,运行电能表标识',
-        'RUN_TERM_ID': '运行终端标识',
-        'REASON_SWITCH': '切换原因',
-        'REASON_SWITCH_TIME': '切换原因时间',
-        'SUPPLY_ORG_NO': '供电单位编号',
-        'DATA_TIME': '数据时间',
-        'OPERATION_TIME': '操作时间',
-        'OPERATION_CONTENT': '操作内容',
-        'OPERATION_STAFF': '操作人员',
-        'OPERATION_DESCRIBE': '操作描述',
-        'REASON_DESCRIBE': '原因描述',
-        'EQU_SORT_CODE': '设备类别代码',
-        'EQU_TYPE_CODE': '设备类型代码',
-        'EQU_ID': '电能计量设备唯一标识',
-        'METERING_POINT_NUMBER': '计量点编号'
-    }
-    write_csv('MK_1_29_历史运维日志清单.csv', data_1_29, headers_1_29, comments_1_29)
-    
-    # 表7: MK_1_32_数据异常清单(需要先生成,因为其他表依赖它)
-    print("\n生成表7: MK_1_32_数据异常清单...")
-    data_1_32 = generate_table_1_32(time_series)
-    headers_1_32 = list(data_1_32[0].keys()) if data_1_32 else ['DATA_TIME', 'SUPPLY_ORG_NO', 'DATA_ANOMALY_TYPE', 'TABLES', 'TABLES_ENGLISH_NAME', 'TABLES_CHINESE_NAME', 'NUMBER_OF']
-    comments_1_32 = {
-        'DATA_TIME': '主键,数据时间',
-        'SUPPLY_ORG_NO': '主键,供电单位编码',
-        'DATA_ANOMALY_TYPE': '数据异常类型',
-        'TABLES': '表格类型',
-        'TABLES_ENGLISH_NAME': '表英文名称',
-        'TABLES_CHINESE_NAME': '表中文名称',
-        'NUMBER_OF': '异常条数'
-    }
-    write_csv('MK_1_32_数据异常清单_手工录入_增量数据上送.csv', data_1_32, headers_1_32, comments_1_32)
-    
-    # 表5: MK_1_30_风险等级清单
-    print("\n生成表5: MK_1_30_风险等级清单...")
-    data_1_30 = generate_table_1_30(time_series, meters, districts, data_1_4, data_1_31)  # 传入终端数据和硬件数据
-    
-    # 备用表头,防止数据为空时无法获取keys
-    fallback_headers_1_30 = [
-        'DATA_TIME', 'SUPPLY_ORG_NO', 'DATA_FROM', 'AREA_CODE', 'TERMINAL_ID', 
-        'RUN_TERM_ID', 'COMM_ADDR', 'REASON_SWITCH', 'REASON_SWITCH_TIME', 
-        'RUN_METER_ID', 'ELECTRICITY_ID', 'TERMINAL_STATUS', 'METERING_POINT_STATE', 
-        'RISK_TYPE', 'RISK_GRADE', 'RISK_FACTOR', 'RISK',
-        'user_name', 'user_id', 'user_type', 'user_addr', 
-        'base_risk_MANUFACTURER', 'base_risk_BATCH', 'base_risk_LOAD', 
-        'base_risk_data_security', 'base_risk_uncap_event'
-    ]
-    for i in range(1, 11):
-        fallback_headers_1_30.append(f'inc_risk_{i}')
-        
-    headers_1_30 = list(data_1_30[0].keys()) if data_1_30 else fallback_headers_1_30
-    
-    comments_1_30 = {
-        'DATA_TIME': '主键,数据时间',
-        'SUPPLY_ORG_NO': '供电单位编号',
-        'DATA_FROM': '数据来源',
-        'AREA_CODE': '地区编码',
-        'TERMINAL_ID': '终端标识',
-        'RUN_TERM_ID': '运行终端标识',
-        'COMM_ADDR': '通讯地址',
-        'REASON_SWITCH': '切换原因',
-        'REASON_SWITCH_TIME': '切换原因时间',
-        'RUN_METER_ID': '运行电能表标识',
-        'ELECTRICITY_ID': '用电标识',
-        'TERMINAL_STATUS': '终端状态',
-        'METERING_POINT_STATE': '计量点状态',
-        'RISK_TYPE': '风险类型',
-        'RISK_GRADE': '风险等级',
-        'RISK_FACTOR': '风险因子',
-        'RISK': '风险系数',
-        
-        # --- 新增注释 ---
-        'user_name': '用户名称',
-        'user_id': '用户编号',
-        'user_type': '用户类型',
-        'user_addr': '用户地址',
-        'base_risk_MANUFACTURER': '电能表厂家贡献度',
-        'base_risk_BATCH': '电能表批次贡献度',
-        'base_risk_LOAD': '负荷水平贡献度',
-        'base_risk_data_security': '数据安全贡献度',
-        'base_risk_uncap_event': '开盖事件记录贡献度',
-        
-        # 增量基础因子注释
-        'incr_risk': '增量基础因子',
-        
-        # 生产厂家和批次注释
-        'MANUFACTURER_NAME': '生产厂家名称',
-        'ARRIVE_BATCH': '所属批次'
-    }
-    
-    write_csv('MK_1_30_风险等级清单_手动录入.csv', data_1_30, headers_1_30, comments_1_30)
-    
-    # 表8: MK_1_33计算异常清单
-    print("\n生成表8: MK_1_33计算异常清单...")
-    data_1_33 = generate_table_1_33(time_series)
-    headers_1_33 = list(data_1_33[0].keys()) if data_1_33 else ['DATA_TIME', 'SUPPLY_ORG_NO', 'RUNNING_STATE', 'CALCULATIN_TASK_NAME', 'CALCULATIN_ID', 'ABNORMAL_TIME', 'ABNORMAL_CAUSE', 'CALCULATIN_TIME']
-    comments_1_33 = {
-        'DATA_TIME': '主键,数据时间',
-        'SUPPLY_ORG_NO': '主键,供电单位编码',
-        'RUNNING_STATE': '运行状态',
-        'CALCULATIN_TASK_NAME': '计算任务名称',
-        'CALCULATIN_ID': '计算任务ID',
-        'ABNORMAL_TIME': '异常时间',
-        'ABNORMAL_CAUSE': '异常原因',
-        'CALCULATIN_TIME': '计算时长(按天累计)(H)'
-    }
-    write_csv('MK_1_33计算异常清单_手工录入_增量数据上送.csv', data_1_33, headers_1_33, comments_1_33)
-    
-   # 表9: MK_1_34_状态异常清单终端
-    print("\n生成表9: MK_1_34_状态异常清单终端...")
-    data_1_34 = generate_table_1_34(time_series, data_1_4)  # 传入终端数据
-    headers_1_34 = list(data_1_34[0].keys()) if data_1_34 else ['SUPPLY_ORG_NO', 'RUN_TERM_ID', 'ASSETS_NO', 'RUN_STATUS_CODE', 'EXCEPTION_TYPE', 'TERM_TYPE_CODE', 'METERING_POINT_NUMBER', 'ELEC_CUST_NO', 'CUST_TYPE_CODE', 'ELEC_ADDR', 'ABNORMAL_DATE', 'ELEC_CUST_NAME']
-    comments_1_34 = {
-        'SUPPLY_ORG_NO': '供电单位',
-        'RUN_TERM_ID': '终端标识',
-        'ASSETS_NO': '终端资产编号',
-        'RUN_STATUS_CODE': '运行状态',
-        'EXCEPTION_TYPE': '异常类型',
-        'TERM_TYPE_CODE': '终端类型',
-        'METERING_POINT_NUMBER': '计量点编号',
-        'ELEC_CUST_NO': '用户编号',
-        'CUST_TYPE_CODE': '用户类型',
-        'ELEC_ADDR': '用户地址',
-        'ABNORMAL_DATE': '异常日期',
-        'ELEC_CUST_NAME': '用户名称'
-    }
-    write_csv('MK_1_34_状态异常清单终端.csv', data_1_34, headers_1_34, comments_1_34)
-    
-    # 表10: MK_1_35_状态异常清单电能表(需要关联数据异常清单)
-    print("\n生成表10: MK_1_35_状态异常清单电能表...")
-    data_1_35 = generate_table_ri_abnormal_meter(time_series, meters, data_1_32, data_1_3)
-    headers_1_35 = list(data_1_35[0].keys()) if data_1_35 else ['SUPPLY_ORG_NO', 'energy_meter_identification', 'asset_code_meter', 'EXCEPTION_TYPE', 'running_state', 'measurement_point_number', 'user_id', 'customer_type', 'user_address', 'abnormal_date', 'user_name']
-    comments_1_35 = {
-        'SUPPLY_ORG_NO': '供电单位',
-        'energy_meter_identification': '运行电能表标识',
-        'asset_code_meter': '电能表资产编码',
-        'EXCEPTION_TYPE': '异常类型',
-        'running_state': '运行状态',
-        'measurement_point_number': '计量点编号',
-        'user_id': '用户编号',
-        'customer_type': '用户类型',
-        'user_address': '用户地址',
-        'abnormal_date': '异常日期',
-        'user_name': '用户名称'
-    }
-    write_csv('MK_1_35_状态异常清单电能表.csv', data_1_35, headers_1_35, comments_1_35)
-    
-    # 表11: MK_RI_UNSUCCESSFUL_METER(需要关联通信异常)
-    print("\n生成表11: MK_1_36_抄表不成功清单...")
-    data_ri_um = generate_table_ri_unsuccessful_meter(time_series, meters, data_1_32, data_1_3, data_1_4)
-    headers_ri_um = list(data_ri_um[0].keys()) if data_ri_um else ['SUPPLY_ORG_NO', 'data_time', 'EQU_ID', 'ASSETS_NO', 'RUN_STATUS_CODE', 'COMM_ADDR', 'COMM_MODE', 'PROTOCOL_CODE', 'WIRE_MODE_CODE', 'meter_reading_status']
-    comments_ri_um = {
-        'SUPPLY_ORG_NO': '供电单位',
-        'data_time': '数据时间',
-        'EQU_ID': '设备标识',
-        'ASSETS_NO': '设备资产编码',
-        'RUN_STATUS_CODE': '设备运行状态',
-        'COMM_ADDR': '设备逻辑地址',
-        'COMM_MODE': '通信方式',
-        'PROTOCOL_CODE': '规约类型',
-        'WIRE_MODE_CODE': '接线方式',
-        'meter_reading_status': '抄表状态',
-        'RUN_TERM_ID': '终端标识',
-        'MANUFACTURER_NAME': '生产厂家名称'
-    }
-    write_csv('MK_1_36_抄表不成功清单.csv', data_ri_um, headers_ri_um, comments_ri_um)
-    
-    # 表12: MK_1_15_运行电能表功率曲线
-    print("\n生成表12: MK_1_15_运行电能表功率曲线...")
-    data_1_15 = generate_table_1_15(time_series, meters, data_1_32)
-    headers_1_15 = list(data_1_15[0].keys())
-    comments_1_15 = {
-        'RUN_METER_ID': '主键。运行电能表的唯一标识',
-        'DATA_TIME': '主键。数据时间',
-        'TP_FACTOR_A': 'A相功率因数',
-        'RPOWER_A': 'A相无功功率',
-        'POWER_A': 'A相有功功率',
-        'APOWER_A': 'A相视在功率',
-        'TP_FACTOR_B': 'B相功率因数',
-        'RPOWER_B': 'B相无功功率',
-        'POWER_B': 'B相有功功率',
-        'APOWER_B': 'B相视在功率',
-        'TP_FACTOR_C': 'C相功率因数',
-        'RPOWER_C': 'C相无功功率',
-        'POWER_C': 'C相有功功率',
-        'APOWER_C': 'C相视在功率',
-        'LOAD_TIME': '数据入库时间',
-        'PREPOSITION_TIME': '安全接入区前置接收到报文数据的时间',
-        'TP_FACTOR': '总功率因数',
-        'RPOWER': '总无功功率',
-        'POWER': '总有功功率',
-        'APOWER': '总视在功率',
-        'DATA_SOURCE_CODE': '数据采集方式',
-        'CREATOR_ID': '记录数据创建人',
-        'CREATE_TIME': '创建时间',
-        'MODIFIER_ID': '修改人',
-        'UPDATE_TIME': '数据修改时间',
-        'DATA_FROM': '用于数据迁移标识',
-        'AREA_CODE': '区分分省数据',
-        'SUPPLY_ORG_NO': '区分地市局',
-        'OPTIMISTIC_LOCK_VERSION': '用于控制并发脏数据',
-        'DELETE_FLAG': '数据逻辑删除'
-    }
-    write_csv('MK_1_15_运行电能表功率曲线.csv', data_1_15, headers_1_15, comments_1_15)
-    
-    # 表13: MK_1_16_运行电能表电压电流曲线
-    print("\n生成表13: MK_1_16_运行电能表电压电流曲线...")
-    data_1_16 = generate_table_1_16(time_series, meters, data_1_32)
-    headers_1_16 = list(data_1_16[0].keys())
-    comments_1_16 = {
-        'RUN_METER_ID': '主键。运行电能表的唯一标识',
-        'DATA_TIME': '主键。数据时间',
-        'P_VOLT_A': 'A相电压',
-        'P_CURR_A': 'A相电流',
-        'P_VOLT_B': 'B相电压',
-        'P_CURR_B': 'B相电流',
-        'P_VOLT_C': 'C相电压',
-        'P_CURR_C': 'C相电流',
-        'LOAD_TIME': '数据入库时间',
-        'PREPOSITION_TIME': '安全接入区前置接收到报文数据的时间',
-        'DATA_SOURCE_CODE': '数据采集方式',
-        'ZL_CURR': '零线电流',
-        'CREATOR_ID': '记录数据创建人',
-        'CREATE_TIME': '创建时间',
-        'MODIFIER_ID': '修改人',
-        'UPDATE_TIME': '数据修改时间',
-        'DATA_FROM': '用于数据迁移标识',
-        'AREA_CODE': '区分分省数据',
-        'SUPPLY_ORG_NO': '区分地市局',
-        'OPTIMISTIC_LOCK_VERSION': '用于控制并发脏数据',
-        'DELETE_FLAG': '数据逻辑删除'
-    }
-    write_csv('MK_1_16_运行电能表电压电流曲线.csv', data_1_16, headers_1_16, comments_1_16)
+    # 检查点固定本次运行的随机种子和运行时钟, 继续生成时沿用
+    checkpoint = Checkpoint.load() if resume else None
+    if resume and checkpoint is None:
+        print("未找到检查点, 从头开始生成")
+    if checkpoint is None:
+        checkpoint = Checkpoint.start(keys, enabled=not config.OBJECT_STORE_URL)
+    with config.override(RANDOM_SEED=checkpoint.seed, RUN_CLOCK=checkpoint.clock,
+                         TABLE_CACHE_DIR=config.TABLE_CACHE_DIR if use_cache else None):
+        checkpoint.bind_config(keys)
+        inputs, files = generate_all(checkpoint, keys)
+
+        # 数据集清单: 各文件行数、字节数、摘要和生成配置, 已覆盖的时间范围(水位线),
+        # 以及ID分配的密钥种子和各计数器已用到的位置(增量生成从这里接续)
+        write_master_state(inputs)
+        time_series = inputs['time_series']
+        manifest = write_dataset_manifest(config.OUTPUT_DIR, files, tables=keys,
+                                          start=time_series[0].isoformat(),
+                                          watermark=time_series[-1].isoformat(),
+                                          ids={'seed': checkpoint.seed, 'counters': id_allocator.counters()})
+    checkpoint.clear()
+    print(f"\n已生成数据集清单: manifest.json, 文件数: {len(files)}, 总字节数: {manifest['total_bytes']}")
+
+    rows = {}
+    for entry in files:
+        rows[entry['table']] = rows.get(entry['table'], 0) + entry['rows']
     
     print("\n" + "="*80)
     print("所有数据生成完成!")
-    print(f"输出目录: {OUTPUT_DIR}")
+    print(f"输出目录: {config.OUTPUT_DIR}")
     print("="*80)
     print("\n数据统计:")
-    print(f"1. MK_1_3运行电能表: {len(data_1_3)} 条记录")
-    print(f"2. MK_1_4_运行计量自动化终端: {len(data_1_4)} 条记录 (唯一终端)")
-    print(f"3. MK_1_27历史故障清单: {len(data_1_27)} 条记录")
-    print(f"4. MK_1_29_历史运维日志清单: {len(data_1_29)} 条记录")
-    print(f"5. MK_1_30_风险等级清单: {len(data_1_30)} 条记录")
-    print(f"6. MK_1_31_硬件状态: {len(data_1_31)} 条记录 (包含终端和电能表)")
-    print(f"7. MK_1_32_数据异常清单: {len(data_1_32)} 条记录")
-    print(f"8. MK_1_33计算异常清单: {len(data_1_33)} 条记录")
-    print(f"9. MK_1_34_状态异常清单终端: {len(data_1_34)} 条记录")
-    print(f"10. MK_1_35_状态异常清单电能表: {len(data_1_35)} 条记录")
-    print(f"11. MK_RI_UNSUCCESSFUL_METER: {len(data_ri_um)} 条记录")
-    print(f"12. MK_1_15_运行电能表功率曲线: {len(data_1_15)} 条记录")
-    print(f"13. MK_1_16_运行电能表电压电流曲线: {len(data_1_16)} 条记录")
-    
+    for no, (key, name, *note) in enumerate((stat for stat in TABLE_STATS if stat[0] in rows), start=1):
+        print(f"{no}. {name}: {rows[key]} 条记录{''.join(note)}")
     print("\n" + "="*80)
     print("主要修改说明:")
     print("="*80)
-    print("✓ 修改1: 所有供电单位编号统一使用: " + UNIFIED_SUPPLY_ORG_NO)
+    print("✓ 修改1: 所有供电单位编号统一使用: " + config.UNIFIED_SUPPLY_ORG_NO)
     print("✓ 修改2: RUN_TERM_ID只有一个终端,所有关联字段与此唯一终端保持一致")
     print("✓ 修改3: 1-30风险等级清单增加字段注释:")
     print("  - inc_risk_1~10: 增量基础因子1~10")
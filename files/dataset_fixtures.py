@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据工厂
+在内存中生成小规模、引用一致的全部13张表, 供单元测试使用, 不写文件、不依赖当前目录
+
+同一组参数(台区数、电表数、天数、种子等)在进程内只生成一次, 之后直接返回缓存的数据集,
+整个测试会话共用; 随机种子和运行时钟固定, 同样的参数每次生成的数据完全相同。
+缓存的数据由所有测试共用, 测试中需要修改时先用 Dataset.copy_table 复制
+
+用法:
+    from dataset_fixtures import make_dataset
+    dataset = make_dataset(districts=2, meters=22, days=1, seed=7)
+    rows = dataset.tables['1_35']
+    frame = dataset.frame('1_15', 'polars')
+
+pytest中使用(conftest.py, 需将本目录加入 sys.path, 见 tests/conftest.py):
+    pytest_plugins = ['dataset_fixtures']
+
+    def test_meters(meter_dataset):                 # 默认规模, 会话级缓存
+        assert len(meter_dataset.tables['1_3']) == 22
+
+    def test_scale(meter_dataset_factory):
+        dataset = meter_dataset_factory(districts=3, meters=30, days=2)
+"""
+
+import copy
+from collections import namedtuple
+from datetime import datetime, timedelta
+import config
+from pipeline import build_tables
+
+DEFAULT_START = datetime(2025, 9, 1)
+DEFAULT_CLOCK = datetime(2025, 9, 8)  # 固定的运行时钟(CREATE_TIME/LOAD_TIME等字段)
+
+_Scale = namedtuple('_Scale', 'districts meters days seed start interval')
+_DATASETS = {}
+
+
+def scale_overrides(districts=2, meters=22, days=1, seed=0, start=DEFAULT_START, interval=15):
+    """
+    把测试数据规模转换为配置覆盖项
+
+    Args:
+        districts: 台区数量
+        meters: 电表总数量(包括每个台区的总表)
+        days: 天数, 从start当天0点起包含整天的全部时间点
+        seed: 随机种子
+        start: 开始日期
+        interval: 时间间隔分钟数
+    """
+    if districts <= 0 or days <= 0 or interval <= 0:
+        raise ValueError(f"台区数、天数、时间间隔必须为正数: {districts}, {days}, {interval}")
+    if meters < districts:
+        raise ValueError(f"电表数量({meters})不能少于台区数量({districts}), 每个台区至少有一个总表")
+    overrides = {
+        'NUM_DISTRICTS': districts,
+        'TOTAL_METERS': meters,
+        'START_DATE': start,
+        'END_DATE': start + timedelta(days=days) - timedelta(minutes=interval),
+        'INTERVAL_MINUTES': interval,
+        'RANDOM_SEED': seed,
+        'RUN_CLOCK': DEFAULT_CLOCK,
+        'TABLE_CACHE_DIR': None,
+    }
+    if districts > len(config.SUPPLY_ORG_NUMBERS):
+        overrides['SUPPLY_ORG_NUMBERS'] = [f'05{i:02d}' for i in range(1, districts + 1)]
+    return overrides
+
+
+class Dataset:
+    """
+    一组生成好的测试数据
+
+    Attributes:
+        inputs: 基础输入 {'time_series', 'districts', 'meters'}
+        tables: 表编号 -> 数据列表(行字典), 按生成顺序
+        overrides: 生成时使用的配置覆盖项
+    """
+
+    def __init__(self, inputs, tables, overrides):
+        self.inputs = inputs
+        self.tables = tables
+        self.overrides = overrides
+
+    def copy_table(self, key):
+        """返回表数据的深拷贝, 可在测试中随意修改"""
+        return copy.deepcopy(self.tables[key])
+
+    def frame(self, key, output='pandas'):
+        """
+        表数据转换为列式数据
+
+        Args:
+            output: 'pandas' / 'polars' / 'numpy' / 'columns'(仅标准库)
+        """
+        from api import rows_to_columns
+        from dataset_reader import to_output
+        from table_schemas import COLUMN_DTYPES
+        return to_output(rows_to_columns(key, self.tables[key]), COLUMN_DTYPES[key], output)
+
+    def write(self, output_dir, tables=None):
+        """
+        按生成程序的格式把表写出到output_dir(如pytest的tmp_path), 同时写出数据集清单
+
+        Args:
+            tables: 写出的表编号列表, None 表示全部
+
+        Returns:
+            数据集清单
+        """
+        from checksums import write_dataset_manifest
+        from csv_writer_and_main import write_table
+        from object_store import make_output_dir
+        output_dir = str(output_dir)
+        with config.override(**self.overrides, OUTPUT_DIR=output_dir):
+            make_output_dir(output_dir)
+            files = []
+            for key in tables or self.tables:
+                files.extend(write_table(key, self.tables[key], self.inputs['meters']))
+            return write_dataset_manifest(output_dir, files)
+
+
+def make_dataset(districts=2, meters=22, days=1, seed=0, start=DEFAULT_START, interval=15):
+    """
+    生成(或从进程内缓存返回)一组小规模测试数据, 参数见 scale_overrides
+
+    Returns:
+        Dataset, 同一组参数返回同一个对象
+    """
+    scale = _Scale(districts, meters, days, seed, start, interval)
+    dataset = _DATASETS.get(scale)
+    if dataset is None:
+        overrides = scale_overrides(*scale)
+        with config.override(**overrides):
+            inputs, tables = build_tables()
+        dataset = _DATASETS[scale] = Dataset(inputs, tables, overrides)
+    return dataset
+
+
+def clear_cache():
+    """清空进程内缓存的数据集"""
+    _DATASETS.clear()
+
+
+try:
+    import pytest
+except ImportError:  # 未安装pytest时仍可直接调用 make_dataset
+    pytest = None
+
+if pytest is not None:
+    @pytest.fixture(scope='session')
+    def meter_dataset():
+        """默认规模的测试数据集(2个台区、22块电表、1天), 整个测试会话共用"""
+        return make_dataset()
+
+    @pytest.fixture(scope='session')
+    def meter_dataset_factory():
+        """按参数生成测试数据集的工厂, 同一组参数在会话内只生成一次"""
+        return make_dataset
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据集读取模块
+读取本程序生成的CSV文件: 自动跳过BOM和中文注释行, 按table_schemas中的字段类型
+返回类型化的数据块, 逐块读取以限制内存占用
+
+输出格式(output参数):
+    'columns' - 字段名 -> 列数据; float列为array('d'), int列为array('q'),
+                其余为字符串列表(仅依赖标准库)
+    'numpy'   - 字段名 -> numpy数组, datetime列为datetime64[s](需要安装numpy)
+    'pandas'  - pandas.DataFrame(需要安装pandas)
+    'polars'  - polars.DataFrame(需要安装polars和numpy)
+
+不含引号的文件(如曲线表)走快速路径: mmap映射文件后按字节块整块切分字段,
+不经过csv模块逐行解析; 含引号的文件回退到csv.reader. 安装numpy时数值列整列交给numpy解析,
+不逐个调用float/int
+"""
+
+import csv
+import mmap
+import os
+from array import array
+from table_schemas import COLUMN_DTYPES, TABLE_FILES, table_key_for_file
+
+try:
+    import numpy as _np
+except ImportError:  # 未安装numpy时逐个转换数值
+    _np = None
+
+DEFAULT_CHUNK_ROWS = 65536
+_BLOCK_BYTES = 8 * 1024 * 1024
+_BOM = b'\xef\xbb\xbf'
+_NAN = float('nan')
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("output='numpy' 需要安装numpy: pip install numpy") from None
+    return numpy
+
+
+def _import_polars():
+    try:
+        import polars
+    except ImportError:
+        raise ImportError("output='polars' 需要安装polars: pip install polars") from None
+    return polars
+
+
+def _import_pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError("output='pandas' 需要安装pandas: pip install pandas") from None
+    return pandas
+
+
+def resolve_table_key(path, table=None):
+    """
+    确定文件对应的表编号: 优先使用table参数, 其次按文件名匹配,
+    分区文件(part-0001.csv)按所在分区目录的表名匹配
+    """
+    if table is not None:
+        if table not in TABLE_FILES:
+            raise KeyError(f"未知的表编号: {table}, 可选: {list(TABLE_FILES)}")
+        return table
+    key = table_key_for_file(os.path.basename(path))
+    parent = os.path.dirname(os.path.abspath(path))
+    while key is None and parent != os.path.dirname(parent):
+        key = table_key_for_file(os.path.basename(parent) + '.csv')
+        parent = os.path.dirname(parent)
+    if key is None:
+        raise KeyError(f"无法根据文件名识别表编号: {path}, 请通过table参数指定")
+    return key
+
+
+def _parse_numbers(values, dtype, empty):
+    """
+    numpy整列解析数值字符串(一次调用, 不逐个经过Python的float/int); 含空值时返回None, 由调用方处理
+    """
+    try:
+        return _np.array(values, dtype=_np.float64 if dtype == 'float' else _np.int64)
+    except ValueError:
+        if empty in values:
+            return None
+        raise
+
+
+def convert_column(values, dtype, empty=''):
+    """
+    把一列原始值转换为目标类型, 等于empty的值视为空值
+
+    安装numpy时数值列整列解析后按内存复制到array, 否则逐个用float/int转换
+    """
+    if dtype not in ('float', 'int'):
+        return list(values)
+    if _np is not None:
+        parsed = _parse_numbers(values, dtype, empty)
+        if parsed is None:
+            # 含空值的数值列以NaN表示空值(整数列退化为浮点列)
+            objects = _np.array(values, dtype=object)
+            objects[objects == empty] = _NAN
+            parsed = objects.astype(_np.float64)
+        result = array('d' if parsed.dtype == _np.float64 else 'q')
+        result.frombytes(parsed.tobytes())
+        return result
+    if empty in values:
+        # 含空值的整数列以NaN表示空值, 退化为浮点列
+        return array('d', [_NAN if v == empty else float(v) for v in values])
+    if dtype == 'float':
+        return array('d', map(float, values))
+    return array('q', map(int, values))
+
+
+def to_output(columns, dtypes, output):
+    """把'columns'格式的数据块转换为目标输出格式"""
+    if output == 'columns':
+        return columns
+    if output == 'numpy':
+        np = _import_numpy()
+        result = {}
+        for name, values in columns.items():
+            dtype = dtypes.get(name)
+            if dtype == 'datetime':
+                result[name] = np.array(values, dtype='datetime64[s]')  # 空字符串解析为NaT
+            elif dtype in ('float', 'int'):
+                result[name] = np.frombuffer(values, dtype=values.typecode).copy()
+            else:
+                result[name] = np.array(values, dtype=object)
+        return result
+    if output == 'pandas':
+        pd = _import_pandas()
+        return pd.DataFrame(to_output(columns, dtypes, 'numpy'))
+    if output == 'polars':
+        pl = _import_polars()
+        arrays = to_output(columns, dtypes, 'numpy')
+        data = {}
+        for name, values in columns.items():
+            dtype = dtypes.get(name)
+            if dtype == 'datetime':
+                # polars不支持秒精度的datetime64
+                data[name] = arrays[name].astype('datetime64[ms]')
+            elif dtype in ('float', 'int'):
+                data[name] = arrays[name]
+            else:
+                data[name] = list(values)
+        return pl.DataFrame(data)
+    raise ValueError(f"不支持的输出格式: {output}, 可选: 'columns' / 'numpy' / 'pandas' / 'polars'")
+
+
+def _build_chunk(rows, headers, selected, dtypes, empty):
+    """把行数据转置为列并做类型转换"""
+    if not rows:
+        return {name: convert_column([], dtypes.get(name), empty) for name, _ in selected}
+    transposed = list(zip(*rows))
+    return {name: convert_column(transposed[idx], dtypes.get(name), empty) for name, idx in selected}
+
+
+def _select(headers, columns):
+    if columns is None:
+        return [(name, idx) for idx, name in enumerate(headers)]
+    missing = [name for name in columns if name not in headers]
+    if missing:
+        raise KeyError(f"文件中不存在字段: {missing}")
+    return [(name, headers.index(name)) for name in columns]
+
+
+def _iter_fast(mm, chunk_rows, columns, dtypes):
+    """
+    快速路径: mmap按字节块读取, 整块解码后把换行替换为逗号一次性切分,
+    得到按行展开的扁平字段列表, 每列直接用步长切片取出, 无需逐行处理
+    """
+    pos = len(_BOM) if mm[:len(_BOM)] == _BOM else 0
+    size = len(mm)
+
+    # 字段名行和注释行
+    lines = []
+    for _ in range(2):
+        end = mm.find(b'\n', pos)
+        end = size if end == -1 else end + 1
+        lines.append(mm[pos:end].decode('utf-8'))
+        pos = end
+    # 行尾按字段名行确定(csv模块写出的为\r\n), 各块把行尾替换为逗号后一次切分
+    newline = '\r\n' if lines[0].endswith('\r\n') else '\n'
+    lines = [line.rstrip('\r\n') for line in lines]
+    headers = lines[0].split(',') if lines[0] else []
+    selected = _select(headers, columns)
+    num_fields = len(headers)
+
+    while pos < size:
+        limit = min(pos + _BLOCK_BYTES, size)
+        end = size if limit == size else mm.rfind(b'\n', pos, limit) + 1
+        if end <= pos:
+            # 单行超过块大小
+            end = mm.find(b'\n', limit)
+            end = size if end == -1 else end + 1
+        text = mm[pos:end].decode('utf-8')
+        pos = end
+
+        if text.endswith(newline):
+            text = text[:-len(newline)]
+        if not text:
+            continue
+        flat = text.replace(newline, ',').split(',')
+        if len(flat) % num_fields:
+            raise ValueError(f"文件字段数与字段名行不一致(字段名{num_fields}个)")
+        num_rows = len(flat) // num_fields
+        for first in range(0, num_rows, chunk_rows):
+            last = min(first + chunk_rows, num_rows)
+            yield {name: convert_column(flat[first * num_fields + idx:last * num_fields:num_fields],
+                                         dtypes.get(name), '')
+                   for name, idx in selected}
+
+
+def _iter_csv(path, chunk_rows, columns, dtypes):
+    """通用路径: csv.reader逐行解析"""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        headers = next(reader, [])
+        selected = _select(headers, columns)
+        next(reader, None)  # 跳过中文注释行
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) >= chunk_rows:
+                yield _build_chunk(rows, headers, selected, dtypes, '')
+                rows = []
+        if rows:
+            yield _build_chunk(rows, headers, selected, dtypes, '')
+
+
+def iter_chunks(path, table=None, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None, output='columns'):
+    """
+    逐块读取生成的CSV文件
+
+    Args:
+        path: CSV文件路径
+        table: 表编号(如'1_15'), 默认根据文件名识别
+        chunk_rows: 每块最大行数, 内存占用与之成正比
+        columns: 只读取的字段列表, None表示全部
+        output: 'columns' / 'numpy' / 'pandas' / 'polars'
+
+    Yields:
+        每块数据, 格式由output决定
+    """
+    dtypes = COLUMN_DTYPES[resolve_table_key(path, table)]
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b'"') == -1:
+                for chunk in _iter_fast(mm, chunk_rows, columns, dtypes):
+                    yield to_output(chunk, dtypes, output)
+                return
+    for chunk in _iter_csv(path, chunk_rows, columns, dtypes):
+        yield to_output(chunk, dtypes, output)
+
+
+def read_table(path, table=None, columns=None, output='columns'):
+    """
+    一次性读取整个文件, 参数同iter_chunks
+
+    各块先按列拼接, 再统一转换为output指定的格式
+    """
+    chunks = list(iter_chunks(path, table, columns=columns, output='columns'))
+    dtypes = COLUMN_DTYPES[resolve_table_key(path, table)]
+    if not chunks:
+        return to_output({}, dtypes, output)
+    merged = chunks[0]
+    for chunk in chunks[1:]:
+        for name, values in chunk.items():
+            if isinstance(merged[name], array) and isinstance(values, array) \
+                    and merged[name].typecode != values.typecode:
+                # 某一块含空值退化为浮点列时, 整列统一为浮点
+                merged[name] = array('d', merged[name])
+                values = array('d', values)
+            merged[name].extend(values)
+    return to_output(merged, dtypes, output)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外部排序模块
+将已生成的曲线CSV文件按 RUN_METER_ID, DATA_TIME 重新排序(电表优先),
+分块排序后落盘, 再多路归并, 内存占用只与块大小有关, 与文件大小无关
+
+用法:
+    python external_sort.py <输入CSV> <输出CSV> [--chunk-rows N] [--keys RUN_METER_ID,DATA_TIME]
+"""
+
+import argparse
+import csv
+import heapq
+import os
+import tempfile
+import config
+
+DEFAULT_SORT_KEYS = ('RUN_METER_ID', 'DATA_TIME')
+
+
+def _spill_chunk(rows, key_func, tmp_dir):
+    """对内存块排序后写入临时文件, 返回临时文件路径"""
+    rows.sort(key=key_func)
+    fd, path = tempfile.mkstemp(suffix='.csv', dir=tmp_dir)
+    with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def _read_chunk(path):
+    """逐行读取临时块文件"""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            yield row
+
+
+def external_sort_csv(src_path, dst_path, key_columns=DEFAULT_SORT_KEYS,
+                      chunk_rows=None, tmp_dir=None):
+    """
+    对带注释行的CSV文件做外部排序
+
+    Args:
+        src_path: 输入文件(第一行字段名, 第二行中文注释)
+        dst_path: 输出文件, 格式与输入一致
+        key_columns: 排序字段
+        chunk_rows: 每个内存块的最大行数, None 表示使用 config.SORT_CHUNK_ROWS
+        tmp_dir: 临时文件目录, 默认与输出文件同目录
+
+    Returns:
+        排序的数据行数
+    """
+    chunk_rows = chunk_rows or config.SORT_CHUNK_ROWS
+    tmp_dir = tmp_dir or os.path.dirname(os.path.abspath(dst_path))
+    chunk_paths = []
+    total = 0
+
+    with open(src_path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        headers = next(reader)
+        comment_row = next(reader)
+        key_idx = [headers.index(col) for col in key_columns]
+
+        def key_func(row):
+            return [row[i] for i in key_idx]
+
+        try:
+            # 分块排序并落盘
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    chunk_paths.append(_spill_chunk(chunk, key_func, tmp_dir))
+                    total += len(chunk)
+                    chunk = []
+            if chunk:
+                chunk_paths.append(_spill_chunk(chunk, key_func, tmp_dir))
+                total += len(chunk)
+
+            # 多路归并
+            with open(dst_path, 'w', newline='', encoding='utf-8-sig') as out:
+                writer = csv.writer(out)
+                writer.writerow(headers)
+                writer.writerow(comment_row)
+                writer.writerows(heapq.merge(*[_read_chunk(p) for p in chunk_paths], key=key_func))
+        finally:
+            for path in chunk_paths:
+                os.remove(path)
+
+    print(f"已排序文件: {os.path.basename(dst_path)}, 记录数: {total}, 分块数: {len(chunk_paths)}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='曲线CSV外部排序(电表优先)')
+    parser.add_argument('src', help='输入CSV文件')
+    parser.add_argument('dst', help='输出CSV文件')
+    parser.add_argument('--chunk-rows', type=int, help='每个内存块的最大行数(默认 SORT_CHUNK_ROWS)')
+    parser.add_argument('--keys', default=','.join(DEFAULT_SORT_KEYS), help='排序字段,逗号分隔')
+    args = parser.parse_args()
+    external_sort_csv(args.src, args.dst, tuple(args.keys.split(',')), args.chunk_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ID分配模块
+按前缀批量分配定长ID(前缀 + 数字), 同一前缀分配的ID保证不重复, 同一随机种子下结果可复现
+
+做法: 每个前缀维护一个计数器, ID的数字部分是计数器经带密钥的置换(十进制Feistel网络, 与FF1同构)
+得到的值, 看起来随机但不会重复; 密钥只由 (RANDOM_SEED, 前缀) 派生, 未设置随机种子时每次运行不同
+
+计数器空间按命名空间(基础输入和各表)等分为互不重叠的区段, 某张表是否重新生成、以什么顺序生成
+都不影响其他表的ID。增量生成沿用全量生成的密钥, 计数器从已用到的位置(清单中的 ids.counters)接续,
+各时间范围占用同一区段中互不重叠的计数器, 合并后的数据集中ID仍不重复(见 session)
+
+安装了numpy时按块向量化计算, allocate_array 每秒一两千万个; allocate 返回字符串列表,
+受创建Python字符串的开销限制, 每秒约三百万个。未安装numpy时逐个计算, 结果完全相同
+
+用法:
+    import id_allocator
+    id_allocator.begin('1_3')                              # 生成每张表前切换命名空间(pipeline中调用)
+    ids = id_allocator.allocate('PARAM', 1000)             # 字符串列表
+    arr = id_allocator.allocate_array('EQU', 10 ** 6)      # numpy定长字节串数组(S16)
+    one = id_allocator.next_id('WO')                       # 单个ID, 内部按块预先计算, 只占用取出的计数器
+"""
+
+import hashlib
+import os
+from contextlib import contextmanager
+import config
+
+try:
+    import numpy as _np
+except ImportError:  # 未安装numpy时逐个计算
+    _np = None
+
+# 命名空间, 每个命名空间占用计数器空间的一个区段(按顺序; 新增命名空间时加在末尾)
+NAMESPACES = ('inputs', '1_3', '1_4', '1_31', '1_27', '1_29', '1_32', '1_30', '1_33', '1_34', '1_35',
+              '1_36', '1_15', '1_16')
+
+FEISTEL_ROUNDS = 4
+PREFETCH = 4096  # next_id 每次预先计算的ID数(只占用取出的计数器)
+BLOCK = 16384  # 向量化计算每块的ID数(中间数组放得进CPU缓存)
+MAX_DIGITS = 18  # 数字部分的最大位数(两半各不超过9位, 轮函数的乘积不超过64位)
+
+_M64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX = 0xBF58476D1CE4E5B9  # splitmix64 的第二个乘数
+_MIX_SHIFT = 31
+
+
+def _round_value(b, key, modulus):
+    """
+    Feistel轮函数: 乘法、异或移位、再乘法(splitmix64式混合)后取高32位, 按乘法移位映射到 [0, modulus)
+
+    中间的异或移位使相邻的输入得到不相关的输出(只做一次乘法时相邻计数器的ID近似等差)
+    """
+    h = ((b + key) * _GOLDEN) & _M64
+    h ^= h >> _MIX_SHIFT
+    h = (h * _MIX) & _M64
+    return ((h >> 32) * modulus) >> 32
+
+
+class _Permutation:
+    """
+    [0, 10**digits) 上带密钥的置换
+
+    数字部分分为高u位和低v位两半, 各轮交替以 10**u / 10**v 为模做Feistel变换(与FF1同构), 结果仍为两半
+    """
+
+    def __init__(self, key_material, digits):
+        digest = hashlib.sha256(key_material.encode('utf-8')).digest()
+        self.keys = [int.from_bytes(hashlib.sha256(digest + bytes([r])).digest()[:8], 'big')
+                     for r in range(FEISTEL_ROUNDS)]
+        self.digits = digits
+        self.u = digits // 2
+        self.v = digits - self.u
+        # 每轮的模数: 偶数轮 10**u, 奇数轮 10**v
+        self.moduli = [10 ** (self.u if r % 2 == 0 else self.v) for r in range(FEISTEL_ROUNDS)]
+
+    def __call__(self, x):
+        """返回 (高u位, 低v位)"""
+        a, b = divmod(x, 10 ** self.v)
+        for key, modulus in zip(self.keys, self.moduli):
+            a, b = b, (a + _round_value(b, key, modulus)) % modulus
+        return a, b
+
+    def format(self, prefix, x):
+        a, b = self(x)
+        return f'{prefix}{a:0{self.u}d}{b:0{self.v}d}' if self.u else f'{prefix}{b:0{self.v}d}'
+
+    def array(self, x):
+        """
+        numpy uint64 数组的向量化版本, 结果与逐个计算一致, 返回 (高u位, 低v位) 两个数组
+
+        各轮原地计算, 只用两个临时数组; (a + f) % modulus 中两项都小于 modulus,
+        用 min(s, s - modulus)(无符号减法不够减时回绕为极大值)代替取模
+        """
+        a, b = _np.divmod(x, _np.uint64(10 ** self.v))
+        f = _np.empty_like(a)
+        g = _np.empty_like(a)
+        shift = _np.uint64(32)
+        mix_shift = _np.uint64(_MIX_SHIFT)
+        for key, modulus in zip(self.keys, self.moduli):
+            modulus = _np.uint64(modulus)
+            _np.add(b, _np.uint64(key), out=f)
+            f *= _np.uint64(_GOLDEN)
+            _np.right_shift(f, mix_shift, out=g)
+            f ^= g
+            f *= _np.uint64(_MIX)
+            f >>= shift
+            f *= modulus
+            f >>= shift
+            f += a
+            _np.subtract(f, modulus, out=g)
+            _np.minimum(f, g, out=f)
+            a, b, f = b, f, a
+        return a, b
+
+
+_digit_words = None
+
+
+def _write_digits(values, words):
+    """
+    把 values(uint64)的十进制数字按每4位一个uint32(ASCII)从右向左写入 words 的各列
+
+    每8位先用一次uint64除法拆出, 再在uint32上拆成两组4位(uint32除法比uint64快得多)后查表
+    """
+    global _digit_words
+    if _digit_words is None:
+        # 0000-9999 的ASCII数字, 每项4字节
+        _digit_words = _np.frombuffer(b''.join(b'%04d' % i for i in range(10000)), dtype=_np.uint32)
+    rest = values
+    for column in range(words.shape[1] - 1, -1, -2):
+        if column > 1:
+            rest, low = _np.divmod(rest, _np.uint64(10 ** 8))
+        else:
+            low = rest
+        low = low.astype(_np.uint32)
+        high = low // _np.uint32(10000)
+        low -= high * _np.uint32(10000)
+        words[:, column] = _digit_words[low]
+        if column:
+            words[:, column - 1] = _digit_words[high]
+
+
+class IdAllocator:
+    """
+    按前缀分配不重复的定长ID
+
+    Args:
+        seed: 随机种子, None 表示每个分配器使用随机密钥
+        offsets: 各计数器的起点 {'命名空间:前缀:长度': 已用数量}(增量生成时为之前各次已用到的位置),
+            None 表示都从区段起点开始
+    """
+
+    def __init__(self, seed=None, offsets=None):
+        self.seed = seed
+        self.salt = f"{seed}" if seed is not None else os.urandom(16).hex()
+        self.namespace = NAMESPACES[0]
+        self._offsets = dict(offsets or {})
+        self._used = dict(self._offsets)
+        self._permutations = {}
+        self._counters = {}
+        self._buffers = {}
+
+    def begin(self, namespace):
+        """
+        切换命名空间, 该命名空间的计数器从其起点(区段起点加上 offsets 中的起点)重新开始
+
+        每张表(非分块生成)生成前调用一次, 重新生成同一张表得到相同的ID
+        """
+        if namespace not in NAMESPACES:
+            raise KeyError(f"未知的ID命名空间: {namespace}, 可选: {NAMESPACES}")
+        self.namespace = namespace
+        self._counters = {}
+        self._buffers = {}
+
+    def _permutation(self, prefix, digits):
+        permutation = self._permutations.get((prefix, digits))
+        if permutation is None:
+            permutation = _Permutation(f"{self.salt}:{prefix}", digits)
+            self._permutations[(prefix, digits)] = permutation
+        return permutation
+
+    def _locate(self, prefix, count, length):
+        """
+        当前命名空间中该计数器之后count个计数器的位置(不占用)
+
+        Returns:
+            (置换, 起点, 计数器名称 '命名空间:前缀:长度', 已用数量)
+        """
+        digits = length - len(prefix)
+        if digits < 0:
+            raise ValueError(f"前缀 {prefix} 超过ID长度 {length}")
+        if digits > MAX_DIGITS:
+            raise ValueError(f"ID的数字部分最多 {MAX_DIGITS} 位: 前缀 {prefix}, 长度 {length}")
+        block = 10 ** digits // len(NAMESPACES)
+        name = f"{self.namespace}:{prefix}:{length}"
+        used = self._counters.get((prefix, length), self._offsets.get(name, 0))
+        if used + count > block:
+            raise ValueError(f"前缀 {prefix} 的ID空间不足: 长度 {length}, "
+                             f"命名空间 {self.namespace} 最多 {block} 个, 已分配 {used} 个, 本次 {count} 个")
+        start = NAMESPACES.index(self.namespace) * block + used
+        return self._permutation(prefix, digits), start, name, used
+
+    def _take(self, prefix, length, name, used, count):
+        """占用已用数量之后的count个计数器"""
+        self._counters[(prefix, length)] = used + count
+        if used + count > self._used.get(name, 0):
+            self._used[name] = used + count
+
+    def _reserve(self, prefix, count, length):
+        """在当前命名空间的区段中占用count个计数器, 返回 (置换, 起点)"""
+        permutation, start, name, used = self._locate(prefix, count, length)
+        # next_id 预先算好的ID从当前计数器开始, 批量分配后作废
+        self._buffers.pop((prefix, length), None)
+        self._take(prefix, length, name, used, count)
+        return permutation, start
+
+    def counters(self):
+        """各计数器已用到的位置 {'命名空间:前缀:长度': 数量}(含 offsets), 下次增量生成时作为 offsets"""
+        return dict(sorted(self._used.items()))
+
+    def restore(self, counters):
+        """合并之前记录的已用位置(从检查点继续或读取表缓存时, 这些表不再重新分配)"""
+        for name, used in counters.items():
+            self._used[name] = max(self._used.get(name, 0), used)
+
+    def used(self, namespace):
+        """某个命名空间各计数器已用到的位置(表缓存随表保存, 命中缓存时用 restore 恢复)"""
+        return {name: used for name, used in self._used.items() if name.startswith(f"{namespace}:")}
+
+    def offsets(self, namespace):
+        """某个命名空间各计数器的起点(增量生成时非空, 参与表缓存的缓存键)"""
+        return {name: used for name, used in self._offsets.items() if name.startswith(f"{namespace}:")}
+
+    def allocate(self, prefix, count, length=16):
+        """分配count个ID, 返回字符串列表"""
+        if count <= 0:
+            return []
+        permutation, start = self._reserve(prefix, count, length)
+        return self._format_list(prefix, permutation, start, count, length)
+
+    def _format_list(self, prefix, permutation, start, count, length):
+        if _np is not None and count >= 64:
+            return self._format_array(prefix, permutation, start, count, length).astype(f'U{length}').tolist()
+        return [permutation.format(prefix, start + i) for i in range(count)]
+
+    def allocate_array(self, prefix, count, length=16):
+        """
+        分配count个ID, 返回numpy定长字节串数组(dtype S{length}, ID只含ASCII字符), 需要安装numpy
+
+        需要str时用 .astype('U16') 转换(内存为4倍)
+        """
+        if _np is None:
+            raise ImportError("allocate_array 需要安装numpy: pip install numpy")
+        permutation, start = self._reserve(prefix, max(count, 0), length)
+        return self._format_array(prefix, permutation, start, max(count, 0), length)
+
+    @staticmethod
+    def _format_array(prefix, permutation, start, count, length):
+        """
+        向量化计算并格式化为 bytes 定长数组(dtype S{length})
+
+        每个ID右对齐放在整数个uint32字中(长度为4的倍数时正好对齐, 如默认的16位): 数字部分每4位一字写入,
+        前缀所在的字用掩码合入前缀字节; 按块计算, 中间数组放得进CPU缓存
+        """
+        width = (length + 3) // 4
+        pad = width * 4 - length
+        # 前缀所在的各字: 保留数字字节的掩码, 以及前缀字节
+        head = (pad + len(prefix) + 3) // 4
+        prefix_bytes = bytes(pad) + prefix.encode('ascii') + bytes(head * 4 - pad - len(prefix))
+        keep_bytes = bytes(pad + len(prefix)) + b'\xff' * (head * 4 - pad - len(prefix))
+        prefix_words = _np.frombuffer(prefix_bytes, dtype=_np.uint32)
+        keep_words = _np.frombuffer(keep_bytes, dtype=_np.uint32)
+        words = _np.empty((count, width), dtype=_np.uint32)
+        scale = _np.uint64(10 ** permutation.v)
+        for offset in range(0, count, BLOCK):
+            n = min(BLOCK, count - offset)
+            high, low = permutation.array(_np.arange(start + offset, start + offset + n, dtype=_np.uint64))
+            high *= scale
+            high += low
+            block = words[offset:offset + n]
+            _write_digits(high, block)
+            block[:, :head] &= keep_words
+            block[:, :head] |= prefix_words
+        out = words.view(_np.uint8)
+        if pad:
+            out = _np.ascontiguousarray(out[:, pad:])
+        return out.view(f'S{length}').reshape(count)
+
+    def next_id(self, prefix, length=16):
+        """
+        分配单个ID(逐行生成数据时使用)
+
+        一次预先计算之后的 PREFETCH 个ID, 但只占用实际取出的计数器,
+        已用位置与逐个分配相同(计数器不会因预取而跳过未使用的ID)
+        """
+        buffer = self._buffers.get((prefix, length))
+        if not buffer:
+            permutation, start, name, used = self._locate(prefix, 1, length)
+            count = min(PREFETCH, 10 ** (length - len(prefix)) // len(NAMESPACES) - used)
+            ids = self._format_list(prefix, permutation, start, count, length)
+            ids.reverse()
+            buffer = self._buffers[(prefix, length)] = [ids, name]
+        ids, name = buffer
+        used = self._counters.get((prefix, length), self._offsets.get(name, 0))
+        self._take(prefix, length, name, used, 1)
+        if len(ids) == 1:
+            del self._buffers[(prefix, length)]
+        return ids.pop()
+
+
+_allocator = None
+_session = None
+
+
+def current():
+    """当前的分配器: session 中为会话的分配器, 否则随随机种子(RANDOM_SEED)变化时重新创建"""
+    global _allocator
+    if _session is not None:
+        return _session
+    seed = config.RANDOM_SEED
+    if _allocator is None or _allocator.seed != seed:
+        _allocator = IdAllocator(seed)
+    return _allocator
+
+
+@contextmanager
+def session(seed, offsets=None):
+    """
+    在with块内固定使用以seed为密钥、计数器从offsets接续的分配器, 不随 config.RANDOM_SEED 变化
+
+    增量生成时使用: 各时间范围的随机种子不同, ID仍沿用全量生成的密钥(清单中的 ids.seed),
+    计数器从清单中的 ids.counters 接续; 结束后用 counters() 取出新的已用位置写回清单
+    """
+    global _session
+    saved = _session
+    _session = IdAllocator(seed, offsets)
+    try:
+        yield _session
+    finally:
+        _session = saved
+
+
+def counters():
+    """当前分配器各计数器已用到的位置, 见 IdAllocator.counters"""
+    return current().counters()
+
+
+def restore(counters):
+    """见 IdAllocator.restore"""
+    current().restore(counters)
+
+
+def used(namespace):
+    """见 IdAllocator.used"""
+    return current().used(namespace)
+
+
+def offsets(namespace):
+    """见 IdAllocator.offsets"""
+    return current().offsets(namespace)
+
+
+def begin(namespace):
+    """切换到命名空间(基础输入 'inputs' 或表编号), 见 IdAllocator.begin"""
+    current().begin(namespace)
+
+
+def allocate(prefix, count, length=16):
+    return current().allocate(prefix, count, length)
+
+
+def allocate_array(prefix, count, length=16):
+    return current().allocate_array(prefix, count, length)
+
+
+def next_id(prefix, length=16):
+    return current().next_id(prefix, length)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量生成模块
+在已有输出目录的基础上只生成新的时间范围: 读取数据集清单(manifest.json)中的水位线
+(已覆盖的最后一个时间点), 生成 (水位线, END_DATE] 范围内与时间相关的表,
+沿用已有的台区/电表标识(master_data.json)和主数据表(1_3/1_4/1_31), 工作量只与新增时间范围成正比
+
+APPEND_MODE:
+    'append' - 新数据追加到已有文件末尾(曲线表同步扩展旁路索引, 分区输出时新增分区文件)
+    'delta'  - 写出单独的增量文件: OUTPUT_DIR/delta/<起始时间>_<结束时间>/<原文件名>
+
+ID沿用全量生成的密钥(清单中的 ids.seed), 计数器从 ids.counters 接续, 与已有数据的ID不重复;
+完成后更新数据集清单: 水位线推进到新的结束时间, increments 中记录每次增量, ids.counters 推进到新的已用位置;
+追加时行数和摘要接续清单中已有文件的条目(追加的内容单独成段, 见 checksums), 不重新读取已有文件
+"""
+
+import csv
+import json
+import os
+from datetime import datetime, timedelta
+import config
+import id_allocator
+from checksums import load_dataset_manifest, write_dataset_manifest
+from csv_writer_and_main import MASTER_STATE, write_table
+from object_store import make_output_dir
+from pipeline import MASTER_TABLES, TABLE_SPECS, TableLifecycle, build_inputs, iter_tables, resolve_tables
+from table_schemas import TABLE_FILES
+
+APPEND_MODES = ('append', 'delta')
+DELTA_DIR = 'delta'
+
+
+def load_master_state(output_dir):
+    """读取全量生成时保存的台区和电表标识"""
+    with open(os.path.join(output_dir, MASTER_STATE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_table_rows(filepath):
+    """读取已生成的CSV文件为行字典列表(跳过中文注释行), 作为增量生成的上游表"""
+    with open(filepath, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        next(reader, None)  # 跳过中文注释行
+        return list(reader)
+
+
+def window_tag(start, end):
+    """增量时间范围标识, 如 20250908T0000_20250908T2345"""
+    return f"{start:%Y%m%dT%H%M}_{end:%Y%m%dT%H%M}"
+
+
+def event_base_points(manifest):
+    """全量生成的时间窗口(清单中的 start 至第一次增量之前的水位线)的时间点数"""
+    increments = manifest.get('increments')
+    if increments:
+        end = datetime.fromisoformat(increments[0]['start']) - timedelta(minutes=config.INTERVAL_MINUTES)
+    else:
+        end = datetime.fromisoformat(manifest['watermark'])
+    return (end - datetime.fromisoformat(manifest['start'])) // timedelta(minutes=config.INTERVAL_MINUTES) + 1
+
+
+def run_increment(mode='append'):
+    """
+    增量生成水位线之后到 config.END_DATE 的数据
+
+    Args:
+        mode: 'append' / 'delta', 见模块说明
+
+    Returns:
+        更新后的数据集清单, 没有新的时间范围时返回原清单
+    """
+    if mode not in APPEND_MODES:
+        raise ValueError(f"不支持的增量模式: {mode}, 可选: {APPEND_MODES}")
+    output_dir = config.OUTPUT_DIR
+    manifest = load_dataset_manifest(output_dir)
+    if 'watermark' not in manifest:
+        raise ValueError("已有输出的清单中没有水位线(watermark), 请先全量生成一次")
+    if manifest['config']['INTERVAL_MINUTES'] != config.INTERVAL_MINUTES:
+        raise ValueError("增量生成的时间间隔必须与已有输出一致(INTERVAL_MINUTES)")
+
+    watermark = datetime.fromisoformat(manifest['watermark'])
+    start = watermark + timedelta(minutes=config.INTERVAL_MINUTES)
+    if start > config.END_DATE:
+        print(f"没有新的时间范围需要生成: 水位线 {watermark}, END_DATE {config.END_DATE}")
+        return manifest
+
+    # 只延续全量生成时输出的表(见 main.py --tables)
+    keys = manifest.get('tables', list(TABLE_SPECS))
+    master = load_master_state(output_dir)
+    targets = [key for key in keys if key not in MASTER_TABLES]
+    # 主数据表沿用已有文件, 只读取有下游表的, 最后一个下游表写完后释放
+    lifecycle = TableLifecycle(resolve_tables(targets))
+    masters = [key for key in MASTER_TABLES if key in keys]
+    for key in masters:
+        lifecycle.finished(key)
+    preloaded = lifecycle.track({key: read_table_rows(os.path.join(output_dir, TABLE_FILES[key]))
+                                 for key in masters if lifecycle.needed(key)})
+
+    # 每次增量使用不同的种子, 避免各时间范围的随机序列重复; ID的密钥和计数器沿用清单中的记录
+    seed = config.RANDOM_SEED if config.RANDOM_SEED is None else f"{config.RANDOM_SEED}:{start.isoformat()}"
+    # 事件类表的每对象事件数对应全量生成的时间窗口, 按新窗口长度等比缩放
+    base_points = event_base_points(manifest)
+    ids = manifest.get('ids') or {'seed': manifest['config']['RANDOM_SEED'], 'counters': {}}
+    files = []
+    new_rows = 0
+    # 追加时行数和摘要接续清单中的条目, 不重新读取已有文件; 分块摘要的块大小沿用已有清单
+    previous = {entry['path']: entry for entry in manifest['files']}
+    with id_allocator.session(ids['seed'], ids['counters']) as allocator, \
+            config.override(START_DATE=start, RANDOM_SEED=seed, CHECKSUM_CHUNK_BYTES=manifest['chunk_bytes'],
+                            EVENT_BASE_POINTS=base_points):
+        inputs = build_inputs(master)
+        end = inputs['time_series'][-1]
+        tag = window_tag(start, end)
+        print(f"增量生成: {start} 至 {end}, 模式: {mode}, 时间点数: {len(inputs['time_series'])}")
+
+        for key, data, cached in iter_tables(targets, inputs, preloaded, lifecycle):
+            print(f"\n生成{TABLE_SPECS[key]['title']}...{' (使用缓存)' if cached else ''}")
+            new_rows += len(data)
+            if mode == 'append':
+                files.extend(write_table(key, data, inputs['meters'], append=True, previous=previous))
+                continue
+            delta_dir = os.path.join(output_dir, DELTA_DIR, tag)
+            make_output_dir(delta_dir)
+            with config.override(OUTPUT_DIR=delta_dir):
+                entries = write_table(key, data, inputs['meters'])
+            files.extend({**entry, 'path': f"{DELTA_DIR}/{tag}/{entry['path']}"} for entry in entries)
+
+    # 合并清单: 追加的文件替换原条目, 增量文件新增条目
+    merged = {entry['path']: entry for entry in manifest['files']}
+    merged.update({entry['path']: entry for entry in files})
+    increments = manifest.get('increments', []) + [{
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'mode': mode,
+        'rows': new_rows,
+    }]
+    with config.override(CHECKSUM_CHUNK_BYTES=manifest['chunk_bytes']):
+        manifest = write_dataset_manifest(output_dir, list(merged.values()), tables=keys, start=manifest['start'],
+                                          watermark=end.isoformat(), increments=increments,
+                                          ids={'seed': ids['seed'], 'counters': allocator.counters()})
+    print(f"\n增量生成完成, 新增记录数: {new_rows}, 水位线: {manifest['watermark']}")
+    return manifest
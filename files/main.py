@@ -3,9 +3,117 @@
 """
 电能表数据生成主程序
 入口文件 - 调用各个模块生成数据
+
+用法:
+    python main.py                                   # 全量生成(或按 APPEND_MODE 增量生成)
+    python main.py --tables 1_3 1_4 1_35             # 只生成指定的表, 自动补齐依赖的上游表
+    python main.py --districts 4 --meters 200 --start 2025-09-01 --end 2025-09-03 --interval 30
+    python main.py --resume                          # 从检查点继续上次中断的全量生成
+    python main.py --append delta --end 2025-09-05   # 在已有输出的水位线之后增量生成(APPEND_MODE)
+
+未在命令行指定的参数使用 config.py 中的配置
 """
 
+import argparse
+from datetime import datetime, timedelta
+import config
 from csv_writer_and_main import main
+from incremental import APPEND_MODES, run_increment
+from pipeline import TABLE_SPECS, resolve_tables
+
+
+def parse_time(text, interval, end=False):
+    """
+    解析命令行时间, 格式 yyyy-mm-dd 或 yyyy-mm-dd HH:MM[:SS]
+
+    只给出日期时, 开始时间取当天0点, 结束时间取当天最后一个时间点
+    """
+    value = datetime.fromisoformat(text)
+    if end and len(text) <= 10:
+        value += timedelta(days=1) - timedelta(minutes=interval)
+    return value
+
+
+def add_scale_arguments(parser):
+    """添加数据规模和随机种子参数(生成程序和本地数据服务共用)"""
+    parser.add_argument('--districts', type=int, help='台区数量(NUM_DISTRICTS)')
+    parser.add_argument('--meters', type=int, help='电表总数量, 包括每个台区的总表(TOTAL_METERS)')
+    parser.add_argument('--start', help='开始时间(START_DATE), 如 2025-09-01')
+    parser.add_argument('--end', help='结束时间(END_DATE), 只给日期时包含当天全部时间点')
+    parser.add_argument('--interval', type=int, help='时间间隔分钟数(INTERVAL_MINUTES)')
+    parser.add_argument('--seed', help='随机种子(RANDOM_SEED), 设置后输出可复现')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='生成电能表虚拟数据')
+    parser.add_argument('--tables', nargs='+', metavar='表编号',
+                        help=f"只生成指定的表及其依赖的上游表, 可选: {' '.join(TABLE_SPECS)}")
+    add_scale_arguments(parser)
+    parser.add_argument('--output-dir', help='输出目录(OUTPUT_DIR)')
+    parser.add_argument('--resume', action='store_true',
+                        help='从输出目录下的检查点(.checkpoint/)继续上次中断的全量生成')
+    parser.add_argument('--append', choices=APPEND_MODES,
+                        help='增量生成(APPEND_MODE): append-追加到已有文件末尾, delta-写出单独的增量文件')
+    return parser
+
+
+def config_overrides(parser, args):
+    """检查命令行参数并转换为配置覆盖项"""
+    overrides = {}
+    if getattr(args, 'append', None) is not None:
+        overrides['APPEND_MODE'] = args.append
+    if overrides.get('APPEND_MODE', config.APPEND_MODE):
+        # 增量生成总是生成全部表, 并且没有检查点
+        if getattr(args, 'tables', None):
+            parser.error("增量生成(--append / APPEND_MODE)不能与 --tables 同时使用")
+        if getattr(args, 'resume', False):
+            parser.error("增量生成(--append / APPEND_MODE)不能与 --resume 同时使用")
+    if getattr(args, 'tables', None):
+        try:
+            resolve_tables(args.tables)
+        except KeyError as e:
+            parser.error(e.args[0])
+
+    interval = config.INTERVAL_MINUTES
+    if args.interval is not None:
+        if args.interval <= 0:
+            parser.error("--interval 必须为正整数")
+        interval = overrides['INTERVAL_MINUTES'] = args.interval
+    try:
+        if args.start is not None:
+            overrides['START_DATE'] = parse_time(args.start, interval)
+        if args.end is not None:
+            overrides['END_DATE'] = parse_time(args.end, interval, end=True)
+    except ValueError:
+        parser.error("时间格式错误, 应为 yyyy-mm-dd 或 'yyyy-mm-dd HH:MM'")
+    if overrides.get('START_DATE', config.START_DATE) > overrides.get('END_DATE', config.END_DATE):
+        parser.error("开始时间不能晚于结束时间")
+
+    districts = config.NUM_DISTRICTS
+    if args.districts is not None:
+        if args.districts <= 0:
+            parser.error("--districts 必须为正整数")
+        districts = overrides['NUM_DISTRICTS'] = args.districts
+        if districts > len(config.SUPPLY_ORG_NUMBERS):
+            # 每个台区对应一个供电单位编号, 台区数超过已配置的编号数时按同样规则续编
+            overrides['SUPPLY_ORG_NUMBERS'] = [f'05{i:02d}' for i in range(1, districts + 1)]
+    if args.meters is not None:
+        if args.meters < districts:
+            parser.error(f"--meters 不能少于台区数量({districts}), 每个台区至少有一个总表")
+        overrides['TOTAL_METERS'] = args.meters
+
+    if getattr(args, 'output_dir', None) is not None:
+        overrides['OUTPUT_DIR'] = args.output_dir
+    if args.seed is not None:
+        overrides['RANDOM_SEED'] = args.seed
+    return overrides
+
 
 if __name__ == "__main__":
-    main()
+    parser = build_parser()
+    args = parser.parse_args()
+    with config.override(**config_overrides(parser, args)):
+        if config.APPEND_MODE:
+            run_increment(config.APPEND_MODE)
+        else:
+            main(resume=args.resume, targets=args.tables)
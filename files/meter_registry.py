@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+电表登记表模块
+按列存储全部电表(标识、所属台区下标、总表/分表标志), 台区编号和供电单位编号按台区存储一次;
+按 RUN_METER_ID / 台区编号的索引和按电表下标排列的 MK_1_3 行预先建立, 各生成函数共用, 查找为O(1)
+
+每块电表除标识字符串外只占用: 台区下标4字节、总表标志1字节、标识列表和标识索引各一个引用
+
+各生成函数按电表下标(position)访问各列; 需要兼容原电表字典的地方(如 random.sample、旧的扩展代码)
+可以按下标或迭代得到 Meter 视图, 支持 meter['run_meter_id'] 等原有的键
+"""
+
+from array import array
+from collections.abc import Sequence
+
+# 原电表字典的键
+METER_FIELDS = ('run_meter_id', 'ta_no', 'ma_auxil_table_signs', 'meter_type', 'supply_org_no')
+
+
+class Meter:
+    """单块电表的只读视图, 兼容原电表字典的键"""
+
+    __slots__ = ('registry', 'position')
+
+    def __init__(self, registry, position):
+        self.registry = registry
+        self.position = position
+
+    def __getitem__(self, key):
+        return self.registry.field(self.position, key)
+
+    def get(self, key, default=None):
+        return self.registry.field(self.position, key) if key in METER_FIELDS else default
+
+    def keys(self):
+        return METER_FIELDS
+
+    def __eq__(self, other):
+        return (isinstance(other, Meter) and self.registry is other.registry
+                and self.position == other.position)
+
+    def __hash__(self):
+        return hash((id(self.registry), self.position))
+
+    def __repr__(self):
+        return f"Meter({self.registry.to_record(self.position)})"
+
+
+class MeterRegistry(Sequence):
+    """
+    按列存储的电表登记表
+
+    Attributes:
+        districts: 台区信息列表(与原 generate_district_and_meters 返回的台区相同)
+        run_meter_ids: 电表标识列表
+        district_index: array('I'), 每块电表所属台区在districts中的下标
+        is_total: bytearray, 1-总表 0-分表
+    """
+
+    __slots__ = ('districts', 'run_meter_ids', 'district_index', 'is_total',
+                 '_position', '_by_district', '_master')
+
+    def __init__(self, districts, run_meter_ids=(), district_index=(), is_total=()):
+        self.districts = districts
+        self.run_meter_ids = list(run_meter_ids)
+        self.district_index = array('I', district_index)
+        self.is_total = bytearray(is_total)
+        self._position = None
+        self._by_district = None
+        self._master = (None, None)
+
+    def append(self, run_meter_id, district, total):
+        """登记一块电表, district 为台区下标"""
+        self.run_meter_ids.append(run_meter_id)
+        self.district_index.append(district)
+        self.is_total.append(1 if total else 0)
+        self._position = self._by_district = None
+
+    @classmethod
+    def from_records(cls, districts, records):
+        """由原格式的电表字典列表(如 master_data.json 中保存的)构建"""
+        district_of = {d['ta_no']: i for i, d in enumerate(districts)}
+        return cls(districts, [m['run_meter_id'] for m in records],
+                   [district_of[m['ta_no']] for m in records],
+                   [m['meter_type'] == 'total' for m in records])
+
+    def to_record(self, position):
+        """单块电表的原格式字典"""
+        district = self.districts[self.district_index[position]]
+        total = self.is_total[position]
+        return {
+            'run_meter_id': self.run_meter_ids[position],
+            'ta_no': district['ta_no'],
+            'ma_auxil_table_signs': '1' if total else '0',
+            'meter_type': 'total' if total else 'sub',
+            'supply_org_no': district['supply_org_no'],
+        }
+
+    def to_records(self):
+        """原格式的电表字典列表(用于保存 master_data.json 和数据服务的 /meters)"""
+        return [self.to_record(i) for i in range(len(self))]
+
+    def __len__(self):
+        return len(self.run_meter_ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.take(range(len(self))[item])
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError(item)
+        return Meter(self, item)
+
+    def take(self, positions):
+        """按下标取出部分电表, 返回新的登记表(共用台区信息)"""
+        positions = list(positions)
+        return MeterRegistry(self.districts, [self.run_meter_ids[i] for i in positions],
+                             [self.district_index[i] for i in positions],
+                             [self.is_total[i] for i in positions])
+
+    def sorted_by_id(self):
+        """按 RUN_METER_ID 排序后的登记表"""
+        return self.take(sorted(range(len(self)), key=self.run_meter_ids.__getitem__))
+
+    def field(self, position, key):
+        """按原电表字典的键取值"""
+        if key == 'run_meter_id':
+            return self.run_meter_ids[position]
+        if key == 'ta_no':
+            return self.ta_no(position)
+        if key == 'meter_type':
+            return 'total' if self.is_total[position] else 'sub'
+        if key == 'ma_auxil_table_signs':
+            return '1' if self.is_total[position] else '0'
+        if key == 'supply_org_no':
+            return self.supply_org_no(position)
+        raise KeyError(key)
+
+    def district(self, position):
+        """电表所属台区的信息字典"""
+        return self.districts[self.district_index[position]]
+
+    def ta_no(self, position):
+        return self.districts[self.district_index[position]]['ta_no']
+
+    def supply_org_no(self, position):
+        return self.districts[self.district_index[position]]['supply_org_no']
+
+    def position(self, run_meter_id):
+        """RUN_METER_ID -> 下标, 不存在时返回 None"""
+        if self._position is None:
+            self._position = {meter_id: i for i, meter_id in enumerate(self.run_meter_ids)}
+        return self._position.get(run_meter_id)
+
+    def ta_no_of(self, run_meter_id, default=None):
+        """RUN_METER_ID -> 台区编号"""
+        position = self.position(run_meter_id)
+        return default if position is None else self.ta_no(position)
+
+    def positions_in_district(self, ta_no):
+        """台区编号 -> 该台区全部电表的下标列表"""
+        if self._by_district is None:
+            by_index = [[] for _ in self.districts]
+            for i, district in enumerate(self.district_index):
+                by_index[district].append(i)
+            self._by_district = {d['ta_no']: by_index[i] for i, d in enumerate(self.districts)}
+        return self._by_district.get(ta_no, [])
+
+    def index_master(self, master_rows):
+        """
+        建立 MK_1_3 数据的索引(同一份数据只建立一次, 各生成函数共用)
+
+        Args:
+            master_rows: MK_1_3 数据列表(行字典)
+
+        Returns:
+            self, 之后可调用 master_row
+        """
+        if self._master[0] is not master_rows:
+            rows = [None] * len(self)
+            for row in master_rows:
+                position = self.position(row['RUN_METER_ID'])
+                if position is not None:
+                    rows[position] = row
+            self._master = (master_rows, rows)
+        return self
+
+    def master_row(self, position):
+        """电表在 MK_1_3 中的行, 没有时返回空字典(需先调用 index_master)"""
+        return self._master[1][position] or {}
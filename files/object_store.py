@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对象存储输出模块
+配置 OBJECT_STORE_URL(如 's3://bucket/prefix')后, 各表文件不再写入本地磁盘,
+而是把编码后的字节按分片(S3_PART_BYTES)直接以分片上传(multipart upload)方式写入S3兼容存储,
+分片在有界线程池中并发上传, 未上传的分片数不超过 S3_MAX_PENDING_PARTS, 内存占用有上限
+
+仅依赖标准库(http.client + AWS Signature V4签名), 使用路径风格寻址, 适用于MinIO、moto server等
+本地S3兼容服务; 访问密钥从环境变量 AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY 读取
+
+对象键 = 前缀 + 文件相对于 OUTPUT_DIR 的路径, 如:
+    s3://bucket/run1/MK_1_3运行电能表.csv
+    s3://bucket/run1/MK_1_15_运行电能表功率曲线/day=2025-09-01/part-0001.csv
+
+未配置对象存储时写入本地文件, 同样原子提交: 先写 <文件>.tmp, 关闭时重命名为目标文件,
+中途出错或进程中断都不会留下不完整的目标文件
+"""
+
+import hashlib
+import hmac
+import http.client
+import io
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote, urlparse
+import config
+
+_EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+
+# 本地输出的临时文件后缀
+TMP_SUFFIX = '.tmp'
+
+# 所有分片上传共用的线程池(按 S3_UPLOAD_WORKERS 懒创建)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _hmac(key, msg):
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+class S3Client:
+    """最小化的S3兼容客户端, 只实现分片上传所需的请求"""
+
+    def __init__(self, endpoint, access_key, secret_key, region='us-east-1', retries=3):
+        parsed = urlparse(endpoint)
+        if parsed.scheme not in ('http', 'https'):
+            raise ValueError(f"不支持的S3服务地址: {endpoint}")
+        self.secure = parsed.scheme == 'https'
+        self.host = parsed.netloc
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.retries = retries
+
+    def _authorization(self, method, path, query, headers, payload_hash, now):
+        """按AWS Signature V4计算Authorization头"""
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        scope = f"{now.strftime('%Y%m%d')}/{self.region}/s3/aws4_request"
+        canonical_query = '&'.join(f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+                                   for k, v in sorted(query.items()))
+        names = sorted(headers)
+        canonical_headers = ''.join(f"{name}:{headers[name].strip()}\n" for name in names)
+        signed_headers = ';'.join(names)
+        canonical_request = '\n'.join([method, path, canonical_query, canonical_headers,
+                                       signed_headers, payload_hash])
+        string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope,
+                                    hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()])
+        key = ('AWS4' + self.secret_key).encode('utf-8')
+        for part in (now.strftime('%Y%m%d'), self.region, 's3', 'aws4_request'):
+            key = _hmac(key, part)
+        signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        return (f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+                f"SignedHeaders={signed_headers}, Signature={signature}")
+
+    def request(self, method, bucket, key, query=None, body=b''):
+        """
+        发送签名请求, 失败时重试
+
+        Returns:
+            (响应头字典(小写键), 响应体bytes)
+        """
+        query = query or {}
+        path = '/' + quote(bucket, safe='') + '/' + quote(key, safe='/-_.~')
+        payload_hash = hashlib.sha256(body).hexdigest() if body else _EMPTY_SHA256
+        url = path + ('?' + '&'.join(f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+                                     for k, v in sorted(query.items())) if query else '')
+        error = None
+        for _ in range(self.retries):
+            now = datetime.now(timezone.utc)
+            headers = {
+                'host': self.host,
+                'x-amz-content-sha256': payload_hash,
+                'x-amz-date': now.strftime('%Y%m%dT%H%M%SZ'),
+            }
+            headers['authorization'] = self._authorization(method, path, query, headers, payload_hash, now)
+            headers['content-length'] = str(len(body))
+            conn_class = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+            conn = conn_class(self.host, timeout=60)
+            try:
+                conn.request(method, url, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                if response.status < 300:
+                    return {k.lower(): v for k, v in response.getheaders()}, data
+                error = OSError(f"S3请求失败: {method} {bucket}/{key} {response.status} "
+                                f"{data[:500].decode('utf-8', 'replace')}")
+                if response.status < 500:
+                    break  # 4xx 为请求错误, 不重试
+            except (OSError, http.client.HTTPException) as e:
+                error = OSError(f"S3请求失败: {method} {bucket}/{key} {e}")
+            finally:
+                conn.close()
+        raise error
+
+    def create_multipart_upload(self, bucket, key):
+        _, data = self.request('POST', bucket, key, {'uploads': ''})
+        upload_id = ET.fromstring(data).find('{*}UploadId')
+        if upload_id is None:
+            raise OSError(f"S3响应中没有UploadId: {data[:500]!r}")
+        return upload_id.text
+
+    def upload_part(self, bucket, key, upload_id, part_number, body):
+        headers, _ = self.request('PUT', bucket, key,
+                                  {'partNumber': str(part_number), 'uploadId': upload_id}, body)
+        return headers['etag']
+
+    def complete_multipart_upload(self, bucket, key, upload_id, etags):
+        parts = ''.join(f"<Part><PartNumber>{no}</PartNumber><ETag>{etag}</ETag></Part>"
+                        for no, etag in enumerate(etags, start=1))
+        body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode('utf-8')
+        _, data = self.request('POST', bucket, key, {'uploadId': upload_id}, body)
+        # S3在200响应体中也可能返回错误
+        if b'<Error>' in data:
+            raise OSError(f"S3分片合并失败: {bucket}/{key} {data[:500].decode('utf-8', 'replace')}")
+
+    def abort_multipart_upload(self, bucket, key, upload_id):
+        self.request('DELETE', bucket, key, {'uploadId': upload_id})
+
+    def get_object(self, bucket, key):
+        return self.request('GET', bucket, key)[1]
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """
+    可写二进制流: 写入的字节攒够一个分片就提交到线程池上传, close时上传最后一个分片并合并
+
+    未完成的分片数达到上限时write阻塞, 直到有分片上传完成; 出错时调用abort取消整个上传
+    """
+
+    def __init__(self, client, bucket, key, part_bytes, executor, max_pending):
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_bytes = part_bytes
+        self._executor = executor
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._buffer = bytearray()
+        self._futures = []
+        self._aborted = False
+        self._upload_id = client.create_multipart_upload(bucket, key)
+
+    def writable(self):
+        return True
+
+    def _upload(self, part_number, body):
+        try:
+            return self._client.upload_part(self._bucket, self._key, self._upload_id, part_number, body)
+        finally:
+            self._slots.release()
+
+    def _submit(self, body):
+        # 已有分片上传失败时尽早报错
+        for future in self._futures:
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+        self._slots.acquire()
+        self._futures.append(self._executor.submit(self._upload, len(self._futures) + 1, body))
+
+    def write(self, b):
+        if self._aborted:
+            return len(b)
+        self._buffer += b
+        while len(self._buffer) >= self._part_bytes:
+            self._submit(bytes(self._buffer[:self._part_bytes]))
+            del self._buffer[:self._part_bytes]
+        return len(b)
+
+    def abort(self):
+        """取消上传, 已上传的分片由服务端丢弃"""
+        if self._aborted:
+            return
+        self._aborted = True
+        for future in self._futures:
+            future.cancel()
+        for future in self._futures:
+            if not future.cancelled():
+                future.exception()  # 等待进行中的分片结束
+        self._client.abort_multipart_upload(self._bucket, self._key, self._upload_id)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if not self._aborted:
+                # 最后一个分片可以小于最小分片大小; 空文件也上传一个空分片
+                if self._buffer or not self._futures:
+                    self._submit(bytes(self._buffer))
+                    self._buffer = bytearray()
+                etags = [future.result() for future in self._futures]
+                self._client.complete_multipart_upload(self._bucket, self._key, self._upload_id, etags)
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            super().close()
+
+
+class AtomicFile(io.RawIOBase):
+    """
+    本地原子写入: 写入 <文件>.tmp, close时重命名为目标文件, abort时删除临时文件,
+    suspend时保留临时文件
+
+    resume_bytes 不为None时打开已有的临时文件, 截断到已提交的字节数后续写
+    """
+
+    def __init__(self, filepath, resume_bytes=None):
+        super().__init__()
+        self._path = filepath
+        self._tmp_path = filepath + TMP_SUFFIX
+        self._aborted = False
+        if resume_bytes is None:
+            self._f = open(self._tmp_path, 'wb')
+        else:
+            self._f = open(self._tmp_path, 'r+b')
+            self._f.truncate(resume_bytes)
+            self._f.seek(resume_bytes)
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        if self._aborted:
+            return len(b)
+        return self._f.write(b)
+
+    def sync(self):
+        """把已写入的内容落盘(提交检查点前调用)"""
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def abort(self):
+        if not self._aborted:
+            self._aborted = True
+            self._f.close()
+            os.remove(self._tmp_path)
+
+    def suspend(self):
+        """关闭临时文件但不重命名也不删除, 之后的写入被丢弃(保留已提交的内容供续写)"""
+        if not self._aborted:
+            self._aborted = True
+            self._f.close()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if not self._aborted:
+                self._f.close()
+                os.replace(self._tmp_path, self._path)
+        finally:
+            super().close()
+
+
+class AppendFile(io.RawIOBase):
+    """本地追加写入, abort时把文件截断回追加前的长度"""
+
+    def __init__(self, filepath):
+        super().__init__()
+        self._f = open(filepath, 'ab')
+        self._original_size = self._f.tell()
+        self._aborted = False
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        if self._aborted:
+            return len(b)
+        return self._f.write(b)
+
+    def sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def abort(self):
+        if not self._aborted:
+            self._aborted = True
+            self._f.truncate(self._original_size)
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+
+def parse_store_url(url):
+    """解析 's3://bucket/prefix' 为 (bucket, prefix)"""
+    parsed = urlparse(url)
+    if parsed.scheme != 's3' or not parsed.netloc:
+        raise ValueError(f"不支持的对象存储地址: {url}, 格式应为 s3://bucket/prefix")
+    return parsed.netloc, parsed.path.strip('/')
+
+
+def make_client():
+    """按配置和环境变量创建S3客户端"""
+    access_key = os.environ.get('AWS_ACCESS_KEY_ID')
+    secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+    if not access_key or not secret_key:
+        raise ValueError("写入对象存储需要设置环境变量 AWS_ACCESS_KEY_ID 和 AWS_SECRET_ACCESS_KEY")
+    return S3Client(config.S3_ENDPOINT, access_key, secret_key, config.S3_REGION)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config.S3_UPLOAD_WORKERS,
+                                           thread_name_prefix='s3-upload')
+        return _executor
+
+
+def object_key(filepath):
+    """本地输出路径 -> 对象键(前缀 + 相对于OUTPUT_DIR的路径)"""
+    _, prefix = parse_store_url(config.OBJECT_STORE_URL)
+    relpath = os.path.relpath(filepath, config.OUTPUT_DIR).replace(os.sep, '/')
+    return f"{prefix}/{relpath}" if prefix else relpath
+
+
+def make_output_dir(path):
+    """创建本地输出目录; 写入对象存储时对象键不需要目录, 不在本地创建"""
+    if not config.OBJECT_STORE_URL:
+        os.makedirs(path, exist_ok=True)
+
+
+def open_raw_output(filepath, append=False, resume_bytes=None):
+    """
+    打开输出文件的二进制写入流
+
+    未配置 OBJECT_STORE_URL 时为本地原子写入文件, 否则为对应对象键的分片上传流;
+    append=True 时追加到已有本地文件末尾, resume_bytes 为续写未完成的临时文件(对象存储都不支持)
+    """
+    if not config.OBJECT_STORE_URL:
+        if append:
+            return AppendFile(filepath)
+        return AtomicFile(filepath, resume_bytes)
+    if append:
+        raise ValueError("对象存储不支持追加写入, 增量生成请使用 APPEND_MODE='delta'")
+    if resume_bytes is not None:
+        raise ValueError("对象存储不支持从检查点续写未完成的文件")
+    bucket, _ = parse_store_url(config.OBJECT_STORE_URL)
+    return S3MultipartWriter(make_client(), bucket, object_key(filepath), config.S3_PART_BYTES,
+                             _get_executor(), config.S3_MAX_PENDING_PARTS)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分区输出模块
+按天(DATA_TIME)、台区(ta_no)或供电单位(SUPPLY_ORG_NO)拆分大表,
+支持按最大行数滚动拆分文件,并生成列出所有分区文件的清单(manifest.json)
+
+逐块写入时(PartitionedCsvWriter)各分区最后一个文件跨块保持打开, 写满最大行数才滚动, 文件拆分与分块无关
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import config
+from checksums import hashed_output, open_hashed
+from object_store import TMP_SUFFIX, make_output_dir
+from row_records import write_rows
+
+MANIFEST_NAME = 'manifest.json'
+
+# 支持的分区方式
+PARTITION_MODES = ('day', 'district', 'supply_org')
+
+# Excel单个工作表最大行数(扣除字段名行和注释行)
+EXCEL_MAX_DATA_ROWS = 1048576 - 2
+
+
+def make_partition_key_func(partition_by, meters=None):
+    """
+    根据分区方式返回 row -> 分区键 的函数
+
+    Args:
+        partition_by: 'day' / 'district' / 'supply_org' / None(不分区)
+        meters: 电表登记表(MeterRegistry),按台区分区时用于 RUN_METER_ID -> ta_no 映射
+    """
+    if partition_by is None:
+        return lambda row: 'all'
+    if partition_by == 'day':
+        # DATA_TIME 格式为 yyyy-mm-dd HH:MM:SS, 取日期部分
+        return lambda row: row['DATA_TIME'][:10]
+    if partition_by == 'district':
+        if meters is None:
+            raise ValueError("按台区分区需要传入电表信息(meters)")
+        return lambda row: meters.ta_no_of(row['RUN_METER_ID'], 'UNKNOWN')
+    if partition_by == 'supply_org':
+        return lambda row: row['SUPPLY_ORG_NO']
+    raise ValueError(f"不支持的分区方式: {partition_by}, 可选: {PARTITION_MODES}")
+
+
+def _part_no(path):
+    """分区文件的编号, 如 day=2025-09-01/part-0003.csv -> 3"""
+    return int(os.path.splitext(path.rsplit('/', 1)[-1])[0].split('-')[1])
+
+
+class _OpenPart:
+    """
+    分区最后一个(未写满的)文件, 跨批次保持打开
+
+    resume_bytes 不为None时续写检查点记录的临时文件(保留前resume_bytes字节, 已有rows行)
+    """
+
+    def __init__(self, key, filepath, headers, comment_row, rows=0, resume_bytes=None):
+        self.key = key
+        self.filepath = filepath
+        self.rows = rows
+        if resume_bytes is not None and not os.path.exists(filepath + TMP_SUFFIX) and os.path.exists(filepath):
+            # 提交进度之后该文件已写满并重命名, 恢复为临时文件后截断到已提交的位置
+            os.replace(filepath, filepath + TMP_SUFFIX)
+        self.f, self.hasher = hashed_output(filepath, resume_bytes=resume_bytes)
+        if resume_bytes is None:
+            writer = csv.DictWriter(self.f, fieldnames=headers)
+            writer.writeheader()
+            writer.writerow(comment_row)
+
+    def commit(self):
+        """落盘, 返回已提交的字节数"""
+        self.f.flush()
+        self.hasher.sync()
+        return self.hasher.tell()
+
+    def close(self, table_dir):
+        """写完关闭(本地文件随即重命名为目标文件), 返回分区条目"""
+        self.f.close()
+        return {
+            'key': self.key,
+            'path': os.path.relpath(self.filepath, table_dir).replace(os.sep, '/'),
+            'rows': self.rows,
+            **self.hasher.digest(),
+        }
+
+    def abort(self):
+        self.hasher.abort()
+        self.f.close()
+
+    def suspend(self):
+        self.hasher.suspend()
+        self.f.close()
+
+
+class PartitionedCsvWriter:
+    """
+    分批写入分区文件(曲线表逐块写入时使用)
+
+    各分区最后一个文件跨批次保持打开, 写满 max_rows_per_file 行才关闭并滚动到下一个编号的文件,
+    文件的拆分与数据分成多少批无关; close() 时关闭所有文件并写出manifest.json
+
+    每批写完后可调用 commit() 落盘并取得进度(已写满的分区文件, 以及各打开文件的行数和已提交字节数),
+    进程中断后以 resume=进度 重新创建, 打开的文件截断到已提交的字节数后续写
+
+    用法:
+        writer = PartitionedCsvWriter(filename, headers, comments, 'day', max_rows_per_file=10 ** 6)
+        for chunk in chunks:
+            writer.write(chunk)
+        manifest = writer.close()
+
+    Args:
+        filename: 文件名(去掉.csv后作为分区目录名)
+        headers: 字段名列表
+        comments: 字段注释字典
+        partition_by: 分区方式, 见 PARTITION_MODES, None 表示只按行数滚动
+        meters: 电表登记表(MeterRegistry, 按台区分区时必需)
+        max_rows_per_file: 单个文件最大数据行数, None 表示不超过Excel单个工作表的上限(EXCEL_MAX_DATA_ROWS)
+        max_workers: 并行写入分区文件的线程数
+        previous: 已有的分区列表(追加时), 新文件的编号接着各分区已有的最大编号
+        resume: commit() 返回的进度, None 表示从头写入
+    """
+
+    def __init__(self, filename, headers, comments, partition_by=None, meters=None,
+                 max_rows_per_file=None, max_workers=4, previous=(), resume=None):
+        self.table_name = os.path.splitext(filename)[0]
+        self.table_dir = os.path.join(config.OUTPUT_DIR, self.table_name)
+        self.headers = headers
+        self.partition_by = partition_by
+        self.max_rows_per_file = max_rows_per_file or EXCEL_MAX_DATA_ROWS
+        self.max_workers = max_workers
+        self._key_func = make_partition_key_func(partition_by, meters)
+        self._comment_row = {header: comments.get(header, '') for header in headers}
+        self._previous = list(previous)
+        self._closed = []
+        self._open = {}
+        self._last_part_no = {}
+        for part in self._previous:
+            self._last_part_no[part['key']] = max(self._last_part_no.get(part['key'], 0), _part_no(part['path']))
+        make_output_dir(self.table_dir)
+        if resume is not None:
+            self._closed = list(resume['partitions'])
+            for part in self._closed + resume['open']:
+                self._last_part_no[part['key']] = max(self._last_part_no.get(part['key'], 0), _part_no(part['path']))
+            for part in resume['open']:
+                self._open[part['key']] = _OpenPart(part['key'], os.path.join(self.table_dir, part['path']),
+                                                    headers, self._comment_row, part['rows'], part['bytes'])
+
+    @property
+    def rows(self):
+        """已写入的数据行数(含已有分区)"""
+        return (sum(part['rows'] for part in self._previous) + sum(part['rows'] for part in self._closed)
+                + sum(part.rows for part in self._open.values()))
+
+    def _next_part(self, key):
+        part_dir = self.table_dir if self.partition_by is None else os.path.join(self.table_dir,
+                                                                                  f'{self.partition_by}={key}')
+        make_output_dir(part_dir)
+        part_no = self._last_part_no.get(key, 0) + 1
+        self._last_part_no[key] = part_no
+        return _OpenPart(key, os.path.join(part_dir, f'part-{part_no:04d}.csv'), self.headers, self._comment_row)
+
+    def _write_group(self, key, rows, part):
+        """把一个分区的数据行写入其打开的文件, 写满时滚动, 返回 (写满关闭的分区条目, 仍打开的文件)"""
+        closed = []
+        start = 0
+        while start < len(rows):
+            if part is None:
+                part = self._next_part(key)
+            step = min(len(rows) - start, self.max_rows_per_file - part.rows)
+            write_rows(part.f, rows[start:start + step], self.headers)
+            part.rows += step
+            start += step
+            if part.rows >= self.max_rows_per_file:
+                closed.append(part.close(self.table_dir))
+                part = None
+        return closed, part
+
+    def write(self, data):
+        """写入一批数据行, 按分区键分组后并行写入各分区的文件"""
+        groups = {}
+        for row in data:
+            groups.setdefault(self._key_func(row), []).append(row)
+        # 新分区的文件在主线程中按分区键顺序创建, 编号与并行写入的先后无关
+        for key in sorted(groups):
+            if key not in self._open:
+                self._open[key] = self._next_part(key)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(lambda key: self._write_group(key, groups[key], self._open.pop(key)),
+                                        sorted(groups)))
+        for key, (closed, part) in zip(sorted(groups), results):
+            self._closed.extend(closed)
+            if part is not None:
+                self._open[key] = part
+
+    def commit(self):
+        """
+        把已写入的数据落盘
+
+        Returns:
+            进度 {'rows', 'partitions', 'open'}: 已写满关闭的分区条目, 以及各打开文件的
+            key/path/rows/bytes(续写时截断到的字节数), 可作为 resume 参数
+        """
+        opened = []
+        for key in sorted(self._open):
+            part = self._open[key]
+            opened.append({'key': key, 'path': os.path.relpath(part.filepath, self.table_dir).replace(os.sep, '/'),
+                           'rows': part.rows, 'bytes': part.commit()})
+        return {'rows': self.rows, 'partitions': list(self._closed), 'open': opened}
+
+    def close(self):
+        """关闭所有文件并写出manifest.json, 返回 manifest 字典"""
+        for key in sorted(self._open):
+            self._closed.append(self._open.pop(key).close(self.table_dir))
+        partitions = self._previous + sorted(self._closed, key=lambda part: (part['key'], _part_no(part['path'])))
+        manifest = {
+            'table': self.table_name,
+            'partition_by': self.partition_by,
+            'max_rows_per_file': self.max_rows_per_file,
+            'headers': self.headers,
+            'total_rows': sum(part['rows'] for part in partitions),
+            'partitions': partitions,
+        }
+        with open_hashed(os.path.join(self.table_dir, MANIFEST_NAME), encoding='utf-8') as (f, _):
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        print(f"已生成分区目录: {self.table_name}/, 分区文件数: {len(partitions)}, 记录数: {manifest['total_rows']}")
+        return manifest
+
+    def abort(self):
+        """出错时放弃所有未写完的文件"""
+        for part in self._open.values():
+            part.abort()
+        self._open = {}
+
+    def suspend(self):
+        """中断写入, 保留打开文件的临时文件供续写(未提交的内容在续写时丢弃)"""
+        for part in self._open.values():
+            part.suspend()
+        self._open = {}
+
+
+def write_csv_partitioned(filename, data, headers, comments, partition_by=None,
+                          meters=None, max_rows_per_file=None, max_workers=4, append=False):
+    """
+    分区写入CSV文件
+
+    输出目录结构(以按天分区为例):
+        OUTPUT_DIR/<表名>/day=2025-09-01/part-0001.csv
+        OUTPUT_DIR/<表名>/day=2025-09-01/part-0002.csv   (超过max_rows_per_file时滚动)
+        OUTPUT_DIR/<表名>/manifest.json
+
+    Args:
+        filename: 文件名(去掉.csv后作为分区目录名)
+        data: 数据列表
+        headers: 字段名列表
+        comments: 字段注释字典
+        partition_by: 分区方式, 见 PARTITION_MODES, None 表示只按行数滚动
+        meters: 电表登记表(MeterRegistry, 按台区分区时必需)
+        max_rows_per_file: 单个文件最大数据行数, None 表示不超过Excel单个工作表的上限(EXCEL_MAX_DATA_ROWS)
+        max_workers: 并行写入分区文件的线程数
+        append: 保留已有分区文件(读取已有的manifest.json), 新数据写入各分区后续编号的新文件并合并manifest
+
+    Returns:
+        manifest 字典
+    """
+    previous = []
+    table_dir = os.path.join(config.OUTPUT_DIR, os.path.splitext(filename)[0])
+    if append and os.path.exists(os.path.join(table_dir, MANIFEST_NAME)):
+        previous = load_manifest(table_dir)['partitions']
+    writer = PartitionedCsvWriter(filename, headers, comments, partition_by, meters, max_rows_per_file,
+                                  max_workers, previous)
+    try:
+        writer.write(data)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def load_manifest(table_dir):
+    """读取分区目录下的manifest.json"""
+    with open(os.path.join(table_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_partitions(table_dir, keys=None):
+    """
+    只读取指定分区的数据行(跳过每个文件的注释行)
+
+    Args:
+        table_dir: 分区目录(包含manifest.json)
+        keys: 需要读取的分区键集合, None 表示全部读取
+
+    Yields:
+        数据行字典
+    """
+    manifest = load_manifest(table_dir)
+    wanted = None if keys is None else set(keys)
+    for part in manifest['partitions']:
+        if wanted is not None and part['key'] not in wanted:
+            continue
+        with open(os.path.join(table_dir, part['path']), 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            next(reader, None)  # 跳过中文注释行
+            for row in reader:
+                yield row
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据表生成流水线
+声明每张表的生成函数及其依赖, 按依赖顺序只生成指定的表及其上游表
+
+设置 config.RANDOM_SEED 后, 基础输入和每张表在生成前按 (种子, 表编号) 单独播种,
+某张表是否重新生成不影响其他表的随机序列; 配置了 TABLE_CACHE_DIR 时未变化的表从缓存读取
+
+各表的ID由 id_allocator 按命名空间(基础输入 / 表编号)分配, 同一前缀不重复, 重新生成某张表不影响其他表的ID
+
+曲线表按 CURVE_CHUNK_ROWS 分块生成, 每块按 (种子, 表编号:块号) 单独播种, 中断后可从任意块继续
+"""
+
+import hashlib
+import json
+import random
+from collections import OrderedDict
+import config
+import id_allocator
+import table_cache
+from utils import generate_time_series, reset_run_clock
+from basic_data_generators import generate_district_and_meters, generate_table_1_3, generate_table_1_4
+from anomaly_generators import (generate_table_1_27, generate_table_1_29, generate_table_1_30,
+                                generate_table_1_31, generate_table_1_32, generate_table_1_33,
+                                generate_table_1_34, generate_table_ri_abnormal_meter,
+                                generate_table_ri_unsuccessful_meter)
+from curve_generators import generate_table_1_15, generate_table_1_16
+from anomaly_index import AnomalyIndex
+from anomaly_timeline import AnomalyTimeline
+from meter_registry import MeterRegistry
+from table_schemas import SCHEMAS
+
+# 生成逻辑的全局版本号, 修改公共辅助函数(如utils中的函数)后递增, 使全部缓存失效
+GENERATOR_VERSION = 2
+
+# 基础输入(时间序列、台区、电表)读取的配置项
+INPUT_CONFIG = ('START_DATE', 'END_DATE', 'INTERVAL_MINUTES', 'NUM_DISTRICTS', 'NUM_SUB_METERS',
+                'SUPPLY_ORG_NUMBERS')
+
+# 所有表都读取的配置项
+COMMON_CONFIG = ('UNIFIED_SUPPLY_ORG_NO',)
+
+# 主数据表(与时间范围无关), 增量生成时沿用已有文件, 其余表只生成新的时间范围
+MASTER_TABLES = ('1_3', '1_4', '1_31')
+
+# 每张表: 标题、依赖的上游表、生成函数(用于计算缓存版本)、额外读取的配置项、
+# 是否分块生成、生成过程(参数为基础输入和已生成的表, 分块生成时为该块的时间序列和电表)
+# 顺序即生成顺序, 每张表的上游表都排在它前面
+TABLE_SPECS = OrderedDict([
+    ('1_3', {
+        'title': '表1: MK_1_3运行电能表',
+        'deps': [],
+        'generator': generate_table_1_3,
+        'build': lambda inputs, tables: generate_table_1_3(inputs['meters']),
+    }),
+    ('1_4', {
+        'title': '表2: MK_1_4_运行计量自动化终端',
+        'deps': [],
+        'generator': generate_table_1_4,
+        'build': lambda inputs, tables: generate_table_1_4(inputs['districts']),
+    }),
+    ('1_31', {
+        'title': '表6: MK_1_31_硬件状态',
+        'deps': ['1_4'],
+        'generator': generate_table_1_31,
+        'build': lambda inputs, tables: generate_table_1_31(
+            inputs['districts'], tables['1_4'], inputs['meters']),
+    }),
+    ('1_27', {
+        'title': '表3: MK_1_27历史故障清单',
+        'deps': ['1_4', '1_31'],
+        'generator': generate_table_1_27,
+        'build': lambda inputs, tables: generate_table_1_27(
+            inputs['time_series'], inputs['meters'], tables['1_4'], tables['1_31']),
+    }),
+    ('1_29', {
+        'title': '表4: MK_1_29_历史运维日志清单',
+        'deps': ['1_4'],
+        'generator': generate_table_1_29,
+        'build': lambda inputs, tables: generate_table_1_29(
+            inputs['time_series'], inputs['meters'], tables['1_4']),
+    }),
+    ('1_32', {
+        'title': '表7: MK_1_32_数据异常清单',
+        'deps': [],
+        'generator': generate_table_1_32,
+        'config': ['ANOMALY_TYPES'],
+        'build': lambda inputs, tables: generate_table_1_32(inputs['time_series']),
+    }),
+    ('1_30', {
+        'title': '表5: MK_1_30_风险等级清单',
+        'deps': ['1_4', '1_31'],
+        'generator': generate_table_1_30,
+        'build': lambda inputs, tables: generate_table_1_30(
+            inputs['time_series'], inputs['meters'], inputs['districts'], tables['1_4'], tables['1_31']),
+    }),
+    ('1_33', {
+        'title': '表8: MK_1_33计算异常清单',
+        'deps': [],
+        'generator': generate_table_1_33,
+        'build': lambda inputs, tables: generate_table_1_33(inputs['time_series']),
+    }),
+    ('1_34', {
+        'title': '表9: MK_1_34_状态异常清单终端',
+        'deps': ['1_4'],
+        'generator': generate_table_1_34,
+        'build': lambda inputs, tables: generate_table_1_34(inputs['time_series'], tables['1_4']),
+    }),
+    ('1_35', {
+        'title': '表10: MK_1_35_状态异常清单电能表',
+        'deps': ['1_3', '1_32'],
+        'generator': generate_table_ri_abnormal_meter,
+        'build': lambda inputs, tables: generate_table_ri_abnormal_meter(
+            inputs['time_series'], inputs['meters'], anomaly_index(inputs, tables), tables['1_3']),
+    }),
+    ('1_36', {
+        'title': '表11: MK_1_36_抄表不成功清单',
+        'deps': ['1_3', '1_4', '1_32'],
+        'generator': generate_table_ri_unsuccessful_meter,
+        'build': lambda inputs, tables: generate_table_ri_unsuccessful_meter(
+            inputs['time_series'], inputs['meters'], anomaly_index(inputs, tables), tables['1_3'], tables['1_4']),
+    }),
+    ('1_15', {
+        'title': '表12: MK_1_15_运行电能表功率曲线',
+        'deps': ['1_32'],
+        'generator': generate_table_1_15,
+        'config': ['CURVE_ORDER', 'CURVE_CHUNK_ROWS', 'ANOMALY_DURATION_STEPS', 'ANOMALY_SCOPE_WEIGHTS'],
+        'chunked': True,
+        'build': lambda inputs, tables: generate_table_1_15(
+            inputs['time_series'], inputs['meters'], anomaly_timeline(inputs, tables), order=config.CURVE_ORDER),
+    }),
+    ('1_16', {
+        'title': '表13: MK_1_16_运行电能表电压电流曲线',
+        'deps': ['1_32'],
+        'generator': generate_table_1_16,
+        'config': ['CURVE_ORDER', 'CURVE_CHUNK_ROWS', 'ANOMALY_DURATION_STEPS', 'ANOMALY_SCOPE_WEIGHTS'],
+        'chunked': True,
+        'build': lambda inputs, tables: generate_table_1_16(
+            inputs['time_series'], inputs['meters'], anomaly_timeline(inputs, tables), order=config.CURVE_ORDER),
+    }),
+])
+
+
+# 最近一次构建的数据异常索引: (MK_1_32数据列表, AnomalyIndex)
+_anomaly_index = (None, None)
+
+
+def anomaly_index(inputs, tables):
+    """
+    由 tables['1_32'] 和时间序列构建数据异常索引, 1_35/1_36 共用同一个索引
+    """
+    global _anomaly_index
+    records, index = _anomaly_index
+    if records is not tables['1_32']:
+        index = AnomalyIndex(tables['1_32'], inputs['time_series'])
+        _anomaly_index = (tables['1_32'], index)
+    return index
+
+
+# 最近一次构建的数据异常时间线: ((MK_1_32数据列表, 电表登记表, 相关配置), AnomalyTimeline)
+_anomaly_timeline = (None, None)
+
+
+def anomaly_timeline(inputs, tables):
+    """
+    由 tables['1_32'] 和完整的电表登记表构建数据异常时间线, 1_15/1_16(含曲线表的每一块)共用
+
+    分块生成时 inputs 为该块的输入, 完整的电表登记表为 inputs['all_meters']
+    """
+    global _anomaly_timeline
+    meters = inputs.get('all_meters', inputs['meters'])
+    settings = (config.RANDOM_SEED, config.INTERVAL_MINUTES, repr(config.ANOMALY_DURATION_STEPS),
+                repr(config.ANOMALY_SCOPE_WEIGHTS))
+    key, timeline = _anomaly_timeline
+    if key is None or key[0] is not tables['1_32'] or key[1] is not meters or key[2] != settings:
+        timeline = AnomalyTimeline.from_records(tables['1_32'], meters)
+        _anomaly_timeline = ((tables['1_32'], meters, settings), timeline)
+    return timeline
+
+
+def release_memos(key):
+    """释放由该表构建的共用对象(数据异常索引和时间线引用了 1_32 的数据行)"""
+    global _anomaly_index, _anomaly_timeline
+    if key == '1_32':
+        _anomaly_index = (None, None)
+        _anomaly_timeline = (None, None)
+
+
+class TableLifecycle:
+    """
+    表的生命周期: 跟踪本次运行中每张表还有哪些下游表未完成, 最后一个下游表完成后即释放
+
+    表完成(已写出)时调用 finished, 该表本身没有待完成的下游表时立即释放, 其上游表的最后一个下游表
+    完成时释放上游表; 释放即从登记的各个表字典(track)中移除, 之后只保留已写出文件的行数等信息,
+    全量生成的内存峰值由最大的单张表(及其上游表)决定, 而不是所有表之和
+
+    Args:
+        keys: 本次运行涉及的全部表编号(含上游表)
+    """
+
+    def __init__(self, keys):
+        keys = list(keys)
+        self.waiting = {key: {consumer for consumer in keys if key in TABLE_SPECS[consumer]['deps']}
+                        for key in keys}
+        self.done = set()
+        self._tables = []
+
+    def track(self, tables):
+        """登记表字典(表编号 -> 数据列表), 释放的表从中移除; 返回该字典"""
+        self._tables.append(tables)
+        return tables
+
+    def needed(self, key):
+        """表是否仍需保留: 本身未完成, 或还有下游表未完成"""
+        return key not in self.done or bool(self.waiting.get(key))
+
+    def finished(self, key):
+        """标记表已完成, 返回本次释放的表编号"""
+        self.done.add(key)
+        deps = TABLE_SPECS[key]['deps']
+        for dep in deps:
+            self.waiting.get(dep, set()).discard(key)
+        released = [candidate for candidate in (key, *deps)
+                    if candidate in self.waiting and not self.needed(candidate)]
+        for candidate in released:
+            for tables in self._tables:
+                tables.pop(candidate, None)
+            release_memos(candidate)
+        return released
+
+
+def seed_random(name):
+    """设置了 RANDOM_SEED 时按 (种子, 名称) 播种全局随机数生成器"""
+    if config.RANDOM_SEED is not None:
+        random.seed(f"{config.RANDOM_SEED}:{name}")
+
+
+def table_config_names(key):
+    """表读取的全部配置项"""
+    return COMMON_CONFIG + tuple(TABLE_SPECS[key].get('config', ()))
+
+
+def build_inputs(master=None):
+    """
+    生成所有表共用的基础输入: 时间序列、台区、电表
+
+    Args:
+        master: 已有的台区和电表 {'districts', 'meters'}(增量生成时沿用), None 表示重新生成
+    """
+    reset_run_clock()
+    seed_random('inputs')
+    id_allocator.begin('inputs')
+    time_series = generate_time_series()
+    if master is None:
+        districts, meters = generate_district_and_meters()
+    else:
+        districts = master['districts']
+        meters = MeterRegistry.from_records(districts, master['meters'])
+    inputs = {'time_series': time_series, 'districts': districts, 'meters': meters}
+    if table_cache.cache_enabled():
+        version = ':'.join(table_cache.source_version(func, GENERATOR_VERSION)
+                           for func in (generate_time_series, generate_district_and_meters))
+        upstream = {}
+        if master is not None:
+            text = json.dumps(master, ensure_ascii=False, sort_keys=True)
+            upstream['master'] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        inputs['cache_key'] = table_cache.make_key('inputs', version, INPUT_CONFIG, upstream)
+    return inputs
+
+
+def resolve_tables(targets=None):
+    """
+    计算生成目标表所需的全部表(目标表及其所有上游表), 按生成顺序返回
+
+    Args:
+        targets: 目标表编号列表, None 表示全部表
+    """
+    if targets is None:
+        return list(TABLE_SPECS)
+    unknown = [key for key in targets if key not in TABLE_SPECS]
+    if unknown:
+        raise KeyError(f"未知的表编号: {unknown}, 可选: {list(TABLE_SPECS)}")
+
+    needed = set()
+    pending = list(targets)
+    while pending:
+        key = pending.pop()
+        if key not in needed:
+            needed.add(key)
+            pending.extend(TABLE_SPECS[key]['deps'])
+    return [key for key in TABLE_SPECS if key in needed]
+
+
+def curve_chunks(inputs):
+    """
+    把曲线表的(时间点 x 电表)划分为约 CURVE_CHUNK_ROWS 行的块, 块的先后顺序即输出顺序
+
+    时间优先输出时按时间点切分, 电表优先输出时按 RUN_METER_ID 排序后的电表切分
+
+    Returns:
+        [(时间序列, 电表列表), ...]
+    """
+    time_series, meters = inputs['time_series'], inputs['meters']
+    if config.CURVE_ORDER == 'meter':
+        meters = meters.sorted_by_id()
+        step = max(1, config.CURVE_CHUNK_ROWS // max(len(time_series), 1))
+        return [(time_series, meters[i:i + step]) for i in range(0, len(meters), step)]
+    step = max(1, config.CURVE_CHUNK_ROWS // max(len(meters), 1))
+    return [(time_series[i:i + step], meters) for i in range(0, len(time_series), step)]
+
+
+def checked_rows(key, rows):
+    """核对生成函数输出的字段与 table_schemas 中的表结构一致(只看第一行), 返回原数据"""
+    if rows:
+        SCHEMAS[key].check_fields(rows[0].keys())
+    return rows
+
+
+def iter_table_chunks(key, inputs, tables, start=0, data=None):
+    """
+    逐块生成分块表(曲线表)
+
+    Args:
+        start: 起始块号, 中断后继续生成时跳过已完成的块
+        data: 已生成的整表数据(如来自缓存), 给出时按相同的分块切分而不重新生成
+
+    Yields:
+        (块号, 数据列表)
+    """
+    position = 0
+    for chunk_no, (time_series, meters) in enumerate(curve_chunks(inputs)):
+        rows = len(time_series) * len(meters)
+        if chunk_no >= start:
+            if data is not None:
+                yield chunk_no, data[position:position + rows]
+            else:
+                seed_random(f"{key}:{chunk_no}")
+                chunk_inputs = {**inputs, 'time_series': time_series, 'meters': meters,
+                                'all_meters': inputs['meters']}
+                yield chunk_no, checked_rows(key, TABLE_SPECS[key]['build'](chunk_inputs, tables))
+        position += rows
+
+
+def build_table(key, inputs, tables):
+    """生成单张表, tables 中需已包含它的上游表"""
+    if TABLE_SPECS[key].get('chunked'):
+        return [row for _, chunk in iter_table_chunks(key, inputs, tables) for row in chunk]
+    seed_random(key)
+    id_allocator.begin(key)
+    return checked_rows(key, TABLE_SPECS[key]['build'](inputs, tables))
+
+
+def iter_tables(targets=None, inputs=None, preloaded=None, lifecycle=None):
+    """
+    按生成顺序逐表生成目标表及其上游表, 启用缓存时未变化的表直接读取缓存
+
+    Args:
+        targets: 目标表编号列表, None 表示全部表
+        inputs: 基础输入, None 表示重新生成
+        preloaded: 已有的表(表编号 -> 数据列表), 作为上游表使用, 不重新生成也不输出
+        lifecycle: TableLifecycle, 给出时每张表交给调用方处理完(恢复迭代)后标记为已完成,
+                   不再需要的表随即释放; None 表示保留全部表直到迭代结束
+
+    Yields:
+        (表编号, 数据列表, 是否来自缓存)
+    """
+    inputs = inputs or build_inputs()
+    use_cache = table_cache.cache_enabled()
+    tables = dict(preloaded or {})
+    if lifecycle is not None:
+        lifecycle.track(tables)
+    digests = {key: table_cache.content_digest(data) for key, data in tables.items()} if use_cache else {}
+    for key in resolve_tables(targets):
+        if key in tables:
+            continue
+        if not use_cache:
+            tables[key] = build_table(key, inputs, tables)
+            hit = False
+        else:
+            hit = _load_or_build(key, inputs, tables, digests)
+        yield key, tables[key], hit
+        if lifecycle is not None:
+            lifecycle.finished(key)
+
+
+def _load_or_build(key, inputs, tables, digests):
+    """启用缓存时读取缓存, 未命中则生成并写入缓存; 结果放入 tables/digests, 返回是否命中"""
+    spec = TABLE_SPECS[key]
+    upstream = {dep: digests[dep] for dep in spec['deps']}
+    upstream['inputs'] = inputs['cache_key']
+    offsets = id_allocator.offsets(key)
+    if offsets:
+        upstream['ids'] = json.dumps(offsets, sort_keys=True)
+    cache_key = table_cache.make_key(key, table_cache.source_version(spec['generator'], GENERATOR_VERSION),
+                                     table_config_names(key), upstream)
+    cached = table_cache.load(cache_key)
+    used = table_cache.load_ids(cache_key) if cached is not None else None
+    if used is not None:
+        tables[key], digests[key] = cached
+        id_allocator.restore(used)
+        return True
+    tables[key] = build_table(key, inputs, tables)
+    digests[key] = table_cache.store(cache_key, tables[key])
+    table_cache.store_ids(cache_key, id_allocator.used(key))
+    return False
+
+
+def build_tables(targets=None, inputs=None):
+    """
+    生成目标表及其上游表
+
+    Returns:
+        (inputs, tables): 基础输入, 表编号 -> 数据列表
+    """
+    inputs = inputs or build_inputs()
+    tables = OrderedDict()
+    for key, data, _ in iter_tables(targets, inputs):
+        tables[key] = data
+    return inputs, tables
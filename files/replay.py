@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+曲线数据实时回放模块
+按 DATA_TIME 顺序把已生成的曲线表(MK_1_15/MK_1_16)数据行发送到TCP套接字、Unix套接字或标准输出,
+用于对流式接入程序做压测
+
+速度: 每个时间点的全部数据行作为一批发送, 相邻两批的发送间隔为 DATA_TIME 之差 / 加速倍数;
+--speed 1 为实时, --speed 100 为100倍速, --speed max 为不等待全速发送
+
+迟到/乱序: --late-fraction 指定迟到数据行的比例, 迟到行的 PREPOSITION_TIME 和 LOAD_TIME
+改为 DATA_TIME + 随机延迟(不超过 --max-delay 分钟), 并推迟到到达时间所在的批次发送
+
+输出格式(每行一条记录):
+    csv     表编号,原CSV数据行 (开头为每张表的 表编号,字段名 行)
+    ndjson  {"table": 表编号, 字段名: 值, ...}, 数值字段为JSON数字
+
+用法:
+    python replay.py outputs/electric_meter_data --speed 100 --tcp 127.0.0.1:9000
+    python replay.py outputs/electric_meter_data --speed max --format ndjson --late-fraction 0.01 > /dev/null
+"""
+
+import argparse
+import contextlib
+import csv
+import heapq
+import io
+import itertools
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from checksums import load_dataset_manifest
+from external_sort import external_sort_csv
+from table_schemas import COLUMN_DTYPES
+
+CURVE_TABLES = ('1_15', '1_16')
+FORMATS = ('csv', 'ndjson')
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _split(line):
+    """CSV数据行 -> 字段列表(曲线表不含引号, 走快速路径)"""
+    if '"' in line:
+        return next(csv.reader([line]))
+    return line.split(',')
+
+
+def _join(fields):
+    if any(',' in v or '"' in v for v in fields):
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator='').writerow(fields)
+        return buf.getvalue()
+    return ','.join(fields)
+
+
+def _time_groups(path, order):
+    """
+    按时间点分组读取单个文件
+
+    Args:
+        order: (表编号, 文件序号), 同一时间点按文件序号合并
+
+    Yields:
+        (DATA_TIME, 文件序号, 表编号, 字段名, 数据行列表)
+    """
+    key, file_no = order
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        headers = next(csv.reader([f.readline()]))
+        f.readline()  # 跳过中文注释行
+        pos = headers.index('DATA_TIME')
+
+        def data_time(line):
+            return _split(line)[pos] if '"' in line else line.split(',', pos + 1)[pos]
+
+        last = ''
+        lines = (line.rstrip('\r\n') for line in f)
+        for current, group in itertools.groupby(lines, key=data_time):
+            if current < last:
+                raise ValueError(f"文件未按DATA_TIME排序: {path}")
+            last = current
+            yield current, file_no, key, headers, list(group)
+
+
+def source_files(output_dir, tables=CURVE_TABLES):
+    """
+    从数据集清单中找出曲线表的全部文件(含分区文件和增量文件)
+
+    Returns:
+        ([(表编号, 文件路径), ...], 清单中的CURVE_ORDER)
+    """
+    manifest = load_dataset_manifest(output_dir)
+    files = [(entry['table'], os.path.join(output_dir, entry['path']))
+             for entry in manifest['files'] if entry['table'] in tables]
+    if not files:
+        raise ValueError(f"输出目录中没有曲线表文件: {output_dir}")
+    return files, manifest['config'].get('CURVE_ORDER', 'time')
+
+
+def iter_batches(files):
+    """
+    按 DATA_TIME 顺序合并各文件(各文件需已按时间排序, 见time_ordered_files), 每个时间点的全部数据行为一批
+
+    Yields:
+        (DATA_TIME, [(表编号, 字段名, 数据行列表), ...])
+    """
+    streams = [_time_groups(path, (key, file_no)) for file_no, (key, path) in enumerate(files)]
+    batch_time, batch = None, []
+    for data_time, _, key, headers, lines in heapq.merge(*streams, key=lambda group: group[:2]):
+        if data_time != batch_time and batch:
+            yield batch_time, batch
+            batch = []
+        batch_time = data_time
+        batch.append((key, headers, lines))
+    if batch:
+        yield batch_time, batch
+
+
+def time_ordered_files(files, order, tmp_dir):
+    """电表优先输出(CURVE_ORDER='meter')时把各文件按 (DATA_TIME, RUN_METER_ID) 外部排序到临时目录"""
+    if order != 'meter':
+        return files
+    sorted_files = []
+    for file_no, (key, path) in enumerate(files):
+        dst = os.path.join(tmp_dir, f'{file_no:04d}.csv')
+        with contextlib.redirect_stdout(sys.stderr):  # 标准输出用于回放数据
+            external_sort_csv(path, dst, ('DATA_TIME', 'RUN_METER_ID'), tmp_dir=tmp_dir)
+        sorted_files.append((key, dst))
+    return sorted_files
+
+
+class Encoder:
+    """把一张表的数据行编码为输出格式, 可选修改 PREPOSITION_TIME/LOAD_TIME"""
+
+    def __init__(self, key, headers, fmt):
+        self.key = key
+        self.headers = headers
+        self.fmt = fmt
+        self.load_pos = headers.index('LOAD_TIME') if 'LOAD_TIME' in headers else None
+        self.preposition_pos = headers.index('PREPOSITION_TIME') if 'PREPOSITION_TIME' in headers else None
+        dtypes = COLUMN_DTYPES.get(key, {})
+        self.numeric = [dtypes.get(h) in ('float', 'int') for h in headers]
+        self.numeric_pos = [i for i, num in enumerate(self.numeric) if num]
+        # 快速路径模板: 数值字段不加引号, 字符串字段加引号(不含需要转义的字符时)
+        parts = [json.dumps(h, ensure_ascii=False) + (':%s' if num else ':"%s"')
+                 for h, num in zip(headers, self.numeric)]
+        self.template = '{"table":%s,' % json.dumps(key) + ','.join(parts) + '}\n'
+        self.prefix = key + ','
+
+    def header(self):
+        """CSV格式开头的字段名行"""
+        return self.prefix + _join(self.headers) + '\n' if self.fmt == 'csv' else ''
+
+    def encode(self, line, arrival=None):
+        """
+        编码一行
+
+        Args:
+            line: 原CSV数据行
+            arrival: 迟到行的到达时间, 替换 PREPOSITION_TIME 和 LOAD_TIME
+        """
+        if arrival is None and self.fmt == 'csv':
+            return self.prefix + line + '\n'
+        fields = _split(line)
+        if arrival is not None:
+            if self.load_pos is not None:
+                fields[self.load_pos] = arrival
+            if self.preposition_pos is not None:
+                fields[self.preposition_pos] = arrival
+        if self.fmt == 'csv':
+            return self.prefix + _join(fields) + '\n'
+        if '"' in line or '\\' in line or ('' in fields and any(not fields[i] for i in self.numeric_pos)):
+            record = {'table': self.key}
+            for h, num, v in zip(self.headers, self.numeric, fields):
+                record[h] = (json.loads(v) if v else None) if num else v
+            return json.dumps(record, ensure_ascii=False) + '\n'
+        return self.template % tuple(fields)
+
+
+def open_sink(tcp=None, unix=None):
+    """
+    打开输出目标
+
+    Returns:
+        (写入函数, 关闭函数)
+    """
+    if tcp:
+        host, _, port = tcp.rpartition(':')
+        sock = socket.create_connection((host or '127.0.0.1', int(port)))
+        return sock.sendall, sock.close
+    if unix:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(unix)
+        return sock.sendall, sock.close
+    out = sys.stdout.buffer
+
+    def write(data):
+        out.write(data)
+        out.flush()
+    return write, lambda: None
+
+
+def replay(output_dir, write, tables=CURVE_TABLES, speed=None, fmt='csv', late_fraction=0.0, max_delay=60,
+           seed=None, report_seconds=5.0, log=sys.stderr):
+    """
+    回放曲线表数据
+
+    Args:
+        output_dir: 生成程序的输出目录(含manifest.json)
+        write: 写入字节的函数
+        speed: 加速倍数, None 表示全速发送
+        fmt: 'csv' / 'ndjson'
+        late_fraction: 迟到数据行的比例
+        max_delay: 迟到数据行的最大延迟(分钟)
+        seed: 迟到数据的随机种子
+        report_seconds: 输出进度的间隔(秒), 0 表示只在结束时输出
+
+    Returns:
+        统计 {'rows', 'late_rows', 'bytes', 'seconds', 'rows_per_second', 'max_lag_seconds'}
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}, 可选: {FORMATS}")
+    files, order = source_files(output_dir, tables)
+    rng = random.Random(seed)
+    max_delay_seconds = max(int(max_delay * 60), 1)
+
+    encoders = {}
+    pending = []  # 迟到行: (到达时间, 序号, 编码后的行)
+    seq = itertools.count()
+    stats = {'rows': 0, 'late_rows': 0, 'bytes': 0, 'max_lag_seconds': 0.0}
+    first_time = None
+
+    def report(final=False):
+        elapsed = time.perf_counter() - started
+        rate = stats['rows'] / elapsed if elapsed > 0 else 0.0
+        label = '回放完成' if final else '回放中'
+        print(f"{label}: 已发送 {stats['rows']} 行 (迟到 {stats['late_rows']} 行), {stats['bytes'] / 1e6:.1f} MB, "
+              f"{elapsed:.1f} 秒, {rate:.0f} 行/秒, 最大滞后 {stats['max_lag_seconds']:.2f} 秒",
+              file=log, flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = time_ordered_files(files, order, tmp_dir)
+        started = last_report = time.perf_counter()
+        for data_time, batch in iter_batches(files):
+            current = datetime.strptime(data_time, _TIME_FORMAT)
+            if first_time is None:
+                first_time = current
+            if speed:
+                due = started + (current - first_time).total_seconds() / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    stats['max_lag_seconds'] = max(stats['max_lag_seconds'], -delay)
+
+            out = []
+            for key, headers, lines in batch:
+                encoder = encoders.get(key)
+                if encoder is None:
+                    encoder = encoders[key] = Encoder(key, headers, fmt)
+                    out.append(encoder.header())
+                if late_fraction <= 0:
+                    out.extend(encoder.encode(line) for line in lines)
+                    continue
+                for line in lines:
+                    if rng.random() < late_fraction:
+                        arrival = (current + timedelta(seconds=rng.randint(1, max_delay_seconds))).strftime(_TIME_FORMAT)
+                        heapq.heappush(pending, (arrival, next(seq), encoder.encode(line, arrival)))
+                        stats['late_rows'] += 1
+                    else:
+                        out.append(encoder.encode(line))
+            # 到达时间不晚于当前时间点的迟到行随本批发送
+            while pending and pending[0][0] <= data_time:
+                out.append(heapq.heappop(pending)[2])
+            stats['rows'] += sum(len(lines) for _, _, lines in batch)
+            data = ''.join(out).encode('utf-8')
+            write(data)
+            stats['bytes'] += len(data)
+
+            now = time.perf_counter()
+            if report_seconds and now - last_report >= report_seconds:
+                last_report = now
+                report()
+
+        if pending:
+            data = ''.join(item[2] for item in sorted(pending)).encode('utf-8')
+            write(data)
+            stats['bytes'] += len(data)
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    report(final=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按DATA_TIME顺序实时回放曲线表数据')
+    parser.add_argument('output_dir', help='生成程序的输出目录(含manifest.json)')
+    parser.add_argument('--tables', nargs='+', default=list(CURVE_TABLES), choices=CURVE_TABLES,
+                        help='回放的曲线表, 默认 1_15 1_16')
+    parser.add_argument('--speed', default='max',
+                        help="加速倍数: 1 为实时, 100 为100倍速, max 为全速(默认)")
+    parser.add_argument('--format', default='csv', choices=FORMATS, help='输出格式, 默认csv')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--tcp', metavar='HOST:PORT', help='发送到TCP服务')
+    target.add_argument('--unix', metavar='PATH', help='发送到Unix套接字')
+    parser.add_argument('--late-fraction', type=float, default=0.0, help='迟到数据行的比例, 如 0.01')
+    parser.add_argument('--max-delay', type=float, default=60, help='迟到数据行的最大延迟(分钟), 默认60')
+    parser.add_argument('--seed', help='迟到数据的随机种子')
+    parser.add_argument('--report-seconds', type=float, default=5.0, help='输出进度的间隔(秒), 默认5')
+    args = parser.parse_args()
+
+    if args.speed == 'max':
+        speed = None
+    else:
+        try:
+            speed = float(args.speed)
+        except ValueError:
+            parser.error(f"--speed 应为正数或 max: {args.speed}")
+        if speed <= 0:
+            parser.error(f"--speed 应为正数或 max: {args.speed}")
+    if not 0 <= args.late_fraction <= 1:
+        parser.error("--late-fraction 应在 0 到 1 之间")
+
+    write, close = open_sink(args.tcp, args.unix)
+    try:
+        replay(args.output_dir, write, args.tables, speed, args.format, late_fraction=args.late_fraction,
+               max_delay=args.max_delay, seed=args.seed, report_seconds=args.report_seconds)
+    except BrokenPipeError:
+        print("接收端已关闭连接, 停止回放", file=sys.stderr)
+    finally:
+        close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定长记录模块
+事件类表(1_27/1_29/1_30/1_31/1_35/1_36)的数据行按表结构定义为记录类型(namedtuple), 不再使用行字典;
+字段及顺序取自 table_schemas 中的表结构声明
+
+记录就是按字段顺序排列的元组, 不保存字段名: 60多个字段的1_27每行约520字节, 行字典约1.6KB;
+写CSV时字段顺序与表头一致, 直接按元组写出(write_rows)
+
+为兼容按字段名读取的代码(分区、切片、旁路索引、数据服务等), 记录同时支持 row['字段名']、row.get、
+keys/items; 记录不可修改, 需要修改时用 row._replace(字段名=值) 得到新记录
+"""
+
+import csv
+import gc
+from collections import namedtuple
+from itertools import repeat
+from table_schemas import SCHEMAS
+
+
+class Record:
+    """记录类型的公共方法(与namedtuple组合使用, 见 record_type)"""
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = getattr(cls, '_fields', None)
+        if fields is not None:
+            cls.FIELDS = fields
+            cls._positions = {field: i for i, field in enumerate(fields)}
+            cls._keys = dict.fromkeys(fields).keys()
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            return tuple.__getitem__(self, self._positions[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        position = self._positions.get(key)
+        return default if position is None else tuple.__getitem__(self, position)
+
+    def keys(self):
+        """字段名(与 dict.keys() 一样支持集合运算)"""
+        return self._keys
+
+    def items(self):
+        return zip(self.FIELDS, self)
+
+    def to_dict(self):
+        return dict(zip(self.FIELDS, self))
+
+
+def record_type(name, fields):
+    """
+    定义记录类型
+
+    记录类型需赋值给所在模块的同名全局变量(pickle按 模块.名称 查找类型, 表缓存依赖于此)
+    """
+    return type(name, (Record, namedtuple(name, fields)), {'__slots__': ()})
+
+
+def is_record(row):
+    return isinstance(row, Record)
+
+
+def build_records(record_type, columns, n):
+    """
+    按列组装记录列表
+
+    Args:
+        columns: 各字段的值, 顺序与 record_type.FIELDS 一致; 每项为长度n的列表或单个常量(所有行相同)
+        n: 行数
+    """
+    if len(columns) != len(record_type.FIELDS):
+        raise ValueError(f"{record_type.__name__} 有 {len(record_type.FIELDS)} 个字段, 给出了 {len(columns)} 列")
+    rows = zip(*(value if isinstance(value, list) else repeat(value, n) for value in columns))
+    # 记录只含字符串等不可变值, 不会形成循环引用; 大批量创建时暂停垃圾回收(否则反复扫描已创建的记录, 耗时约5倍)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return list(map(tuple.__new__, repeat(record_type), rows))
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def write_rows(f, rows, headers):
+    """
+    把数据行写入已打开的CSV文件(已写出表头之后)
+
+    字段顺序与headers一致的记录直接按元组写出, 其他行(行字典)按字段名取值(与 csv.DictWriter 一致)
+    """
+    if rows and is_record(rows[0]) and list(rows[0].FIELDS) == list(headers):
+        csv.writer(f).writerows(rows)
+    else:
+        csv.DictWriter(f, fieldnames=headers).writerows(rows)
+
+
+# 表3: MK_1_27历史故障清单
+FaultRecord = record_type('FaultRecord', SCHEMAS['1_27'].headers)
+
+# 表4: MK_1_29_历史运维日志清单
+MaintenanceRecord = record_type('MaintenanceRecord', SCHEMAS['1_29'].headers)
+
+# 表5: MK_1_30_风险等级清单
+RiskRecord = record_type('RiskRecord', SCHEMAS['1_30'].headers)
+
+# 表6: MK_1_31_硬件状态
+HardwareRecord = record_type('HardwareRecord', SCHEMAS['1_31'].headers)
+
+# 表10: MK_1_35_状态异常清单电能表
+AbnormalMeterRecord = record_type('AbnormalMeterRecord', SCHEMAS['1_35'].headers)
+
+# 表11: MK_RI_UNSUCCESSFUL_METER
+UnsuccessfulReadRecord = record_type('UnsuccessfulReadRecord', SCHEMAS['1_36'].headers)
+
+# 表编号 -> 记录类型
+RECORD_TYPES = {
+    '1_27': FaultRecord,
+    '1_29': MaintenanceRecord,
+    '1_30': RiskRecord,
+    '1_31': HardwareRecord,
+    '1_35': AbnormalMeterRecord,
+    '1_36': UnsuccessfulReadRecord,
+}
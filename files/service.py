@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地数据服务
+常驻进程中保留基础输入(时间序列、台区、电表)和已生成的表, 通过HTTP流式返回整表或切片,
+测试用例无需每次启动生成程序、重新生成主数据; 重复的请求直接从内存返回
+
+接口(默认只监听 127.0.0.1):
+    GET /health                      服务状态
+    GET /tables                      各表编号、标题、是否已生成、行数
+    GET /meters                      电表标识列表(run_meter_id, ta_no, meter_type, supply_org_no)
+    GET /tables/<表编号>              表数据, 查询参数:
+        format    csv(默认, 字段名行 + 数据行) / ndjson(每行一个JSON对象) / arrow(Arrow IPC流, 需要安装polars)
+        district  台区编号, 可重复给出多个
+        meter     电表标识(RUN_METER_ID), 可重复给出多个
+        start/end 时间范围(闭区间), 格式 yyyy-mm-dd 或 'yyyy-mm-dd HH:MM[:SS]'
+    响应以分块传输编码(chunked)逐批发送; 各表按哪个字段筛选见 table_schemas.SLICE_COLUMNS
+
+用法:
+    python service.py --port 8765 --districts 2 --meters 22 --seed 7
+客户端见 service_client.py
+"""
+
+import argparse
+import bisect
+import csv
+import io
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import config
+from api import rows_to_columns
+from dataset_reader import to_output
+from main import add_scale_arguments, config_overrides
+from pipeline import MASTER_TABLES, TABLE_SPECS, build_inputs, iter_tables
+from table_schemas import COLUMN_DTYPES, SLICE_COLUMNS, TABLE_FILES, table_headers
+
+DEFAULT_PORT = 8765
+
+# 启动时预先生成的表: 主数据表和数据异常清单(多数表的上游)
+DEFAULT_PRELOAD = MASTER_TABLES + ('1_32',)
+
+# 每批编码发送的行数
+STREAM_BATCH_ROWS = 5000
+
+# 响应缓存: 单个响应不超过 RESPONSE_CACHE_ITEM_BYTES 时缓存, 总量超过 RESPONSE_CACHE_BYTES 时淘汰最久未用的
+RESPONSE_CACHE_BYTES = 64 * 1024 * 1024
+RESPONSE_CACHE_ITEM_BYTES = 8 * 1024 * 1024
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+def parse_time(text):
+    """查询参数中的时间 -> 与表中一致的 yyyy-mm-dd HH:MM:SS 字符串"""
+    try:
+        return datetime.fromisoformat(text).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise ValueError(f"时间格式错误: {text}, 应为 yyyy-mm-dd 或 'yyyy-mm-dd HH:MM[:SS]'") from None
+
+
+class TableStore:
+    """
+    常驻内存的基础输入和已生成的表
+
+    表在首次请求时生成(上游表一并生成并保留); 按字段取值和时间的行索引在首次筛选时建立
+    """
+
+    def __init__(self, preload=DEFAULT_PRELOAD):
+        self.inputs = build_inputs()
+        self.tables = {}
+        self._value_index = {}
+        self._time_index = {}
+        self._lock = threading.Lock()
+        for key in preload:
+            self.table(key)
+
+    def table(self, key):
+        """返回表数据, 尚未生成时生成"""
+        if key not in TABLE_SPECS:
+            raise KeyError(f"未知的表编号: {key}, 可选: {list(TABLE_SPECS)}")
+        with self._lock:
+            if key not in self.tables:
+                for name, data, _ in iter_tables([key], self.inputs, preloaded=self.tables):
+                    self.tables[name] = data
+        return self.tables[key]
+
+    def _rows_by_value(self, key, column):
+        """字段取值 -> 行号列表(升序)"""
+        with self._lock:
+            index = self._value_index.get((key, column))
+            if index is None:
+                index = {}
+                for row_no, row in enumerate(self.tables[key]):
+                    index.setdefault(row[column], []).append(row_no)
+                self._value_index[(key, column)] = index
+        return index
+
+    def _rows_by_time(self, key, column):
+        """(按时间排序的取值, 对应的行号); 表已按时间有序时行号为range"""
+        with self._lock:
+            index = self._time_index.get((key, column))
+            if index is None:
+                values = [row[column] for row in self.tables[key]]
+                if all(a <= b for a, b in zip(values, values[1:])):
+                    index = (values, range(len(values)))
+                else:
+                    order = sorted(range(len(values)), key=values.__getitem__)
+                    index = ([values[i] for i in order], order)
+                self._time_index[(key, column)] = index
+        return index
+
+    def select(self, key, districts=(), meters=(), start=None, end=None):
+        """
+        返回满足筛选条件的行号(按原有行顺序)
+
+        Args:
+            districts: 台区编号列表
+            meters: 电表标识列表
+            start/end: 时间范围(闭区间), yyyy-mm-dd HH:MM:SS 字符串
+        """
+        data = self.table(key)
+        columns = SLICE_COLUMNS[key]
+        if (districts or meters) and not (columns.get('meter') or columns.get('district')):
+            raise ValueError(f"表 {key} 不支持按台区/电表筛选")
+        if meters and not columns.get('meter'):
+            raise ValueError(f"表 {key} 不支持按电表筛选")
+        if (start or end) and not columns.get('time'):
+            raise ValueError(f"表 {key} 不支持按时间筛选")
+
+        rows = None
+        if districts or meters:
+            if columns.get('meter'):
+                wanted = set(meters)
+                registry = self.inputs['meters']
+                wanted.update(registry.run_meter_ids[i] for ta_no in districts
+                              for i in registry.positions_in_district(ta_no))
+                column = columns['meter']
+            else:
+                wanted, column = set(districts), columns['district']
+            index = self._rows_by_value(key, column)
+            rows = sorted(row_no for value in wanted for row_no in index.get(value, ()))
+
+        if start or end:
+            column = columns['time']
+            if rows is not None:
+                rows = [row_no for row_no in rows
+                        if (not start or data[row_no][column] >= start) and (not end or data[row_no][column] <= end)]
+            else:
+                values, order = self._rows_by_time(key, column)
+                lo = bisect.bisect_left(values, start) if start else 0
+                hi = bisect.bisect_right(values, end) if end else len(values)
+                rows = order[lo:hi] if isinstance(order, range) else sorted(order[lo:hi])
+        return range(len(data)) if rows is None else rows
+
+
+def encode_csv(headers, rows, header=False):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(headers)
+    writer.writerows([row.get(h) for h in headers] for row in rows)
+    return buf.getvalue().encode('utf-8')
+
+
+def encode_ndjson(headers, rows):
+    return ''.join(json.dumps({h: row.get(h) for h in headers}, ensure_ascii=False) + '\n'
+                   for row in rows).encode('utf-8')
+
+
+def encode_arrow(key, rows):
+    """编码为Arrow IPC流(需要安装polars)"""
+    frame = to_output(rows_to_columns(key, rows), COLUMN_DTYPES[key], 'polars')
+    buf = io.BytesIO()
+    frame.write_ipc_stream(buf)
+    return buf.getvalue()
+
+
+def iter_encoded(key, data, rows, fmt):
+    """按批编码选中的行"""
+    headers = table_headers(key)
+    if fmt == 'arrow':
+        yield encode_arrow(key, [data[i] for i in rows])
+        return
+    if fmt == 'csv':
+        yield encode_csv(headers, (), header=True)
+    for pos in range(0, len(rows), STREAM_BATCH_ROWS):
+        batch = [data[i] for i in rows[pos:pos + STREAM_BATCH_ROWS]]
+        yield encode_csv(headers, batch) if fmt == 'csv' else encode_ndjson(headers, batch)
+
+
+class ResponseCache:
+    """按请求缓存编码后的响应(LRU, 限制总字节数)"""
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, cache_key):
+        with self._lock:
+            parts = self._items.get(cache_key)
+            if parts is not None:
+                self._items.move_to_end(cache_key)
+            return parts
+
+    def put(self, cache_key, parts):
+        size = sum(len(part) for part in parts)
+        with self._lock:
+            if cache_key in self._items or size > self.max_bytes:
+                return
+            self._items[cache_key] = parts
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= sum(len(part) for part in evicted)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MeterDataService/1.0'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        if data:
+            self.wfile.write(b'%x\r\n%b\r\n' % (len(data), data))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        store = self.server.store
+        try:
+            if parts == ['health']:
+                return self._send_json(200, {'status': 'ok', 'tables': sorted(store.tables)})
+            if parts == ['meters']:
+                return self._send_json(200, store.inputs['meters'].to_records())
+            if parts == ['tables']:
+                return self._send_json(200, [
+                    {'table': key, 'title': spec['title'], 'file': TABLE_FILES[key],
+                     'built': key in store.tables, 'rows': len(store.tables.get(key, ()))}
+                    for key, spec in TABLE_SPECS.items()])
+            if len(parts) == 2 and parts[0] == 'tables':
+                return self._send_table(parts[1], parse_qs(url.query))
+            return self._send_json(404, {'error': f"未知的路径: {url.path}"})
+        except KeyError as e:
+            return self._send_json(404, {'error': e.args[0]})
+        except ValueError as e:
+            return self._send_json(400, {'error': str(e)})
+        except ImportError as e:
+            return self._send_json(501, {'error': str(e)})
+
+    def _send_table(self, key, query):
+        fmt = query.get('format', ['csv'])[-1]
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的格式: {fmt}, 可选: {list(FORMATS)}")
+        districts = tuple(sorted(set(query.get('district', []))))
+        meters = tuple(sorted(set(query.get('meter', []))))
+        start = parse_time(query['start'][-1]) if 'start' in query else None
+        end = parse_time(query['end'][-1]) if 'end' in query else None
+        cache_key = (key, fmt, districts, meters, start, end)
+
+        store = self.server.store
+        chunks = self.server.cache.get(cache_key)
+        if chunks is None:
+            data = store.table(key)
+            rows = store.select(key, districts, meters, start, end)
+            chunks = iter_encoded(key, data, rows, fmt)
+            if fmt == 'arrow':
+                chunks = list(chunks)  # 编码出错时还未发送响应头, 可返回错误
+        self.send_response(200)
+        self.send_header('Content-Type', FORMATS[fmt])
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        sent, size = [], 0
+        for chunk in chunks:
+            self._send_chunk(chunk)
+            if size <= RESPONSE_CACHE_ITEM_BYTES:
+                sent.append(chunk)
+                size += len(chunk)
+        self.wfile.write(b'0\r\n\r\n')
+        if size <= RESPONSE_CACHE_ITEM_BYTES:
+            self.server.cache.put(cache_key, sent)
+
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, preload=DEFAULT_PRELOAD, quiet=False):
+    """创建服务(生成预加载的表), 调用 serve_forever() 开始处理请求"""
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.store = TableStore(preload)
+    server.cache = ResponseCache()
+    server.quiet = quiet
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地数据服务: 常驻内存, 通过HTTP流式返回数据表')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址, 默认只监听本机')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'端口, 默认 {DEFAULT_PORT}')
+    parser.add_argument('--preload', nargs='*', metavar='表编号', default=list(DEFAULT_PRELOAD),
+                        help='启动时预先生成的表, 默认为主数据表和数据异常清单')
+    parser.add_argument('--quiet', action='store_true', help='不输出访问日志')
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    with config.override(**config_overrides(parser, args)):
+        server = make_server(args.host, args.port, args.preload, args.quiet)
+        print(f"数据服务已启动: http://{args.host}:{server.server_address[1]}, "
+              f"电表数: {len(server.store.inputs['meters'])}, 已生成: {', '.join(server.store.tables)}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
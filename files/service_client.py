@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地数据服务客户端(见 service.py), 仅依赖标准库
+
+用法:
+    from service_client import ServiceClient
+    client = ServiceClient('http://127.0.0.1:8765')
+    rows = list(client.iter_rows('1_15', meter='MTQ0001T12345678', start='2025-09-01', end='2025-09-01 06:00'))
+    client.download('1_35', 'MK_1_35.csv', district='TQ0001')
+    frame = client.read_arrow('1_3')  # polars.DataFrame, 需要安装polars
+"""
+
+import io
+import json
+from urllib.error import HTTPError
+from urllib.parse import quote, urlencode
+from urllib.request import urlopen
+
+DEFAULT_URL = 'http://127.0.0.1:8765'
+
+
+class ServiceClient:
+    """本地数据服务客户端, 筛选参数 district/meter 可以是单个值或列表, start/end 为时间字符串"""
+
+    def __init__(self, url=DEFAULT_URL, timeout=300):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _open(self, path, params=None):
+        query = urlencode({k: v for k, v in (params or {}).items() if v is not None}, doseq=True)
+        try:
+            return urlopen(f"{self.url}{path}{'?' + query if query else ''}", timeout=self.timeout)
+        except HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8'))['error']
+            except (ValueError, KeyError):
+                message = e.reason
+            raise OSError(f"数据服务请求失败({e.code}): {message}") from None
+
+    def _get_json(self, path):
+        with self._open(path) as response:
+            return json.load(response)
+
+    def health(self):
+        return self._get_json('/health')
+
+    def tables(self):
+        """各表编号、标题、是否已生成、行数"""
+        return self._get_json('/tables')
+
+    def meters(self):
+        """电表标识列表"""
+        return self._get_json('/meters')
+
+    def stream(self, table, format='csv', district=None, meter=None, start=None, end=None,
+               block_bytes=1 << 16):
+        """
+        逐块返回表数据的原始字节
+
+        Args:
+            format: 'csv' / 'ndjson' / 'arrow'
+        """
+        params = {'format': format, 'district': district, 'meter': meter, 'start': start, 'end': end}
+        with self._open(f"/tables/{quote(table)}", params) as response:
+            for block in iter(lambda: response.read(block_bytes), b''):
+                yield block
+
+    def iter_rows(self, table, **filters):
+        """逐行返回表数据(字段名 -> 值的字典, 数值字段为数字)"""
+        params = {'format': 'ndjson', **filters}
+        with self._open(f"/tables/{quote(table)}", params) as response:
+            for line in response:
+                yield json.loads(line)
+
+    def download(self, table, path, format='csv', **filters):
+        """把表数据保存到文件, 返回字节数"""
+        size = 0
+        with open(path, 'wb') as f:
+            for block in self.stream(table, format, **filters):
+                f.write(block)
+                size += len(block)
+        return size
+
+    def read_arrow(self, table, **filters):
+        """以Arrow格式读取为polars.DataFrame(需要安装polars)"""
+        try:
+            import polars
+        except ImportError:
+            raise ImportError("read_arrow 需要安装polars: pip install polars") from None
+        buf = io.BytesIO()
+        for block in self.stream(table, 'arrow', **filters):
+            buf.write(block)
+        buf.seek(0)
+        return polars.read_ipc_stream(buf)
+
+    def read_csv(self, table, **filters):
+        """读取CSV格式的表数据, 返回文本"""
+        return b''.join(self.stream(table, 'csv', **filters)).decode('utf-8')
+
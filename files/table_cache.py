@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表缓存模块
+按内容寻址缓存已生成的表, 缓存键为以下内容的SHA-256:
+    - 生成逻辑版本: pipeline.GENERATOR_VERSION + 生成函数所在模块及其(递归)导入的本程序模块的源码,
+      如 column_specs、batch_random、id_allocator 等辅助模块; config 除外, 其取值按表计入下一项
+    - 该表读取的配置项取值(见 pipeline.table_config_names)
+    - 随机种子和运行时钟(RANDOM_SEED / RUN_CLOCK)
+    - 基础输入(时间序列、台区、电表)的缓存键
+    - 各上游表的内容摘要
+    - 增量生成时该表ID计数器的起点(见 id_allocator)
+
+上游表内容不变时下游表的缓存键也不变, 修改某张表的生成规则只会重新生成该表及依赖它的下游表
+
+缓存文件: TABLE_CACHE_DIR/<键前2位>/<键>.pickle
+         TABLE_CACHE_DIR/<键前2位>/<键>.ids.json   生成该表时ID计数器已用到的位置, 命中缓存时恢复,
+                                                 保证数据集清单记录的已用位置与重新生成时一致
+"""
+
+import ast
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import config
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# 配置项的取值已按表计入缓存键, 修改配置文件(如输出目录)不应使全部缓存失效
+_UNVERSIONED_MODULES = frozenset({'config'})
+
+
+def cache_enabled():
+    """配置了缓存目录且输出可复现(固定时钟和随机种子)时启用缓存"""
+    return bool(config.TABLE_CACHE_DIR) and config.RUN_CLOCK is not None and config.RANDOM_SEED is not None
+
+
+def _config_value(name):
+    value = getattr(config, name)
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def make_key(name, version, config_names, upstream):
+    """
+    计算缓存键
+
+    Args:
+        name: 表编号(基础输入为'inputs')
+        version: 生成逻辑版本字符串
+        config_names: 该表读取的配置项名称
+        upstream: 上游名称 -> 缓存键或内容摘要
+    """
+    payload = {
+        'name': name,
+        'version': version,
+        'config': {n: _config_value(n) for n in sorted(config_names)},
+        'seed': config.RANDOM_SEED,
+        'clock': _config_value('RUN_CLOCK'),
+        'upstream': dict(sorted(upstream.items())),
+    }
+    text = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _package_imports(path):
+    """源码文件中导入的本程序模块名(含函数内的延迟导入)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module.split('.')[0])
+    return {name for name in names
+            if name not in _UNVERSIONED_MODULES and os.path.exists(os.path.join(_PACKAGE_DIR, name + '.py'))}
+
+
+@functools.lru_cache(maxsize=None)
+def _dependency_paths(path):
+    """源码文件及其递归导入的本程序模块的文件路径(按路径排序)"""
+    paths = {path}
+    pending = [path]
+    while pending:
+        for name in _package_imports(pending.pop()):
+            module_path = os.path.join(_PACKAGE_DIR, name + '.py')
+            if module_path not in paths:
+                paths.add(module_path)
+                pending.append(module_path)
+    return tuple(sorted(paths))
+
+
+def dependency_modules(func):
+    """生成函数依赖的本程序模块名(所在模块及其递归导入的模块, 不含config)"""
+    path = os.path.abspath(sys.modules[func.__module__].__file__)
+    return [os.path.splitext(os.path.basename(p))[0] for p in _dependency_paths(path)]
+
+
+def source_version(func, base_version):
+    """
+    生成函数的版本: 全局版本号 + 所在模块及其导入的本程序模块的源码摘要,
+    修改生成函数或它用到的辅助模块(列规则、批量随机数、ID分配等)即视为新版本
+    """
+    digest = hashlib.sha256()
+    for path in _dependency_paths(os.path.abspath(sys.modules[func.__module__].__file__)):
+        with open(path, 'rb') as f:
+            source = f.read()
+        digest.update(f"{os.path.basename(path)}:{len(source)}:".encode('utf-8'))
+        digest.update(source)
+    return f"{base_version}:{digest.hexdigest()[:16]}"
+
+
+def content_digest(data):
+    """表数据的内容摘要(与缓存文件内容的摘要一致)"""
+    return hashlib.sha256(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def _path(cache_key, suffix='.pickle'):
+    return os.path.join(config.TABLE_CACHE_DIR, cache_key[:2], cache_key + suffix)
+
+
+def _atomic_write(path, payload):
+    """先写临时文件再重命名, 中断时不会留下不完整的缓存"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load(cache_key):
+    """
+    读取缓存
+
+    Returns:
+        (数据, 内容摘要), 未命中时返回 None
+    """
+    path = _path(cache_key)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        payload = f.read()
+    return pickle.loads(payload), hashlib.sha256(payload).hexdigest()
+
+
+def store(cache_key, data):
+    """
+    写入缓存(先写临时文件再重命名, 中断时不会留下不完整的缓存)
+
+    Returns:
+        内容摘要
+    """
+    payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    _atomic_write(_path(cache_key), payload)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def load_ids(cache_key):
+    """读取缓存的表生成时ID计数器已用到的位置, 没有时返回 None"""
+    path = _path(cache_key, '.ids.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def store_ids(cache_key, counters):
+    """保存表生成时ID计数器已用到的位置(在 store 之后调用, 缺少时按未命中处理)"""
+    _atomic_write(_path(cache_key, '.ids.json'), json.dumps(counters, sort_keys=True).encode('utf-8'))
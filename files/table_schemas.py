@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据表结构模块
+每张表声明一次结构: 输出文件名, 以及按输出顺序排列的字段(字段名、中文注释、类型、小数位数、是否可为空),
+生成、写入、读取等模块共用同一份声明
+
+字段顺序即CSV的列顺序, 表头不再依赖数据的第一行, 空表也有完整的表头;
+流水线生成每张表(每块)后核对字段与声明一致(见 TableSchema.check_fields)
+"""
+
+from collections import OrderedDict, namedtuple
+
+# 字段类型: 'str'-字符串, 'float'-浮点数, 'int'-整数, 'datetime'-yyyy-mm-dd HH:MM:SS 时间
+STRING = 'str'
+FLOAT = 'float'
+INT = 'int'
+DATETIME = 'datetime'
+
+# 字段声明
+# precision: 浮点数生成时保留的小数位数, None 表示不限
+# nullable: 是否可为空(生成的值为None, 写出为空字符串)
+Column = namedtuple('Column', ('name', 'comment', 'dtype', 'precision', 'nullable'),
+                    defaults=(STRING, None, False))
+
+
+class TableSchema:
+    """
+    一张表的结构
+
+    Attributes:
+        key: 表编号
+        file: 输出文件名
+        columns: Column 元组, 顺序即输出顺序
+        headers: 字段名元组
+        comments: 字段名 -> 中文注释(写入CSV第二行)
+        dtypes: 字段名 -> 类型, 只含非字符串字段(读取时按此转换)
+    """
+
+    def __init__(self, key, file, columns):
+        self.key = key
+        self.file = file
+        self.columns = tuple(columns)
+        self.headers = tuple(column.name for column in self.columns)
+        if len(set(self.headers)) != len(self.headers):
+            raise ValueError(f"表 {key} 的字段重复")
+        self.comments = {column.name: column.comment for column in self.columns}
+        self.dtypes = {column.name: column.dtype for column in self.columns if column.dtype != STRING}
+        self._by_name = {column.name: column for column in self.columns}
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def check_fields(self, fields):
+        """核对生成的字段(行字典的键或记录类型的FIELDS)与声明的字段及顺序一致, 不一致时抛出ValueError"""
+        fields = tuple(fields)
+        if fields != self.headers:
+            missing = [name for name in self.headers if name not in fields]
+            unknown = [name for name in fields if name not in self._by_name]
+            raise ValueError(f"表 {self.key} 生成的字段与结构声明不一致: 缺少 {missing}, 未声明 {unknown}"
+                             + ('' if missing or unknown else ', 顺序不同'))
+
+
+def _registry(schemas):
+    return OrderedDict((schema.key, schema) for schema in schemas)
+
+
+# 表编号 -> 表结构(按main()中的生成顺序)
+SCHEMAS = _registry([
+    # 表1: MK_1_3运行电能表
+    TableSchema('1_3', 'MK_1_3运行电能表.csv', [
+        Column('RUN_METER_ID', '主键,运行电能表的唯一标识'),
+        Column('AREA_CODE', '用户所在的地区编码'),
+        Column('LT_CHK_DATE', '上次现场检验日期', DATETIME),
+        Column('MA_AUXIL_TABLE_SIGNS', '主副表标志'),
+        Column('PR_CODE', '产权归属'),
+        Column('MANU_FLAG', '是否是人工控制'),
+        Column('ED_BGN_TIME', '代扣开始时间', nullable=True),
+        Column('ED_RATIO', '代扣比例', nullable=True),
+        Column('ED_TYPE', '代扣类型', nullable=True),
+        Column('ED_END_TIME', '代扣结束时间', nullable=True),
+        Column('ED_AMT', '代扣金额', nullable=True),
+        Column('SUPPLY_ORG_CODE', '供电单位编码'),
+        Column('PF_THRESHHOLD', '停电阀值', FLOAT, precision=2),
+        Column('MADE_NO', '电能表出厂编号'),
+        Column('TIME_DIGIT_CODE', '分时位数'),
+        Column('CREATE_TIME', '数据创建时间', DATETIME),
+        Column('ARRIVE_BATCH', '到货批次号'),
+        Column('AGREE_TIP_PRC', '协议尖电价', FLOAT, precision=4),
+        Column('AGREE_PEAK_PRC', '协议峰电价', FLOAT, precision=4),
+        Column('AGREE_FLAT_PRC', '协议平电价', FLOAT, precision=4),
+        Column('AGREE_PRC', '协议电价', FLOAT, precision=4),
+        Column('AGREE_VALLEY_PRC', '协议谷电价', FLOAT, precision=4),
+        Column('PLANT_AREA', '面积', INT),
+        Column('OLD_READ_NO', '原抄表号', nullable=True),
+        Column('PARAM_ID', '参数标识'),
+        Column('REMARKS', '备注'),
+        Column('RP_NEED_AMT', '复电允许金额', FLOAT, precision=2),
+        Column('INSTALL_POSITION', '电能表安装的物理位置'),
+        Column('INSTALL_DATE', '安装日期', DATETIME),
+        Column('SWITCH_FLAG', '是否带开关'),
+        Column('READ_ORDER', '抄表顺序号', INT),
+        Column('OPERATED_TIME', '数据最近一次变更时间', DATETIME),
+        Column('DATA_PLAT_CHG_TIME', '数据资源管理平台变更时间', DATETIME),
+        Column('SUPER_CAPACIT_FLAG', '是否安装超级电容'),
+        Column('DIRECT_COLLECT_SEND_FLAG', '是否实现直采直送'),
+        Column('PREPAY_DEDUCT_FLAG', '本条记录是否开通预付费代扣'),
+        Column('BAUD_RATE', '电能表的波特率'),
+        Column('PHASE_CODE', '相位'),
+        Column('BOX_CABINET_POSITION_NO', '箱(柜)内位置号', INT),
+        Column('LAT', '纬度', FLOAT, precision=6),
+        Column('LNG', '经度', FLOAT, precision=6),
+        Column('TOTAL_FACTOR', '电能表综合倍率', FLOAT, precision=3),
+        Column('MARKET_PRJ_ID', '营销项目标识'),
+        Column('METER_DIGITS_CODE', '表码位数'),
+        Column('METER_BOX_CABINET_ID', '表箱(柜)设备唯一标识'),
+        Column('EQU_ID', '电能计量设备唯一标识'),
+        Column('EQU_MAIN_PERSON_ID', '设备运维主人标识'),
+        Column('CC_SWITCH_TYPE', '费控开关型号'),
+        Column('ASSETS_NO', '电能表资产编号(条形码)'),
+        Column('ROTATE_CYCLE', '轮换周期'),
+        Column('ROTATE_VAILD_DATE', '轮换有效日期', nullable=True),
+        Column('MAINTAIN_GROUP', '运维班组'),
+        Column('OPER_COMM_PROTOCOL', '运行通信协议'),
+        Column('OPER_COMM_MODE', '运行通信方式'),
+        Column('OVERDRAFT_FLAG', '是否允许透支标志'),
+        Column('OVERDRAFT_QUOTA', '透支限额', nullable=True),
+        Column('COMM_ADDR1', '通讯地址1'),
+        Column('COMM_ADDR2', '通讯地址2', nullable=True),
+        Column('COMM_MODE_CODE', '通讯方式'),
+        Column('COMM_PROTOCOL_CODE', '通讯规约'),
+        Column('AREA_SORT_CODE', '面积类型代码'),
+        Column('PRESET_AMT', '预置电费金额', FLOAT),
+        Column('WARN_THRESHOLD1', '预警阀值1', FLOAT, precision=2),
+        Column('WARN_THRESHOLD2', '预警阀值2', FLOAT, precision=2),
+        Column('WARN_THRESHOLD3', '预警阀值3', FLOAT, precision=2),
+    ]),
+    # 表2: MK_1_4_运行计量自动化终端
+    TableSchema('1_4', 'MK_1_4_运行计量自动化终端.csv', [
+        Column('RUN_TERM_ID', '运行计量自动化终端标识'),
+        Column('IP_ADDR', 'IP地址'),
+        Column('LT_CHK_DATE', '上次检验日期', DATETIME),
+        Column('UP_COMM_CODE', '上行通讯方式代码'),
+        Column('UP_PROTOCOL_CODE', '上行通讯规约代码'),
+        Column('UP_CHANNEL_1', '上行通道1'),
+        Column('UP_CHANNEL_2', '上行通道2'),
+        Column('DOWN_COMM_CODE', '下行通讯方式代码'),
+        Column('DOWN_PROTOCOL_CODE', '下行通讯规约代码'),
+        Column('MAIN_COMM_MODE', '主用通信方式'),
+        Column('MAIN_TERM_FLAG', '主终端标志'),
+        Column('MAIN_TERM_COMM_ADDR', '主终端通信地址'),
+        Column('SUPPLY_ORG_NO', '供电单位编码'),
+        Column('TIME_MP_FUNCTION_CODE', '分时计量功能代码'),
+        Column('CREATE_TIME', '创建时间', DATETIME),
+        Column('ARRIVE_BATCH', '到货批次'),
+        Column('PARAM_ID', '参数标识'),
+        Column('AREA_CODE', '地区编码'),
+        Column('SESERVE_COMM_MODE', '备用通信方式'),
+        Column('SAFE_INTER_MODE', '安全接入方式'),
+        Column('INSTALL_ADDR', '安装地址'),
+        Column('INSTALL_DATE', '安装日期', DATETIME),
+        Column('WIRE_MODE_CODE', '接线方式代码'),
+        Column('OPERATED_TIME', '数据最近一次变更时间', DATETIME),
+        Column('DATA_PLAT_CHG_TIME', '数据资源管理平台变更时间', DATETIME),
+        Column('IS_INSTALL_BRANCH_EQU', '是否安装分支设备'),
+        Column('FACTORY_ID', '厂家标识'),
+        Column('ELEC_CUST_NO', '用电客户号'),
+        Column('OFFLINE_FLAG', '离线标志'),
+        Column('BOX_CABINET_POSITION_NO', '箱(柜)内位置号'),
+        Column('LAT', '纬度', FLOAT, precision=6),
+        Column('TERM_USEAGE', '终端用途'),
+        Column('LNG', '经度', FLOAT, precision=6),
+        Column('TOTAL_FACTOR', '综合倍率', FLOAT, precision=3),
+        Column('MARKET_PRJ_ID', '营销项目标识'),
+        Column('MARKET_PRJ_NO', '营销项目编号'),
+        Column('METER_BOX_CABINET_ID', '表箱(柜)设备唯一标识'),
+        Column('METERING_POINT_NUMBER', '计量点编号'),
+        Column('EQU_ID', '电能计量设备唯一标识'),
+        Column('EQU_MODEL_CODE', '设备型号代码'),
+        Column('EQU_SORT_CODE', '设备类别代码'),
+        Column('EQU_TYPE_CODE', '设备类型代码'),
+        Column('EQU_MAIN_PERSON_ID', '设备运维主人标识'),
+        Column('ASSETS_NO', '资产编号'),
+        Column('CONVERTER1', '转换器1'),
+        Column('CONVERTER2', '转换器2'),
+        Column('ROTATE_CYCLE', '轮换周期'),
+        Column('MAINTAIN_GROUP', '运维班组'),
+        Column('RUN_UP_COMM_CODE', '运行上行通信代码'),
+        Column('RUN_DOWN_COMM_CODE', '运行下行通信代码'),
+        Column('COMM_ADDR', '通讯地址'),
+        # 以下字段在原输出中没有中文注释(注释行为空), 保持不变
+        Column('DOWN_COMM_CHANNEL', ''),
+        Column('METERING_POINT_NAME', ''),
+        Column('COMM_TYPE', ''),
+        Column('PROTOCOL_TYPE', ''),
+        Column('TERM_TYPE_CODE', ''),
+        Column('PRESET_AMT', '', FLOAT),
+        Column('REMARKS', ''),
+    ]),
+    # 表6: MK_1_31_硬件状态
+    TableSchema('1_31', 'MK_1_31_硬件状态.csv', [
+        Column('KEEPER_ID', 'SIM卡的当前持有人的唯一标识'),
+        Column('TA_NO', '台区编号'),
+        Column('TA_NAME', '台区名称'),
+        Column('TA_ADDR', '台区地址'),
+        Column('TA_TYPE', '台区类型'),
+        Column('EQU_ID', '电能计量设备唯一标识'),
+        Column('ASSETS_NO', '资产编号'),
+        Column('DEVICE_TYPE', '设备类型(终端/电能表)'),
+        Column('MANUFACTURER_NAME', '生产厂商名称'),
+        Column('COMM_PROTOCOL_CODE', '通讯规约'),
+        Column('COMM_INTERFACE_MODE_CODE', '通信接口方式'),
+        Column('LOCAL_INTERFACE', '本地接口状态'),
+        Column('CPU_RATE', 'CPU占用率'),
+        Column('MEMORY_RATE', '内存占用率'),
+        Column('SYSTEM_NUMBER', '系统版本号'),
+        Column('SYSTEM_ROOT', '系统ROOT'),
+        Column('IMPORTANT_DATA', '重要数据备份'),
+        Column('OPEN_PORT_LIST', '开启端口列表', nullable=True),
+        Column('NETWORK_COMMUNICATION_OBJECT', '网络通信对象', nullable=True),
+        Column('REAL_TIME_SENDING_RATE', '实时发送速率', nullable=True),
+        Column('REAL_TIME_RECEIVING_RAT', '实时接收速率', nullable=True),
+        Column('TCP_RUNOFF', 'TCP流量占比', nullable=True),
+        Column('UDP_PROPORTION', 'UDP流量占比', nullable=True),
+        Column('BISINESS_PROPORTION', '业务流量占比', nullable=True),
+        Column('DEDICACED_CHANNEL', '专用网络通道', nullable=True),
+        Column('DISABLE_CONNECTION', '禁用网络自连', nullable=True),
+    ]),
+    # 表3: MK_1_27历史故障清单
+    TableSchema('1_27', 'MK_1_27历史故障清单.csv', [
+        Column('DATA_TIME', '数据时间', DATETIME),
+        Column('SUPPLY_ORG_NO', '供电单位编码'),
+        Column('LOAD_TIME', '入库时间', DATETIME),
+        Column('CREATOR_ID', '创建人ID'),
+        Column('CREATE_TIME', '创建时间', DATETIME),
+        Column('MODIFIER_ID', '修改人ID'),
+        Column('UPDATE_TIME', '更新时间', DATETIME),
+        Column('DATA_FROM', '数据来源'),
+        Column('AREA_CODE', '地区编码'),
+        Column('TERMINAL_ID', '终端资产编码'),
+        Column('RUN_TERM_ID', '终端标识'),
+        Column('COMM_ADDR', '终端逻辑地址'),
+        Column('REASON_SWITCH', '换表原因'),
+        Column('MANUFACTURER_NAME', '生产厂家'),
+        Column('REASON_SWITCH_TIME', '换表日期', DATETIME),
+        Column('THE_BOX_RUST', '箱体锈蚀腐烂'),
+        Column('THE_DOOR_RUST', '箱门锈蚀腐烂'),
+        Column('THE_DOOR_LOCK', '门锁无法打开'),
+        Column('DOOR_LOCK_DAMAGED', '门锁损坏'),
+        Column('THE_INCOMING_DAMAGED', '进出线开关破损'),
+        Column('THE_INCOMING_BURN', '进出线开关烧毁'),
+        Column('TERMINAL_BLOCK_DAMAGED', '接线端子损坏'),
+        Column('TERMINAL_BLOCK_BURN', '接线端子烧毁'),
+        Column('WIRE_BURN', '导线烧毁'),
+        Column('DAMAGE_INSULATION', '导线绝缘破损'),
+        Column('CONNECTOR_OXIDATION', '接插件氧化'),
+        Column('CONNECTOR_DAMAGE', '接插件损坏'),
+        Column('SALT_MIST', '盐雾', FLOAT, precision=2),
+        Column('TEMPERATURE', '温度', FLOAT, precision=2),
+        Column('HUMIDITY', '湿度', FLOAT, precision=2),
+        Column('RUN_METER_ID', '运行电表标识'),
+        Column('ELECTRICITY_ID', '电表资产编码'),
+        Column('TERMINAL_STATUS', '终端运行状态'),
+        Column('WORD_ORDER_ID', '工单编号'),
+        Column('WORD_ORDER_CATEGORY', '工单类别'),
+        Column('DEVOPS_STATE', '运维状态'),
+        Column('DEVOPS_SCHEME', '运维方案'),
+        Column('METERING_POINT_STATE', '计量点运行状态'),
+        Column('RISK_TYPE', '风险类型'),
+        Column('RISK_GRADE', '风险等级'),
+        Column('RISK_FACTOR', '风险因子', FLOAT, precision=2),
+        Column('equ_type', '设备类型'),
+        Column('terminal_type', '终端类型'),
+        Column('batch_to_which_it_belongs', '所属批次'),
+        Column('communication_model', '通信方式'),
+        Column('connection_method', '接线方式'),
+        Column('protocol_type', '规约类型'),
+        Column('measurement_point_number', '计量点编号'),
+        Column('measurement_point_category', '计量点类别'),
+        Column('measurement_point_capacity', '计量点容量', FLOAT, precision=2),
+        Column('wiring_method', '计量点接线方式'),
+        Column('user_id', '用户编号'),
+        Column('user_name', '用户名称'),
+        Column('user_class', '用户类别'),
+        Column('user_address', '用户地址'),
+        Column('running_state', '电能表运行状态'),
+        Column('install_date', '安装日期', DATETIME),
+        Column('nominal_voltage', '额定电压', nullable=True),
+        Column('rated_current', '额定电流', nullable=True),
+    ]),
+    # 表4: MK_1_29_历史运维日志清单
+    TableSchema('1_29', 'MK_1_29_历史运维日志清单.csv', [
+        Column('RUN_METER_ID', '主键,运行电能表标识'),
+        Column('RUN_TERM_ID', '运行终端标识'),
+        Column('REASON_SWITCH', '切换原因'),
+        Column('REASON_SWITCH_TIME', '切换原因时间', DATETIME),
+        Column('SUPPLY_ORG_NO', '供电单位编号'),
+        Column('DATA_TIME', '数据时间', DATETIME),
+        Column('OPERATION_TIME', '操作时间', DATETIME),
+        Column('OPERATION_CONTENT', '操作内容'),
+        Column('OPERATION_STAFF', '操作人员'),
+        Column('OPERATION_DESCRIBE', '操作描述'),
+        Column('REASON_DESCRIBE', '原因描述'),
+        Column('EQU_SORT_CODE', '设备类别代码'),
+        Column('EQU_TYPE_CODE', '设备类型代码'),
+        Column('EQU_ID', '电能计量设备唯一标识'),
+        Column('METERING_POINT_NUMBER', '计量点编号'),
+    ]),
+    # 表7: MK_1_32_数据异常清单
+    TableSchema('1_32', 'MK_1_32_数据异常清单_手工录入_增量数据上送.csv', [
+        Column('DATA_TIME', '主键,数据时间', DATETIME),
+        Column('SUPPLY_ORG_NO', '主键,供电单位编码'),
+        Column('DATA_ANOMALY_TYPE', '数据异常类型'),
+        Column('TABLES', '表格类型'),
+        Column('TABLES_ENGLISH_NAME', '表英文名称'),
+        Column('TABLES_CHINESE_NAME', '表中文名称'),
+        Column('NUMBER_OF', '异常条数', INT),
+    ]),
+    # 表5: MK_1_30_风险等级清单
+    TableSchema('1_30', 'MK_1_30_风险等级清单_手动录入.csv', [
+        Column('DATA_TIME', '主键,数据时间', DATETIME),
+        Column('SUPPLY_ORG_NO', '供电单位编号'),
+        Column('DATA_FROM', '数据来源'),
+        Column('AREA_CODE', '地区编码'),
+        Column('TERMINAL_ID', '终端标识'),
+        Column('RUN_TERM_ID', '运行终端标识'),
+        Column('COMM_ADDR', '通讯地址'),
+        Column('REASON_SWITCH', '切换原因'),
+        Column('REASON_SWITCH_TIME', '切换原因时间', DATETIME),
+        Column('RUN_METER_ID', '运行电能表标识'),
+        Column('ELECTRICITY_ID', '用电标识'),
+        Column('TERMINAL_STATUS', '终端状态'),
+        Column('METERING_POINT_STATE', '计量点状态'),
+        Column('RISK_TYPE', '风险类型'),
+        Column('RISK_GRADE', '风险等级'),
+        Column('RISK_FACTOR', '风险因子'),
+        Column('RISK', '风险系数', FLOAT, precision=2),
+        Column('user_name', '用户名称'),
+        Column('user_id', '用户编号'),
+        Column('user_type', '用户类型'),
+        Column('user_addr', '用户地址'),
+        Column('base_risk_MANUFACTURER', '电能表厂家贡献度', FLOAT, precision=3),
+        Column('base_risk_BATCH', '电能表批次贡献度', FLOAT, precision=3),
+        Column('base_risk_LOAD', '负荷水平贡献度', FLOAT, precision=3),
+        Column('base_risk_data_security', '数据安全贡献度', FLOAT, precision=3),
+        Column('base_risk_uncap_event', '开盖事件记录贡献度', FLOAT, precision=3),
+        Column('incr_risk', '增量基础因子', FLOAT, precision=3),
+        Column('MANUFACTURER_NAME', '生产厂家名称'),
+        Column('ARRIVE_BATCH', '所属批次'),
+    ]),
+    # 表8: MK_1_33计算异常清单
+    TableSchema('1_33', 'MK_1_33计算异常清单_手工录入_增量数据上送.csv', [
+        Column('DATA_TIME', '主键,数据时间', DATETIME),
+        Column('SUPPLY_ORG_NO', '主键,供电单位编码'),
+        Column('RUNNING_STATE', '运行状态'),
+        Column('CALCULATIN_TASK_NAME', '计算任务名称'),
+        Column('CALCULATIN_ID', '计算任务ID'),
+        Column('ABNORMAL_TIME', '异常时间'),
+        Column('ABNORMAL_CAUSE', '异常原因'),
+        Column('CALCULATIN_TIME', '计算时长(按天累计)(H)', FLOAT, precision=2),
+    ]),
+    # 表9: MK_1_34_状态异常清单终端
+    TableSchema('1_34', 'MK_1_34_状态异常清单终端.csv', [
+        Column('SUPPLY_ORG_NO', '供电单位'),
+        Column('RUN_TERM_ID', '终端标识'),
+        Column('ASSETS_NO', '终端资产编号'),
+        Column('RUN_STATUS_CODE', '运行状态'),
+        Column('EXCEPTION_TYPE', '异常类型'),
+        Column('TERM_TYPE_CODE', '终端类型'),
+        Column('METERING_POINT_NUMBER', '计量点编号'),
+        Column('ELEC_CUST_NO', '用户编号'),
+        Column('CUST_TYPE_CODE', '用户类型'),
+        Column('ELEC_ADDR', '用户地址'),
+        Column('ABNORMAL_DATE', '异常日期', DATETIME),
+        Column('ELEC_CUST_NAME', '用户名称'),
+    ]),
+    # 表10: MK_1_35_状态异常清单电能表
+    TableSchema('1_35', 'MK_1_35_状态异常清单电能表.csv', [
+        Column('SUPPLY_ORG_NO', '供电单位'),
+        Column('energy_meter_identification', '运行电能表标识'),
+        Column('asset_code_meter', '电能表资产编码'),
+        Column('EXCEPTION_TYPE', '异常类型'),
+        Column('running_state', '运行状态'),
+        Column('measurement_point_number', '计量点编号'),
+        Column('user_id', '用户编号'),
+        Column('customer_type', '用户类型'),
+        Column('user_address', '用户地址'),
+        Column('abnormal_date', '异常日期', DATETIME),
+        Column('user_name', '用户名称'),
+    ]),
+    # 表11: MK_1_36_抄表不成功清单
+    TableSchema('1_36', 'MK_1_36_抄表不成功清单.csv', [
+        Column('SUPPLY_ORG_NO', '供电单位'),
+        Column('data_time', '数据时间', DATETIME),
+        Column('EQU_ID', '设备标识'),
+        Column('ASSETS_NO', '设备资产编码'),
+        Column('RUN_STATUS_CODE', '设备运行状态'),
+        Column('COMM_ADDR', '设备逻辑地址'),
+        Column('COMM_MODE', '通信方式'),
+        Column('PROTOCOL_CODE', '规约类型'),
+        Column('WIRE_MODE_CODE', '接线方式'),
+        Column('meter_reading_status', '抄表状态'),
+    ]),
+    # 表12: MK_1_15_运行电能表功率曲线
+    TableSchema('1_15', 'MK_1_15_运行电能表功率曲线.csv', [
+        Column('RUN_METER_ID', '主键。运行电能表的唯一标识'),
+        Column('DATA_TIME', '主键。数据时间', DATETIME),
+        Column('TP_FACTOR_A', 'A相功率因数', FLOAT, precision=3),
+        Column('RPOWER_A', 'A相无功功率', FLOAT, precision=4),
+        Column('POWER_A', 'A相有功功率', FLOAT, precision=4),
+        Column('APOWER_A', 'A相视在功率', FLOAT, precision=4),
+        Column('TP_FACTOR_B', 'B相功率因数', FLOAT, precision=3),
+        Column('RPOWER_B', 'B相无功功率', FLOAT, precision=4),
+        Column('POWER_B', 'B相有功功率', FLOAT, precision=4),
+        Column('APOWER_B', 'B相视在功率', FLOAT, precision=4),
+        Column('TP_FACTOR_C', 'C相功率因数', FLOAT, precision=3),
+        Column('RPOWER_C', 'C相无功功率', FLOAT, precision=4),
+        Column('POWER_C', 'C相有功功率', FLOAT, precision=4),
+        Column('APOWER_C', 'C相视在功率', FLOAT, precision=4),
+        Column('LOAD_TIME', '数据入库时间', DATETIME),
+        Column('PREPOSITION_TIME', '安全接入区前置接收到报文数据的时间', DATETIME),
+        Column('TP_FACTOR', '总功率因数', FLOAT, precision=3),
+        Column('RPOWER', '总无功功率', FLOAT, precision=4),
+        Column('POWER', '总有功功率', FLOAT, precision=4),
+        Column('APOWER', '总视在功率', FLOAT, precision=4),
+        Column('DATA_SOURCE_CODE', '数据采集方式'),
+        Column('CREATOR_ID', '记录数据创建人'),
+        Column('CREATE_TIME', '创建时间', DATETIME),
+        Column('MODIFIER_ID', '修改人'),
+        Column('UPDATE_TIME', '数据修改时间', DATETIME),
+        Column('DATA_FROM', '用于数据迁移标识'),
+        Column('AREA_CODE', '区分分省数据'),
+        Column('SUPPLY_ORG_NO', '区分地市局'),
+        Column('OPTIMISTIC_LOCK_VERSION', '用于控制并发脏数据', INT),
+        Column('DELETE_FLAG', '数据逻辑删除'),
+    ]),
+    # 表13: MK_1_16_运行电能表电压电流曲线
+    TableSchema('1_16', 'MK_1_16_运行电能表电压电流曲线.csv', [
+        Column('RUN_METER_ID', '主键。运行电能表的唯一标识'),
+        Column('DATA_TIME', '主键。数据时间', DATETIME),
+        Column('P_VOLT_A', 'A相电压', FLOAT, precision=3),
+        Column('P_CURR_A', 'A相电流', FLOAT, precision=3),
+        Column('P_VOLT_B', 'B相电压', FLOAT, precision=3),
+        Column('P_CURR_B', 'B相电流', FLOAT, precision=3),
+        Column('P_VOLT_C', 'C相电压', FLOAT, precision=3),
+        Column('P_CURR_C', 'C相电流', FLOAT, precision=3),
+        Column('LOAD_TIME', '数据入库时间', DATETIME),
+        Column('PREPOSITION_TIME', '安全接入区前置接收到报文数据的时间', DATETIME),
+        Column('DATA_SOURCE_CODE', '数据采集方式'),
+        Column('ZL_CURR', '零线电流', FLOAT, precision=3),
+        Column('CREATOR_ID', '记录数据创建人'),
+        Column('CREATE_TIME', '创建时间', DATETIME),
+        Column('MODIFIER_ID', '修改人'),
+        Column('UPDATE_TIME', '数据修改时间', DATETIME),
+        Column('DATA_FROM', '用于数据迁移标识'),
+        Column('AREA_CODE', '区分分省数据'),
+        Column('SUPPLY_ORG_NO', '区分地市局'),
+        Column('OPTIMISTIC_LOCK_VERSION', '用于控制并发脏数据', INT),
+        Column('DELETE_FLAG', '数据逻辑删除'),
+    ]),
+])
+
+
+# 以下为由表结构派生的查找表
+# 表编号 -> 输出文件名
+TABLE_FILES = OrderedDict((key, schema.file) for key, schema in SCHEMAS.items())
+
+# 表编号 -> {字段名: 类型}, 只含非字符串字段, 未列出的字段均按字符串处理
+COLUMN_DTYPES = {key: schema.dtypes for key, schema in SCHEMAS.items()}
+
+# 表编号 -> {字段名: 中文注释}
+TABLE_COMMENTS = {key: schema.comments for key, schema in SCHEMAS.items()}
+
+# 按电表/台区/时间筛选数据时使用的字段: 'meter'-电表标识, 'district'-台区编号, 'time'-时间
+# 没有电表标识但有台区编号的表直接按台区筛选, 有电表标识的表按电表所属台区筛选
+SLICE_COLUMNS = {
+    '1_3': {'meter': 'RUN_METER_ID'},
+    '1_4': {},
+    '1_31': {'district': 'TA_NO'},
+    '1_27': {'meter': 'RUN_METER_ID', 'time': 'DATA_TIME'},
+    '1_29': {'meter': 'RUN_METER_ID', 'time': 'DATA_TIME'},
+    '1_32': {'time': 'DATA_TIME'},
+    '1_30': {'meter': 'RUN_METER_ID', 'time': 'DATA_TIME'},
+    '1_33': {'time': 'DATA_TIME'},
+    '1_34': {'time': 'ABNORMAL_DATE'},
+    '1_35': {'meter': 'energy_meter_identification', 'time': 'abnormal_date'},
+    '1_36': {'meter': 'EQU_ID', 'time': 'data_time'},
+    '1_15': {'meter': 'RUN_METER_ID', 'time': 'DATA_TIME'},
+    '1_16': {'meter': 'RUN_METER_ID', 'time': 'DATA_TIME'},
+}
+
+
+def table_key_for_file(filename):
+    """根据文件名返回表编号, 无法识别时返回None"""
+    for key, table_file in TABLE_FILES.items():
+        if filename == table_file:
+            return key
+    return None
+
+
+def table_headers(key):
+    """返回表的字段名列表(按输出顺序)"""
+    return list(SCHEMAS[key].headers)
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pytest配置: 把生成程序所在目录加入 sys.path, 并注册 dataset_fixtures 中的测试数据fixture
+(meter_dataset / meter_dataset_factory)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest_plugins = ['dataset_fixtures']
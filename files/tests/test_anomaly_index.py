@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据异常索引: 按时间点序号存储和查找, 分组顺序为清单中首次出现的顺序
+"""
+
+from datetime import timedelta
+
+import pytest
+
+import config
+from anomaly_index import AnomalyCategory, AnomalyIndex
+
+
+def _time_series(count):
+    return [config.START_DATE + timedelta(minutes=config.INTERVAL_MINUTES * i) for i in range(count)]
+
+
+def _record(time_series, step, subtype):
+    return {'DATA_TIME': time_series[step].strftime('%Y-%m-%d %H:%M:%S'), 'DATA_ANOMALY_TYPE': subtype}
+
+
+def test_lookup_by_step():
+    time_series = _time_series(10)
+    records = [_record(time_series, 7, '电流反接'), _record(time_series, 2, '通信中断'),
+               _record(time_series, 7, '计量失准'), _record(time_series, 2, '电流反接')]
+    index = AnomalyIndex(records, time_series)
+    assert list(index.steps) == [7, 2]
+    assert index.mask_at(7) == AnomalyCategory.WIRING | AnomalyCategory.METERING
+    assert index.mask_at(0) == 0
+    assert index.types_by_step(AnomalyCategory.WIRING) == [(7, ['电流反接']), (2, ['电流反接'])]
+    assert index.types_by_step(AnomalyCategory.COMMUNICATION) == [(2, ['通信中断'])]
+
+
+def test_time_off_series_rejected():
+    time_series = _time_series(5)
+    for moment in (time_series[-1], time_series[0] + timedelta(minutes=1)):
+        with pytest.raises(ValueError):
+            AnomalyIndex([{'DATA_TIME': moment.strftime('%Y-%m-%d %H:%M:%S'), 'DATA_ANOMALY_TYPE': '电流反接'}],
+                         time_series[:4])
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MK_1_3 / MK_1_4 档案数据: 电表和终端的资产编号在较大规模下也不重复
+"""
+
+from api import generate
+
+
+def test_assets_no_unique_at_scale():
+    # 原先按6位随机数生成, 5000块电表中预计有十余个重复
+    data = generate(tables=['1_3', '1_4'], output='columns',
+                    config={'NUM_DISTRICTS': 16, 'TOTAL_METERS': 5000, 'RANDOM_SEED': 7})
+    meter_assets = data['1_3']['ASSETS_NO']
+    term_assets = data['1_4']['ASSETS_NO']
+    assert len(set(meter_assets)) == len(meter_assets)
+    assert len(set(term_assets)) == len(term_assets)
+    assert not set(meter_assets) & set(term_assets)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSV旁路索引: 按电表/时间点定位的结果与全文扫描一致; 中断后从索引快照续写, 结果与一次写完相同
+"""
+
+import os
+
+import pytest
+
+import csv_index
+from csv_index import OFFSETS_SUFFIX, SNAPSHOT_SUFFIX, StreamingCsvWriter, byte_ranges, lookup, write_csv_indexed
+from object_store import TMP_SUFFIX
+
+HEADERS = ['RUN_METER_ID', 'DATA_TIME', 'POWER']
+COMMENTS = {'RUN_METER_ID': '运行电能表标识', 'DATA_TIME': '数据时间'}
+METERS = [f'M{i:03d}' for i in range(7)]
+TIMES = [f'2025-09-01 {h:02d}:{m:02d}:00' for h in range(3) for m in (0, 15, 30, 45)]
+
+
+def make_rows(order):
+    pairs = ([(meter, time) for time in TIMES for meter in METERS] if order == 'time'
+             else [(meter, time) for meter in METERS for time in TIMES])
+    return [{'RUN_METER_ID': meter, 'DATA_TIME': time, 'POWER': f'{n * 0.5:.1f}'}
+            for n, (meter, time) in enumerate(pairs)]
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('order', ['time', 'meter'])
+def test_lookup_matches_scan(tmp_path, order):
+    rows = make_rows(order)
+    path = str(tmp_path / 'curve.csv')
+    write_csv_indexed(path, rows, HEADERS, COMMENTS)
+    for column, values in (('RUN_METER_ID', METERS), ('DATA_TIME', TIMES)):
+        for value in values:
+            assert lookup(path, column, value) == [row for row in rows if row[column] == value]
+    # 等差序列的每行各为一个区间, 连续行合并为一个区间
+    strided, contiguous = ('RUN_METER_ID', 'DATA_TIME') if order == 'time' else ('DATA_TIME', 'RUN_METER_ID')
+    value = rows[0][strided]
+    assert len(byte_ranges(path, strided, value)) == sum(row[strided] == value for row in rows)
+    assert len(byte_ranges(path, contiguous, rows[0][contiguous])) == 1
+    assert byte_ranges(path, 'RUN_METER_ID', 'missing') == []
+
+
+def test_resume_from_snapshot(tmp_path, monkeypatch):
+    rows = make_rows('time')
+    expected = str(tmp_path / 'expected.csv')
+    write_csv_indexed(expected, rows, HEADERS, COMMENTS)
+
+    path = str(tmp_path / 'curve.csv')
+    writer = StreamingCsvWriter(path, HEADERS, COMMENTS)
+    writer.write_rows(rows[:10])
+    writer.commit()  # 第一次提交保存快照
+    assert os.path.exists(path + SNAPSHOT_SUFFIX)
+    monkeypatch.setattr(csv_index, 'SNAPSHOT_RATIO', 10 ** 9)  # 之后的提交不再保存快照
+    writer.write_rows(rows[10:30])
+    state = writer.commit()
+    writer.write_rows(rows[30:40])  # 未提交, 续写时丢弃
+    writer.suspend()
+    assert not os.path.exists(path)
+    assert os.path.getsize(path + OFFSETS_SUFFIX + TMP_SUFFIX) >= 30 * 8
+
+    scans = []
+    original = csv_index._scan_rows
+
+    def scan_rows(f, end, *args, **kwargs):
+        scans.append(f.tell())
+        return original(f, end, *args, **kwargs)
+
+    monkeypatch.setattr(csv_index, '_scan_rows', scan_rows)
+    writer = StreamingCsvWriter(path, HEADERS, COMMENTS, resume_bytes=state['bytes'])
+    assert writer.rows == 30
+    writer.write_rows(rows[30:])
+    entry = writer.close()
+
+    # 只扫描快照(字段名行、注释行和10个数据行)之后提交的内容
+    lines = read_bytes(expected).splitlines(keepends=True)
+    assert scans == [len(b''.join(lines[:12]))]
+    assert entry['rows'] == len(rows)
+    assert read_bytes(path) == read_bytes(expected)
+    assert read_bytes(path + OFFSETS_SUFFIX) == read_bytes(expected + OFFSETS_SUFFIX)
+    assert csv_index.load_index(path)['columns'] == csv_index.load_index(expected)['columns']
+    assert not os.path.exists(path + SNAPSHOT_SUFFIX)
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith(TMP_SUFFIX)]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据工厂: 同样的参数生成的数据完全相同, 全部13张表之间的标识引用一致
+"""
+
+from dataset_fixtures import clear_cache, make_dataset
+from pipeline import TABLE_SPECS
+
+
+def as_dict(row):
+    """行字典或定长记录(namedtuple)统一为字典"""
+    return row._asdict() if hasattr(row, '_asdict') else row
+
+
+def column(dataset, key, name):
+    return [as_dict(row)[name] for row in dataset.tables[key]]
+
+
+def test_same_parameters_give_identical_tables():
+    first = make_dataset(seed=7)
+    clear_cache()
+    second = make_dataset(seed=7)
+    assert second is not first  # 缓存已清空, 重新生成
+    assert list(second.tables) == list(first.tables)
+    for key in first.tables:
+        assert [as_dict(row) for row in second.tables[key]] == [as_dict(row) for row in first.tables[key]], key
+
+
+def test_cached_dataset_is_shared():
+    assert make_dataset(seed=7) is make_dataset(seed=7)
+
+
+def test_all_tables_generated(meter_dataset):
+    assert set(meter_dataset.tables) == set(TABLE_SPECS)
+    assert len(meter_dataset.tables['1_3']) == 22
+    assert len(meter_dataset.tables['1_4']) == 2
+
+
+def test_master_ids_unique(meter_dataset):
+    for key, name in (('1_3', 'RUN_METER_ID'), ('1_3', 'EQU_ID'), ('1_3', 'ASSETS_NO'),
+                      ('1_4', 'RUN_TERM_ID'), ('1_4', 'EQU_ID'), ('1_4', 'ASSETS_NO')):
+        values = column(meter_dataset, key, name)
+        assert len(set(values)) == len(values), (key, name)
+    assert not set(column(meter_dataset, '1_3', 'ASSETS_NO')) & set(column(meter_dataset, '1_4', 'ASSETS_NO'))
+
+
+def test_ids_reference_master_tables(meter_dataset):
+    districts = {district['ta_no'] for district in meter_dataset.inputs['districts']}
+    meter_ids = set(column(meter_dataset, '1_3', 'RUN_METER_ID'))
+    meter_assets = set(column(meter_dataset, '1_3', 'ASSETS_NO'))
+    term_ids = set(column(meter_dataset, '1_4', 'RUN_TERM_ID'))
+    term_assets = set(column(meter_dataset, '1_4', 'ASSETS_NO'))
+    term_equ_ids = set(column(meter_dataset, '1_4', 'EQU_ID'))
+    references = [
+        ('1_3', 'RUN_METER_ID', set(meter_dataset.inputs['meters'].run_meter_ids)),
+        ('1_31', 'TA_NO', districts),
+        ('1_31', 'EQU_ID', term_equ_ids | meter_ids),
+        ('1_27', 'RUN_METER_ID', meter_ids),
+        ('1_27', 'RUN_TERM_ID', term_ids),
+        ('1_27', 'TERMINAL_ID', term_assets),
+        ('1_29', 'RUN_METER_ID', meter_ids),
+        ('1_29', 'RUN_TERM_ID', term_ids),
+        ('1_30', 'RUN_METER_ID', meter_ids),
+        ('1_30', 'RUN_TERM_ID', term_ids),
+        ('1_30', 'TERMINAL_ID', term_assets),
+        ('1_34', 'RUN_TERM_ID', term_ids),
+        ('1_34', 'ASSETS_NO', term_assets),
+        ('1_35', 'energy_meter_identification', meter_ids),
+        ('1_35', 'asset_code_meter', meter_assets),
+        ('1_36', 'EQU_ID', meter_ids),
+        ('1_36', 'ASSETS_NO', meter_assets),
+        ('1_15', 'RUN_METER_ID', meter_ids),
+        ('1_16', 'RUN_METER_ID', meter_ids),
+    ]
+    for key, name, allowed in references:
+        values = set(column(meter_dataset, key, name))
+        assert values <= allowed, (key, name, sorted(values - allowed)[:5])
+
+    # 硬件状态: 终端行的设备ID和资产编号属于同一个终端
+    terminals = {as_dict(row)['EQU_ID']: as_dict(row)['ASSETS_NO'] for row in meter_dataset.tables['1_4']}
+    for row in map(as_dict, meter_dataset.tables['1_31']):
+        if row['EQU_ID'] in terminals:
+            assert row['ASSETS_NO'] == terminals[row['EQU_ID']]
+
+
+def test_curves_cover_every_meter_and_time_point(meter_dataset):
+    time_points = len(meter_dataset.inputs['time_series'])
+    for key in ('1_15', '1_16'):
+        rows = meter_dataset.tables[key]
+        assert len(rows) == 22 * time_points
+        assert len({(row['RUN_METER_ID'], row['DATA_TIME']) for row in rows}) == len(rows)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据集读取: 安装numpy时整列解析数值, 结果与逐个用float/int转换一致
+"""
+
+import math
+import os
+from array import array
+
+import pytest
+
+import dataset_reader
+from dataset_reader import convert_column, read_table
+
+
+def same_column(a, b):
+    if isinstance(a, array):
+        return (isinstance(b, array) and a.typecode == b.typecode and len(a) == len(b)
+                and all(x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(a, b)))
+    return a == b
+
+
+@pytest.mark.parametrize('values, dtype, expected', [
+    (['1', '2'], 'int', array('q', [1, 2])),
+    (['1', '', '3'], 'int', array('d', [1.0, float('nan'), 3.0])),  # 含空值的整数列退化为浮点列
+    (['1.5', '-2'], 'float', array('d', [1.5, -2.0])),
+    (['', ''], 'float', array('d', [float('nan'), float('nan')])),
+    ([], 'float', array('d')),
+    (['a', ''], None, ['a', '']),
+])
+def test_convert_column(values, dtype, expected, monkeypatch):
+    assert same_column(convert_column(values, dtype), expected)
+    monkeypatch.setattr(dataset_reader, '_np', None)
+    assert same_column(convert_column(values, dtype), expected)
+
+
+def test_bulk_parse_matches_fallback(meter_dataset, tmp_path, monkeypatch):
+    pytest.importorskip('numpy')
+    manifest = meter_dataset.write(tmp_path)
+    paths = [os.path.join(str(tmp_path), entry['path']) for entry in manifest['files']
+             if entry['path'].endswith('.csv')]
+    bulk = {path: read_table(path) for path in paths}
+    monkeypatch.setattr(dataset_reader, '_np', None)
+    for path in paths:
+        fallback = read_table(path)
+        assert list(fallback) == list(bulk[path])
+        for name in fallback:
+            assert same_column(bulk[path][name], fallback[name]), (path, name)
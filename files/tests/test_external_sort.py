@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外部排序: 分块大小在调用时读取 config.SORT_CHUNK_ROWS, 分块与否结果一致
+"""
+
+import config
+from external_sort import external_sort_csv
+
+
+def test_chunk_rows_read_at_call_time(tmp_path, capsys):
+    src = tmp_path / 'curve.csv'
+    rows = [f'M{i % 7:02d},2025-09-01 00:{i % 60:02d}:00,{i}' for i in range(100)]
+    src.write_text('METER_ID,DATA_TIME,VALUE\r\n电表,时间,值\r\n' + '\r\n'.join(rows) + '\r\n', encoding='utf-8')
+    with config.override(SORT_CHUNK_ROWS=10):
+        assert external_sort_csv(str(src), str(tmp_path / 'small.csv'), ('METER_ID', 'DATA_TIME')) == 100
+    assert '分块数: 10' in capsys.readouterr().out
+    external_sort_csv(str(src), str(tmp_path / 'whole.csv'), ('METER_ID', 'DATA_TIME'))
+    assert '分块数: 1' in capsys.readouterr().out
+    assert (tmp_path / 'small.csv').read_bytes() == (tmp_path / 'whole.csv').read_bytes()
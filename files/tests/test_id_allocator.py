@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ID分配: 逐个分配只记录实际取出的ID, 标量与numpy置换一致, 相邻计数器的ID不成等差
+"""
+
+import pytest
+
+import id_allocator
+from id_allocator import IdAllocator, _Permutation
+
+
+def test_next_id_records_consumed_counters():
+    allocator = IdAllocator(seed=7)
+    allocator.begin('1_31')
+    ids = [allocator.next_id('KEEP') for _ in range(22)]
+    assert allocator.counters() == {'1_31:KEEP:16': 22}
+    expected = IdAllocator(seed=7)
+    expected.begin('1_31')
+    assert expected.allocate('KEEP', 22) == ids
+
+
+def test_next_id_interleaved_with_allocate():
+    allocator = IdAllocator(seed=7)
+    allocator.begin('1_31')
+    ids = [allocator.next_id('EQU') for _ in range(3)] + allocator.allocate('EQU', 4)
+    ids += [allocator.next_id('EQU') for _ in range(3)]
+    expected = IdAllocator(seed=7)
+    expected.begin('1_31')
+    assert ids == expected.allocate('EQU', 10)
+    assert allocator.counters() == {'1_31:EQU:16': 10}
+
+
+def test_permutation_array_matches_scalar():
+    np = pytest.importorskip('numpy')
+    permutation = _Permutation('7:EQU', 13)
+    x = np.arange(0, 50000, dtype=np.uint64) * np.uint64(7919)
+    high, low = permutation.array(x)
+    assert list(zip(high.tolist(), low.tolist())) == [permutation(int(v)) for v in x]
+
+
+def test_consecutive_ids_not_arithmetic():
+    np = pytest.importorskip('numpy')
+    permutation = _Permutation('7:EQU', 13)
+    high, low = permutation.array(np.arange(100000, dtype=np.uint64))
+    values = high * np.uint64(10 ** permutation.v) + low
+    assert len(np.unique(values)) == len(values)
+    steps = np.diff(values[:1000].astype(np.int64))
+    assert len(np.unique(steps)) > 990
+    assert (steps < 0).sum() > 400
+
+
+def test_id_space_exhausted():
+    allocator = IdAllocator(seed=7)
+    allocator.begin('1_31')
+    block = 10 ** 3 // len(id_allocator.NAMESPACES)
+    ids = [allocator.next_id('P', 4) for _ in range(block)]
+    assert len(set(ids)) == block
+    with pytest.raises(ValueError):
+        allocator.next_id('P', 4)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量生成: 事件类表每块电表的事件数按新时间范围的长度缩放; 命令行 --append 与 --tables/--resume 互斥
+"""
+
+from datetime import datetime
+
+import pytest
+
+import config
+from checksums import load_dataset_manifest
+from csv_writer_and_main import main
+from incremental import run_increment
+from main import build_parser, config_overrides
+
+
+def rows_by_path(manifest):
+    return {entry['path']: entry['rows'] for entry in manifest['files']}
+
+
+def test_event_counts_scale_with_window(tmp_path):
+    base = dict(OUTPUT_DIR=str(tmp_path), NUM_DISTRICTS=2, TOTAL_METERS=22, RANDOM_SEED=7,
+                RUN_CLOCK=datetime(2025, 9, 8))
+    with config.override(END_DATE=datetime(2025, 9, 4, 23, 45), **base):
+        main()
+    full = rows_by_path(load_dataset_manifest(str(tmp_path)))
+    with config.override(END_DATE=datetime(2025, 9, 5, 23, 45), **base):
+        run_increment('append')
+    added = {path: rows - full[path] for path, rows in rows_by_path(load_dataset_manifest(str(tmp_path))).items()}
+
+    # 全量4天, 增量1天: 运维日志每块表 (7-14) / 4 条, 而不是每次增量都生成7-14条
+    maintenance = 'MK_1_29_历史运维日志清单.csv'
+    assert 0.15 * full[maintenance] < added[maintenance] < 0.35 * full[maintenance]
+    # 曲线表按时间点数等比增长
+    curve = 'MK_1_15_运行电能表功率曲线.csv'
+    assert added[curve] * 4 == full[curve]
+
+
+@pytest.mark.parametrize('argv', [['--append', 'delta', '--tables', '1_3'], ['--append', 'append', '--resume']])
+def test_append_flag_rejects_incompatible_flags(argv):
+    parser = build_parser()
+    with pytest.raises(SystemExit):
+        config_overrides(parser, parser.parse_args(argv))
+
+
+def test_append_flag_sets_mode():
+    parser = build_parser()
+    assert config_overrides(parser, parser.parse_args(['--append', 'delta']))['APPEND_MODE'] == 'delta'
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对象存储输出: 在本地moto服务上验证分片上传、出错时取消上传、写入对象存储时不创建本地目录,
+以及本地输出先写 .tmp 再重命名的原子提交
+"""
+
+import hashlib
+import json
+import os
+import socket
+
+import pytest
+
+import config
+from checksums import open_hashed
+from csv_writer_and_main import main
+from object_store import TMP_SUFFIX, AtomicFile, S3Client, S3MultipartWriter, _get_executor
+
+PART_BYTES = 5 * 1024 * 1024  # S3要求的最小分片大小
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def s3_endpoint():
+    server_module = pytest.importorskip('moto.server')
+    port = _free_port()
+    server = server_module.ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    yield f'http://127.0.0.1:{port}'
+    server.stop()
+
+
+@pytest.fixture
+def s3(s3_endpoint, monkeypatch, request):
+    """每个用例一个新桶, 返回 (客户端, 桶名)"""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    client = S3Client(s3_endpoint, 'test', 'test')
+    bucket = request.node.name.replace('_', '-')[:63]
+    client.request('PUT', bucket, '')
+    return client, bucket
+
+
+def _exists(client, bucket, key):
+    try:
+        client.get_object(bucket, key)
+    except OSError:
+        return False
+    return True
+
+
+def test_multipart_upload(s3):
+    client, bucket = s3
+    body = os.urandom(2 * PART_BYTES + 12345)  # 两个整片加一个不足最小分片的尾片
+    writer = S3MultipartWriter(client, bucket, 'run/data.bin', PART_BYTES, _get_executor(), 2)
+    for start in range(0, len(body), 1000003):
+        writer.write(body[start:start + 1000003])
+    assert not _exists(client, bucket, 'run/data.bin')  # 合并前对象不可见
+    writer.close()
+    assert hashlib.sha256(client.get_object(bucket, 'run/data.bin')).digest() == hashlib.sha256(body).digest()
+
+
+def test_empty_object(s3):
+    client, bucket = s3
+    S3MultipartWriter(client, bucket, 'empty.csv', PART_BYTES, _get_executor(), 2).close()
+    assert client.get_object(bucket, 'empty.csv') == b''
+
+
+def test_error_aborts_upload(s3, tmp_path):
+    client, bucket = s3
+    with config.override(S3_ENDPOINT=f'http://{client.host}', OBJECT_STORE_URL=f's3://{bucket}/run',
+                         OUTPUT_DIR=str(tmp_path), S3_PART_BYTES=PART_BYTES):
+        with pytest.raises(RuntimeError):
+            with open_hashed(os.path.join(str(tmp_path), 'bad.csv')) as (f, _):
+                f.write('x' * (PART_BYTES + 1))
+                raise RuntimeError('boom')
+    assert not _exists(client, bucket, 'run/bad.csv')
+
+
+def test_object_store_run_creates_no_local_dirs(s3, tmp_path):
+    client, bucket = s3
+    output_dir = str(tmp_path / 'output')
+    with config.override(S3_ENDPOINT=f'http://{client.host}', OBJECT_STORE_URL=f's3://{bucket}/run',
+                         OUTPUT_DIR=output_dir, S3_PART_BYTES=PART_BYTES,
+                         NUM_DISTRICTS=2, TOTAL_METERS=22, RANDOM_SEED=7,
+                         END_DATE=config.START_DATE.replace(hour=23, minute=45)):
+        main(targets=['1_15'])
+    assert not os.path.exists(output_dir)
+    manifest = json.loads(client.get_object(bucket, 'run/manifest.json'))
+    assert manifest['files']
+    for entry in manifest['files']:
+        body = client.get_object(bucket, 'run/' + entry['path'])
+        assert len(body) == entry['bytes']
+        assert hashlib.sha256(body).hexdigest() == entry['sha256']
+
+
+def test_atomic_file_renames_on_close(tmp_path):
+    path = str(tmp_path / 'table.csv')
+    f = AtomicFile(path)
+    f.write(b'a,b\r\n')
+    assert os.path.exists(path + TMP_SUFFIX)
+    assert not os.path.exists(path)  # 关闭前目标文件不可见
+    f.close()
+    assert not os.path.exists(path + TMP_SUFFIX)
+    with open(path, 'rb') as g:
+        assert g.read() == b'a,b\r\n'
+
+
+def test_atomic_file_abort_keeps_previous_file(tmp_path):
+    path = str(tmp_path / 'table.csv')
+    with open(path, 'wb') as g:
+        g.write(b'old')
+    f = AtomicFile(path)
+    f.write(b'new')
+    f.abort()
+    f.close()
+    assert not os.path.exists(path + TMP_SUFFIX)
+    with open(path, 'rb') as g:
+        assert g.read() == b'old'
+
+
+def test_atomic_file_resume(tmp_path):
+    path = str(tmp_path / 'table.csv')
+    f = AtomicFile(path)
+    f.write(b'committed|lost')
+    f.sync()
+    f.suspend()
+    f.close()
+    assert not os.path.exists(path)  # 挂起时保留临时文件, 不提交
+    f = AtomicFile(path, resume_bytes=len(b'committed|'))
+    f.write(b'resumed')
+    f.close()
+    with open(path, 'rb') as g:
+        assert g.read() == b'committed|resumed'
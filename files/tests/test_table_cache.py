@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表缓存: 生成逻辑版本覆盖生成函数用到的辅助模块, 修改其中任何一个都使缓存失效
+"""
+
+import importlib
+import sys
+
+import table_cache
+from pipeline import TABLE_SPECS
+
+
+def test_dependency_modules():
+    modules = table_cache.dependency_modules(TABLE_SPECS['1_3']['generator'])
+    assert {'basic_data_generators', 'column_specs', 'batch_random', 'id_allocator'} <= set(modules)
+    assert 'config' not in modules  # 配置项的取值单独计入缓存键
+    assert 'anomaly_timeline' in table_cache.dependency_modules(TABLE_SPECS['1_15']['generator'])
+
+
+def test_helper_change_changes_version(tmp_path, monkeypatch):
+    (tmp_path / 'cache_demo_helper.py').write_text('def scale():\n    return 1\n', encoding='utf-8')
+    (tmp_path / 'cache_demo_generator.py').write_text(
+        'def generate():\n    from cache_demo_helper import scale\n    return scale()\n', encoding='utf-8')
+    monkeypatch.setattr(table_cache, '_PACKAGE_DIR', str(tmp_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'cache_demo_generator', raising=False)
+    generate = importlib.import_module('cache_demo_generator').generate
+    table_cache._dependency_paths.cache_clear()
+    try:
+        assert table_cache.dependency_modules(generate) == ['cache_demo_generator', 'cache_demo_helper']
+        before = table_cache.source_version(generate, 2)
+        (tmp_path / 'cache_demo_helper.py').write_text('def scale():\n    return 2\n', encoding='utf-8')
+        assert table_cache.source_version(generate, 2) != before
+    finally:
+        table_cache._dependency_paths.cache_clear()
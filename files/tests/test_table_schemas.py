@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表结构声明: CSV注释行与原输出保持一致
+"""
+
+from table_schemas import SCHEMAS
+
+
+def test_terminal_columns_without_comments():
+    # 原输出中这些终端字段的中文注释为空
+    comments = SCHEMAS['1_4'].comments
+    for name in ('DOWN_COMM_CHANNEL', 'METERING_POINT_NAME', 'COMM_TYPE', 'PROTOCOL_TYPE',
+                 'TERM_TYPE_CODE', 'PRESET_AMT', 'REMARKS'):
+        assert comments[name] == '', name
+    assert comments['COMM_ADDR'] == '通讯地址'
@@ -5,28 +5,68 @@
 包含通用的辅助函数
 """
 
-import random
-import string
-from datetime import timedelta
-from config import START_DATE, END_DATE, INTERVAL_MINUTES, UNIFIED_SUPPLY_ORG_NO
+from datetime import datetime, timedelta
+import config
+import id_allocator
+
+# 本次运行开始时间, config.RUN_CLOCK 未设置时作为各表的"当前时间"
+_run_started = datetime.now().replace(microsecond=0)
+
+
+def reset_run_clock():
+    """把运行开始时间重置为当前时间(每次生成开始时调用)"""
+    global _run_started
+    _run_started = datetime.now().replace(microsecond=0)
+
+
+def run_clock():
+    """
+    返回本次运行的"当前时间", 用于 CREATE_TIME/LOAD_TIME 等字段
+
+    设置了 config.RUN_CLOCK 时固定返回该时间, 输出可复现;
+    否则返回运行开始时间, 同一次运行中各表取值一致
+    """
+    return config.RUN_CLOCK or _run_started
 
 
 def get_unified_org_no():
     """返回统一的供电单位编号"""
-    return UNIFIED_SUPPLY_ORG_NO
+    return config.UNIFIED_SUPPLY_ORG_NO
 
 
 def generate_time_series():
     """生成从开始到结束的时间序列,间隔15分钟"""
     times = []
-    current = START_DATE
-    while current <= END_DATE:
+    current = config.START_DATE
+    while current <= config.END_DATE:
         times.append(current)
-        current += timedelta(minutes=INTERVAL_MINUTES)
+        current += timedelta(minutes=config.INTERVAL_MINUTES)
     return times
 
 
 def generate_id(prefix, length=16):
-    """生成指定长度的ID"""
-    random_part = ''.join(random.choices(string.digits, k=length-len(prefix)))
-    return prefix + random_part
+    """生成指定长度的ID(前缀 + 数字), 同一前缀不重复, 见 id_allocator"""
+    return id_allocator.next_id(prefix, length)
+
+
+def iter_curve_points(time_series, meters, order='time'):
+    """
+    按指定顺序遍历曲线表的(时间字符串, 电表标识, 是否总表)组合
+
+    meters: 电表登记表(MeterRegistry)
+    order='time': 时间优先, 每个时间点依次输出所有电表
+    order='meter': 电表优先, 按 RUN_METER_ID 排序后依次输出每个电表的全部时间点
+    """
+    time_strs = [t.strftime('%Y-%m-%d %H:%M:%S') for t in time_series]
+    if order == 'time':
+        columns = list(zip(meters.run_meter_ids, meters.is_total))
+        for time_str in time_strs:
+            for meter_id, is_total in columns:
+                yield time_str, meter_id, is_total
+    elif order == 'meter':
+        meters = meters.sorted_by_id()
+        for meter_id, is_total in zip(meters.run_meter_ids, meters.is_total):
+            for time_str in time_strs:
+                yield time_str, meter_id, is_total
+    else:
+        raise ValueError(f"不支持的曲线输出顺序: {order}, 可选: 'time' / 'meter'")